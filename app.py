@@ -92,28 +92,17 @@ def auto_initialize_system():
     """Sistem açılışında otomatik olarak RAG'i yükle"""
     if os.path.exists("faiss_db") and not st.session_state.vectorstore_loaded:
         try:
-            # Seçili modelle RAG başlat
-            rag = RAGPipeline(model_provider=st.session_state.selected_model)
+            # Seçili modelle RAG başlat; Gemini erişilemezse istekler çalışma anında Ollama'ya yönlenir
+            rag = RAGPipeline(model_provider=st.session_state.selected_model, fallback_providers=["ollama"])
             rag.load_vectorstore()
             rag.create_qa_chain(k=6)
             st.session_state.rag_pipeline = rag
             st.session_state.vectorstore_loaded = True
             st.session_state.system_ready = True
             return True
-        except Exception as e:
-            # Fallback: Gemini başarısızsa Ollama ile deneyelim
-            try:
-                rag = RAGPipeline(model_provider="ollama")
-                rag.load_vectorstore()
-                rag.create_qa_chain(k=6)
-                st.session_state.rag_pipeline = rag
-                st.session_state.vectorstore_loaded = True
-                st.session_state.system_ready = True
-                st.session_state.selected_model = "ollama"
-                return True
-            except Exception:
-                st.session_state.system_ready = False
-                return False
+        except Exception:
+            st.session_state.system_ready = False
+            return False
     elif not os.path.exists("faiss_db"):
         st.session_state.system_ready = False
         return False
@@ -123,35 +112,28 @@ def auto_initialize_system():
 def process_data():
     """Veri işleme ve vektör veritabanı oluşturma"""
     try:
-        with st.spinner("Veriler işleniyor..."):
-            # Data processor oluştur
-            processor = DataProcessor(chunk_size=1000, chunk_overlap=200)
-            
-            # Veri dizinini kontrol et
-            if not os.path.exists('data'):
-                st.error("'data' klasörü bulunamadı!")
-                return False
-            
-            # Verileri işle
-            # Streamlit stdout/stderr kapalı olabilir; güvenli yönlendirme kullan
-            with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
-                documents = processor.process_directory('data')
-            
-            if len(documents) == 0:
-                st.error("İşlenecek veri bulunamadı!")
-                return False
-            
-            st.info(f"{len(documents)} chunk oluşturuldu")
-            
-        with st.spinner("Vektör veritabanı oluşturuluyor..."):
+        # Data processor oluştur
+        processor = DataProcessor(chunk_size=1000, chunk_overlap=200)
+        
+        # Veri dizinini kontrol et
+        if not os.path.exists('data'):
+            st.error("'data' klasörü bulunamadı!")
+            return False
+        
+        if len(processor.list_data_files('data')) == 0:
+            st.error("İşlenecek veri bulunamadı!")
+            return False
+        
+        with st.spinner("Vektör veritabanı güncelleniyor..."):
             # RAG pipeline oluştur (seçili model ile)
+            # Streamlit stdout/stderr kapalı olabilir; güvenli yönlendirme kullan
             with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
-                rag = RAGPipeline(model_provider=st.session_state.selected_model)
+                rag = RAGPipeline(model_provider=st.session_state.selected_model, fallback_providers=["ollama"])
             
-            # Vektör veritabanı oluştur
-            # Olası print'leri güvenli şekilde yönlendir
+            # Yalnızca eklenen/değişen/silinen dosyaları işle (manifest yoksa tam indeksleme)
             with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
-                rag.create_vectorstore(documents)
+                # Yarıda kalmış bir kurulum varsa (aynı dosyalarla) checkpoint'ten devam eder
+                summary = rag.update_vectorstore('data', processor, resume=True)
             
             # QA zinciri oluştur (k=2 daha hızlı)
             with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
@@ -161,7 +143,19 @@ def process_data():
             st.session_state.vectorstore_loaded = True
             st.session_state.system_ready = True
             
-            st.success(f"Vektör veritabanı başarıyla oluşturuldu ({len(documents)} chunk)")
+            if summary['full_rebuild']:
+                st.success(f"Vektör veritabanı başarıyla oluşturuldu ({summary['chunks_added']} chunk)")
+            else:
+                st.success(
+                    f"Vektör veritabanı güncellendi: {summary['added']} yeni, {summary['changed']} değişen, "
+                    f"{summary['deleted']} silinen dosya (+{summary['chunks_added']} / -{summary['chunks_removed']} chunk)"
+                )
+            cache_stats = rag.get_embedding_cache_stats()
+            if cache_stats:
+                st.caption(
+                    f"Embedding önbelleği: {cache_stats['hits']} isabet, "
+                    f"{cache_stats['misses']} yeni/değişen chunk gömüldü"
+                )
             return True
             
     except Exception as e:
@@ -169,17 +163,18 @@ def process_data():
         return False
 
 
-def display_chat_message(role: str, content: str):
-    """Chat mesajını gösterir"""
+def display_chat_message(role: str, content: str, container=None):
+    """Chat mesajını gösterir (container verilirse, ör. st.empty(), onun içine yazar)"""
+    container = container or st
     if role == "user":
-        st.markdown(f"""
+        container.markdown(f"""
         <div class="chat-message user-message">
             <strong>Sen:</strong><br>
             {content}
         </div>
         """, unsafe_allow_html=True)
     else:
-        st.markdown(f"""
+        container.markdown(f"""
         <div class="chat-message bot-message">
             <strong>Film Uzmani:</strong><br>
             {content}
@@ -266,19 +261,42 @@ def main():
         unique_titles = 0
         try:
             if st.session_state.rag_pipeline and st.session_state.rag_pipeline.vectorstore:
-                ds = getattr(st.session_state.rag_pipeline.vectorstore, 'docstore', None)
-                store = getattr(ds, '_dict', {}) if ds else {}
-                titles = set()
-                for v in store.values():
-                    meta = getattr(v, 'metadata', {})
-                    t = meta.get('title')
-                    if t:
-                        titles.add(t)
-                unique_titles = len(titles)
+                unique_titles = st.session_state.rag_pipeline.count_unique_titles()
         except Exception:
             unique_titles = 0
         st.metric("Benzersiz Film (tahmini)", unique_titles)
         st.metric("Mesaj Sayısı", len(st.session_state.messages))
+        if st.session_state.rag_pipeline:
+            query_stats = st.session_state.rag_pipeline.get_query_cache_stats()
+            if query_stats:
+                st.caption(
+                    f"Sorgu önbelleği: {query_stats['hits']} isabet / "
+                    f"{query_stats['misses']} ıska (%{query_stats['hit_rate'] * 100:.0f})"
+                )
+            answer_stats = st.session_state.rag_pipeline.get_answer_cache_stats()
+            if answer_stats:
+                st.caption(
+                    f"Cevap önbelleği: {answer_stats['hits']} isabet / "
+                    f"{answer_stats['misses']} ıska (%{answer_stats['hit_rate'] * 100:.0f}), "
+                    f"{answer_stats['entries']} kayıt"
+                )
+            # LLM backend'leri: devre durumu ve medyan gecikme
+            for backend in st.session_state.rag_pipeline.get_llm_stats():
+                if backend['calls'] or backend['state'] != 'closed':
+                    state = "🟢" if backend['state'] == 'closed' else ("🟡" if backend['state'] == 'half_open' else "🔴")
+                    latency = f", p50 {backend['latency_p50_ms']:.0f} ms" if backend['latency_p50_ms'] is not None else ""
+                    st.caption(f"{state} {backend['name']}: %{backend['error_rate'] * 100:.0f} hata{latency}")
+            # Sorgu aşamalarının gecikme dağılımı (tüm oturumlar, son TRACE_WINDOW sorgu)
+            if st.checkbox("⏱️ Gecikme istatistikleri", key="show_latency"):
+                stages = st.session_state.rag_pipeline.get_latency_summary('query').get('query', {})
+                if stages:
+                    st.table([
+                        {'aşama': stage, 'n': values['count'], 'p50 ms': values['p50_ms'],
+                         'p95 ms': values['p95_ms'], 'p99 ms': values['p99_ms']}
+                        for stage, values in stages.items()
+                    ])
+                else:
+                    st.caption("Henüz ölçüm yok")
         
         st.divider()
         
@@ -339,36 +357,41 @@ def main():
             # Kullanıcı mesajını göster
             display_chat_message("user", user_question)
             
-            # Bot cevabını al
-            with st.spinner("Düşünüyorum..."):
-                try:
-                    result = st.session_state.rag_pipeline.query(user_question)
-                    bot_response = result['answer']
-                    
-                    # Bot mesajını ekle
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": bot_response
-                    })
-                    
-                    # Bot mesajını göster
-                    display_chat_message("assistant", bot_response)
-                    
-                    # Kaynak belgeleri göster (expander içinde)
-                    if result['source_documents']:
-                        with st.expander("Kaynak Belgeler"):
-                            for i, doc in enumerate(result['source_documents'], 1):
-                                st.markdown(f"**Kaynak {i}:**")
-                                st.text(doc.page_content[:300] + "...")
-                                st.divider()
-                    
-                except Exception as e:
-                    error_message = f"Üzgünüm, bir hata oluştu: {str(e)}"
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": error_message
-                    })
-                    display_chat_message("assistant", error_message)
+            # Bot cevabını akış halinde al: kaynaklar getirilir getirilmez, cevap token token gösterilir
+            answer_placeholder = st.empty()
+            display_chat_message("assistant", "Düşünüyorum...", answer_placeholder)
+            sources_container = st.container()
+            try:
+                bot_response = ""
+                for event in st.session_state.rag_pipeline.stream_query(user_question):
+                    if event['type'] == 'sources':
+                        # Kaynak belgeleri göster (expander içinde)
+                        if event['source_documents']:
+                            with sources_container.expander("Kaynak Belgeler"):
+                                for i, doc in enumerate(event['source_documents'], 1):
+                                    st.markdown(f"**Kaynak {i}:**")
+                                    st.text(doc.page_content[:300] + "...")
+                                    st.divider()
+                    elif event['type'] == 'token':
+                        bot_response += event['content']
+                        display_chat_message("assistant", bot_response + "▌", answer_placeholder)
+                    else:
+                        bot_response = event['answer']
+                
+                # Bot mesajını ekle ve son halini göster
+                st.session_state.messages.append({
+                    "role": "assistant",
+                    "content": bot_response
+                })
+                display_chat_message("assistant", bot_response, answer_placeholder)
+                
+            except Exception as e:
+                error_message = f"Üzgünüm, bir hata oluştu: {str(e)}"
+                st.session_state.messages.append({
+                    "role": "assistant",
+                    "content": error_message
+                })
+                display_chat_message("assistant", error_message, answer_placeholder)
             
             # Sayfayı yenile
             st.rerun()
@@ -0,0 +1,61 @@
+"""
+Benchmark Karşılaştırma Script'i
+İki benchmark sonuç dosyasını metrik metrik karşılaştırır ve yüzde değişimi gösterir
+"""
+import json
+import argparse
+
+
+def flatten(value, prefix=""):
+    """İç içe sonuç sözlüğündeki sayısal değerler, {"a.b.c": sayı} biçiminde"""
+    if isinstance(value, dict):
+        items = {}
+        for key, child in value.items():
+            items.update(flatten(child, f"{prefix}.{key}" if prefix else str(key)))
+        return items
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files metric by metric")
+    parser.add_argument("baseline", help="Older result JSON")
+    parser.add_argument("candidate", help="Newer result JSON")
+    parser.add_argument("--threshold", type=float, default=0.0, help="Only show metrics that changed by more than this percent")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"baseline:  {old['meta'].get('commit')} ({old['meta'].get('timestamp')})")
+    print(f"candidate: {new['meta'].get('commit')} ({new['meta'].get('timestamp')})")
+    for key in ("embedding_model", "embedding_backend", "index_spec", "data_file", "build_docs", "queries", "cpu_count"):
+        if old["meta"].get(key) != new["meta"].get(key):
+            print(f"⚠️ {key} differs: {old['meta'].get(key)} -> {new['meta'].get(key)}")
+
+    old_metrics = flatten(old["results"])
+    new_metrics = flatten(new["results"])
+    width = max((len(name) for name in old_metrics.keys() | new_metrics.keys()), default=10)
+    print(f"\n{'metric':<{width}} {'baseline':>12} {'candidate':>12} {'change':>9}")
+    for name in sorted(old_metrics.keys() | new_metrics.keys()):
+        before = old_metrics.get(name)
+        after = new_metrics.get(name)
+        if before is None or after is None:
+            change = "n/a"
+        elif before == 0:
+            if after == 0 and args.threshold > 0:
+                continue
+            change = "0.0%" if after == 0 else "new"
+        else:
+            percent = (after - before) / abs(before) * 100
+            if abs(percent) <= args.threshold:
+                continue
+            change = f"{percent:+.1f}%"
+        print(f"{name:<{width}} {str(before if before is not None else '-'):>12} "
+              f"{str(after if after is not None else '-'):>12} {change:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Yük Testi Script'i
+Stub LLM ile N eşzamanlı sanal oturumun RAGPipeline üzerindeki verimini (QPS), gecikme
+yüzdeliklerini, hatalarını ve oturum başına bellek maliyetini ağa çıkmadan ölçer
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+from dotenv import load_dotenv
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.run import (
+    QUESTIONS, bench_build, git_commit, latency_stats, offline_environment, peak_rss_mb, run_isolated
+)
+
+MODES = ("per-session", "shared")
+
+
+def current_rss_mb() -> float:
+    """Anlık bellek kullanımı (Linux /proc); diğer sistemlerde en yüksek değer"""
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def run_level(args, mode: str, concurrency: int) -> dict:
+    """
+    Yeni bir süreçte tek eşzamanlılık seviyesi: N sanal oturum birlikte başlar ve her biri
+    --queries-per-session soru gönderir. "per-session" app.py'nin her Streamlit oturumunda yaptığı
+    gibi oturum başına bir RAGPipeline kurar; "shared" tüm oturumlara tek pipeline'dan hizmet eder.
+    """
+    offline_environment()
+    os.environ["STUB_LLM_LATENCY"] = str(args.llm_latency)
+    os.environ["STUB_LLM_TOKENS_PER_SEC"] = str(args.tokens_per_sec)
+    os.environ["STUB_LLM_ANSWER_TOKENS"] = str(args.answer_tokens)
+    from src.rag_pipeline import RAGPipeline
+
+    rss_start = current_rss_mb()
+    setup_start = time.perf_counter()
+
+    def create_pipeline():
+        rag = RAGPipeline(persist_directory=args.persist_dir, model_provider="stub", fallback_providers=[])
+        rag.load_vectorstore()
+        rag.create_qa_chain(k=args.k)
+        return rag
+
+    pipelines = [create_pipeline()]
+    # İlk pipeline tek seferlik maliyeti (torch, model ağırlıkları) taşır; gerisi oturum başına tekrar
+    rss_first = current_rss_mb()
+    if mode == "shared":
+        pipelines *= concurrency
+    else:
+        pipelines += [create_pipeline() for _ in range(concurrency - 1)]
+    setup_seconds = time.perf_counter() - setup_start
+    rss_ready = current_rss_mb()
+    pipelines[0].tracer.reset()
+
+    latencies, first_tokens, errors = [], [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency + 1)
+
+    def session(session_id: int):
+        rag = pipelines[session_id]
+        barrier.wait()
+        for i in range(args.queries_per_session):
+            # Her istekte farklı metin: önbellekler yolu kısaltamasın
+            question = f"{QUESTIONS[(session_id + i) % len(QUESTIONS)]} (s{session_id} #{i})"
+            start = time.perf_counter()
+            first = None
+            if args.stream:
+                result = {}
+                for event in rag.stream_query(question):
+                    if event["type"] == "token" and first is None:
+                        first = time.perf_counter() - start
+                    elif event["type"] in ("done", "error"):
+                        result = event
+            else:
+                result = rag.query(question)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if first is not None:
+                    first_tokens.append(first)
+                if result.get("error"):
+                    errors.append(result["error"])
+            if args.think_time:
+                time.sleep(args.think_time)
+
+    threads = [threading.Thread(target=session, args=(i,), name=f"session-{i}") for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    stages = pipelines[0].get_latency_summary("query").get("query", {})
+    result = {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:3],
+        "wall_seconds": round(wall, 3),
+        "throughput_qps": round(len(latencies) / wall, 2),
+        "latency": latency_stats(latencies),
+        "setup_seconds": round(setup_seconds, 3),
+        "rss_start_mb": rss_start,
+        "rss_ready_mb": rss_ready,
+        "rss_first_session_mb": round(rss_first - rss_start, 1),
+        "rss_per_extra_session_mb": round((rss_ready - rss_first) / (concurrency - 1), 1) if concurrency > 1 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages_p50_ms": {name: values["p50_ms"] for name, values in stages.items()},
+        "stages_p99_ms": {name: values["p99_ms"] for name, values in stages.items()},
+    }
+    if first_tokens:
+        result["first_token"] = latency_stats(first_tokens)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline load test: N concurrent simulated sessions drive RAGPipeline with the stub LLM"
+    )
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="Comma separated session counts")
+    parser.add_argument("--mode", default="per-session", choices=MODES + ("both",),
+                        help="per-session: one pipeline per session (as app.py); shared: one pipeline for all")
+    parser.add_argument("--queries-per-session", type=int, default=10, help="Questions each session sends")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Seconds a session waits between questions")
+    parser.add_argument("--stream", action="store_true", help="Use stream_query (also reports time to first token)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Stub LLM time to first token in seconds")
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0, help="Stub LLM token rate (0 = instant)")
+    parser.add_argument("--answer-tokens", type=int, default=64, help="Stub LLM answer length in tokens")
+    parser.add_argument("--k", type=int, default=6, help="Documents retrieved per query (app.py uses 6)")
+    parser.add_argument("--persist-dir", default=None, help="Vector database (default: build a temporary one)")
+    parser.add_argument("--data-file", default="data/imdb_50k_reviews.txt", help="Text file for the temporary database")
+    parser.add_argument("--build-docs", type=int, default=2000, help="Chunks indexed into the temporary database")
+    parser.add_argument("--output", default=None, help="Result JSON path (default: benchmarks/results/load-<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    levels = [int(value) for value in args.concurrency.split(",") if value.strip()]
+    modes = MODES if args.mode == "both" else (args.mode,)
+
+    temporary = None
+    if args.persist_dir is None:
+        temporary = tempfile.mkdtemp(prefix="rag_load_")
+        args.persist_dir = os.path.join(temporary, "faiss_db")
+        print(f"Building a {args.build_docs}-chunk index in {args.persist_dir}")
+        run_isolated(bench_build, args)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "cpu_count": os.cpu_count(),
+            "persist_dir": args.persist_dir if temporary is None else None,
+            "build_docs": args.build_docs if temporary is not None else None,
+            "queries_per_session": args.queries_per_session,
+            "stream": args.stream,
+            "llm_latency": args.llm_latency,
+            "tokens_per_sec": args.tokens_per_sec,
+            "answer_tokens": args.answer_tokens,
+            "k": args.k,
+        },
+        "results": {},
+    }
+    print(f"\n{'mode':<12} {'sessions':>8} {'QPS':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>6} {'RSS MB':>8} {'MB/extra session':>16}")
+    try:
+        for mode in modes:
+            report["results"][mode] = {}
+            for concurrency in levels:
+                level = run_isolated(run_level, args, mode, concurrency)
+                report["results"][mode][str(concurrency)] = level
+                latency = level["latency"]
+                print(f"{mode:<12} {concurrency:>8} {level['throughput_qps']:>7.2f} {latency['p50_ms']:>8.0f} "
+                      f"{latency['p95_ms']:>8.0f} {latency['p99_ms']:>8.0f} {level['errors']:>6} "
+                      f"{level['rss_ready_mb']:>8.0f} {level['rss_per_extra_session_mb']:>16.1f}")
+    finally:
+        if temporary is not None:
+            shutil.rmtree(temporary, ignore_errors=True)
+
+    output = args.output or os.path.join(
+        CURRENT_DIR, "results", f"load-{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['commit']}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1, ensure_ascii=False)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
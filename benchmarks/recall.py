@@ -0,0 +1,268 @@
+"""
+Recall Benchmark Script'i
+İndeks tiplerini, arama ayarlarını (nprobe, efSearch, kesin yeniden sıralama) ve MMR ayarlarını
+kayıtlı embedding'ler üzerinde kesin (Flat) aramaya göre recall, QPS ve bellek açısından karşılaştırır
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from datetime import datetime
+import faiss
+import numpy as np
+from dotenv import load_dotenv
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.run import QUESTIONS, git_commit, peak_rss_mb
+from src.retriever import mmr_select
+from src.vector_index import (
+    EXACT_VECTORS_FILENAME, ExactVectors, build_index, describe_index, is_quantized, prepare_index
+)
+
+DEFAULT_SPECS = "Flat;IVF{nlist},Flat;HNSW32;SQ8;IVF{nlist},PQ{pq}"
+
+
+def parse_ints(value: str):
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def parse_floats(value: str):
+    return [float(item) for item in value.split(",") if item.strip()]
+
+
+def expand_spec(spec: str, count: int, dimension: int) -> str:
+    """{nlist}: 4*sqrt(n)'e yakın ikinin kuvveti (liste başına en az 39 eğitim noktası); {pq}: boyut/8 alt vektör"""
+    nlist = 2 ** int(round(np.log2(max(1.0, 4 * np.sqrt(count)))))
+    while nlist > 1 and nlist * 39 > count:
+        nlist //= 2
+    return spec.format(nlist=nlist, pq=max(1, dimension // 8))
+
+
+def load_corpus_vectors(rag) -> np.ndarray:
+    """FAISS satır sırasında float32 doğru vektörler (vectors.npy varsa ondan, yoksa indeksten geri çözülür)"""
+    path = os.path.join(rag.generation_directory, EXACT_VECTORS_FILENAME)
+    if os.path.exists(path):
+        return np.ascontiguousarray(np.load(path), dtype=np.float32)
+    if is_quantized(rag.index_spec):
+        print(f"⚠️ {rag.index_spec} index without vectors.npy: ground truth uses decoded (lossy) vectors")
+    index = rag.vectorstore.index
+    prepare_index(index)
+    return np.ascontiguousarray(index.reconstruct_n(0, index.ntotal), dtype=np.float32)
+
+
+def query_vectors(rag, args, count: int) -> np.ndarray:
+    """Hazır sorular, --queries-file satırları ve --sample-queries belge parçaları; RAGPipeline'daki prompt ile sarılıp bir kez gömülür"""
+    texts = list(QUESTIONS)
+    if args.queries_file:
+        with open(args.queries_file, encoding="utf-8") as f:
+            texts.extend(line.strip() for line in f if line.strip())
+    if args.sample_queries:
+        rng = np.random.default_rng(args.seed)
+        rows = rng.choice(count, size=min(args.sample_queries, count), replace=False)
+        for doc in rag._documents_for_indices(np.sort(rows)):
+            if doc is not None:
+                texts.append(doc.page_content[:args.snippet_chars])
+    # query()/stream_query() gibi talimatlarla sarılır: retriever sarılmış soruyu gömer
+    prompts = [rag._build_question(text) for text in texts]
+    return np.ascontiguousarray(rag.embeddings.embed_queries_array(prompts), dtype=np.float32)
+
+
+def recall(found, truth) -> float:
+    """Sorgular üzerinden ortalama |bulunan ∩ doğru| / |doğru|"""
+    scores = [len(set(map(int, f)) & set(map(int, t))) / len(t) for f, t in zip(found, truth) if len(t)]
+    return round(float(np.mean(scores)), 4) if scores else 0.0
+
+
+def timed(fn, queries, repeat: int):
+    """Ölçülmeyen bir turdan sonra fn'i sorgu başına bir kez çalıştırır (etkileşimli trafik gibi); (sonuçlar, QPS) döndürür"""
+    results = [fn(query) for query in queries]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [fn(query) for query in queries]
+    seconds = time.perf_counter() - start
+    return results, round(len(queries) * repeat / seconds, 1)
+
+
+def mmr_rows(rag, query, k: int, fetch_k: int, lambda_mult: float) -> np.ndarray:
+    """Pipeline'ın MMR seçimi, FAISS satırları olarak (belge okuma hariç MMRRetriever ile aynı yol)"""
+    rows, _, candidates = rag.mmr_candidates_batch(query.reshape(1, -1), fetch_k)[0]
+    return rows[mmr_select(query, candidates, k, lambda_mult)]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recall versus latency of index types, search parameters and MMR settings, "
+                    "with exact flat search over the stored embeddings as ground truth"
+    )
+    parser.add_argument("--persist-dir", default="faiss_db", help="Saved (non-sharded) vector database")
+    parser.add_argument("--index-specs", default=DEFAULT_SPECS,
+                        help="Semicolon separated FAISS index_factory specs; {nlist} and {pq} are sized from the corpus")
+    parser.add_argument("--nprobe", default="1,4,16,64", help="IVF nprobe values")
+    parser.add_argument("--ef-search", default="16,32,64,128", help="HNSW efSearch values")
+    parser.add_argument("--rerank-factor", default="0,4", help="Exact re-rank factors for quantized indexes (0 = off)")
+    parser.add_argument("--k", default="4,8", help="Result counts (recall@k)")
+    parser.add_argument("--fetch-k", default="20,50", help="MMR candidate counts")
+    parser.add_argument("--lambda-mult", default="0.5,0.7,1.0", help="MMR relevance/diversity trade-offs")
+    parser.add_argument("--queries-file", default=None, help="Extra queries, one per line")
+    parser.add_argument("--sample-queries", type=int, default=200, help="Stored chunks whose opening text is used as a query")
+    parser.add_argument("--snippet-chars", type=int, default=200, help="Characters taken from each sampled chunk")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed rounds over the query set")
+    parser.add_argument("--target-recall", type=float, default=0.95, help="Recall the recommendation must reach")
+    parser.add_argument("--seed", type=int, default=42, help="Query sampling seed")
+    parser.add_argument("--output", default=None, help="Result JSON path (default: benchmarks/results/recall-<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    os.environ["EMBEDDING_CACHE_DIR"] = "none"
+    os.environ["QUERY_CACHE_SIZE"] = "0"
+    from src.rag_pipeline import RAGPipeline
+    from src.sharded_store import ShardedVectorStore
+
+    rag = RAGPipeline(persist_directory=args.persist_dir, model_provider="none")
+    rag.load_vectorstore()
+    if isinstance(rag.vectorstore, ShardedVectorStore):
+        parser.error("sharded databases are not supported; point --persist-dir at a single shard")
+
+    vectors = load_corpus_vectors(rag)
+    count, dimension = vectors.shape
+    queries = query_vectors(rag, args, count)
+    ks = parse_ints(args.k)
+    fetch_ks = parse_ints(args.fetch_k)
+    lambdas = parse_floats(args.lambda_mult)
+    max_k = max(ks)
+    print(f"\n{count} vectors (dim {dimension}), {len(queries)} queries")
+
+    # Doğru sonuç: kesin L2 top-k ve her (k, fetch_k, lambda) için kesin adaylar üzerinde MMR
+    exact = faiss.IndexFlatL2(dimension)
+    exact.add(vectors)
+    _, truth = exact.search(queries, max_k)
+    exact_mmr = {}
+    for k in ks:
+        for fetch_k in fetch_ks:
+            _, candidates = exact.search(queries, fetch_k)
+            for lambda_mult in lambdas:
+                exact_mmr[(k, fetch_k, lambda_mult)] = [
+                    rows[mmr_select(query, vectors[rows], k, lambda_mult)] for query, rows in zip(queries, candidates)
+                ]
+
+    # Kuantize indeksler float32 kopyayla yeniden sıralanır; load_vectorstore gibi geçici bir vectors.npy'den okunur
+    exact_dir = tempfile.mkdtemp(prefix="rag_recall_")
+    exact_vectors = ExactVectors(ExactVectors.save(exact_dir, vectors))
+
+    configs = {}
+    header = f"{'config':<44} {'k':>3} {'recall':>7} {'QPS':>9}"
+    for raw_spec in [spec.strip() for spec in args.index_specs.split(";") if spec.strip()]:
+        spec = expand_spec(raw_spec, count, dimension)
+        start = time.perf_counter()
+        try:
+            index = build_index(vectors, spec)
+        except ValueError as e:
+            print(f"\n⚠️ {spec} skipped: {str(e)}")
+            continue
+        index.add(vectors)
+        prepare_index(index)
+        build_seconds = time.perf_counter() - start
+        info = describe_index(index)
+        rag.vectorstore.index = index
+        rag.index_spec = spec
+        print(f"\n=== {spec} ({info['bytes'] / 1e6:.1f} MB, {info['bytes_per_vector']:.0f} B/vector, "
+              f"built in {build_seconds:.1f}s) ===")
+        print(header)
+
+        sweeps = [{}]
+        if "IVF" in spec.upper():
+            sweeps = [{"nprobe": value} for value in parse_ints(args.nprobe)]
+        elif "HNSW" in spec.upper():
+            sweeps = [{"ef_search": value} for value in parse_ints(args.ef_search)]
+        rerank_factors = parse_ints(args.rerank_factor) if is_quantized(spec) else [0]
+
+        for params in sweeps:
+            rag.set_search_params(nprobe=params.get("nprobe"), ef_search=params.get("ef_search"))
+            for factor in rerank_factors:
+                rag.exact_vectors = exact_vectors if factor > 0 else None
+                rag.rerank_factor = factor
+                label = spec + "".join(f" {name}={value}" for name, value in params.items())
+                label += f" rerank={factor}" if factor else ""
+                entry = {
+                    "spec": spec,
+                    **params,
+                    "rerank_factor": factor,
+                    "index_bytes": info["bytes"],
+                    "bytes_per_vector": round(info["bytes_per_vector"], 1),
+                    "rerank_bytes": int(vectors.nbytes) if factor else 0,
+                    "build_seconds": round(build_seconds, 3),
+                    "search": {},
+                    "mmr": {},
+                }
+                for k in ks:
+                    hits, qps = timed(lambda query: rag.search_rows(query, k)[0][1], queries, args.repeat)
+                    entry["search"][str(k)] = {"recall": recall(hits, truth[:, :k]), "qps": qps}
+                    print(f"{label:<44} {k:>3} {entry['search'][str(k)]['recall']:>7.3f} {qps:>9.1f}")
+                    for fetch_k in fetch_ks:
+                        for lambda_mult in lambdas:
+                            selected, qps = timed(
+                                lambda query: mmr_rows(rag, query, k, fetch_k, lambda_mult), queries, args.repeat
+                            )
+                            entry["mmr"][f"k={k},fetch_k={fetch_k},lambda={lambda_mult}"] = {
+                                # Çeşitlilik + yaklaşıklık için feda edilen alaka (kesin top-k'ya göre)
+                                "recall": recall(selected, truth[:, :k]),
+                                # Yalnızca yaklaşıklık (aynı ayarlarla kesin adaylar üzerindeki MMR'a göre)
+                                "agreement": recall(selected, exact_mmr[(k, fetch_k, lambda_mult)]),
+                                "qps": qps,
+                            }
+                configs[label] = entry
+
+    os.remove(exact_vectors.path)
+    os.rmdir(exact_dir)
+
+    print("\n=== MMR (k, fetch_k, lambda): recall vs exact top-k / agreement with exact-candidate MMR ===")
+    for label, entry in configs.items():
+        for name, values in entry["mmr"].items():
+            print(f"{label:<44} {name:<28} {values['recall']:>6.3f} {values['agreement']:>6.3f} {values['qps']:>9.1f}")
+
+    # Öneri: her k için hedef recall'a ulaşan en hızlı yapılandırma
+    recommendations = {}
+    for k in ks:
+        eligible = [
+            (entry["search"][str(k)]["qps"], label) for label, entry in configs.items()
+            if entry["search"][str(k)]["recall"] >= args.target_recall
+        ]
+        if eligible:
+            qps, label = max(eligible)
+            recommendations[str(k)] = {"config": label, "qps": qps, "recall": configs[label]["search"][str(k)]["recall"]}
+    print(f"\n=== Fastest configuration with recall@k >= {args.target_recall} ===")
+    for k, choice in recommendations.items():
+        print(f"k={k}: {choice['config']} (recall {choice['recall']:.3f}, {choice['qps']:.0f} QPS)")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "persist_dir": args.persist_dir,
+            "vectors": count,
+            "dimension": dimension,
+            "queries": len(queries),
+            "cpu_count": os.cpu_count(),
+            "faiss_threads": faiss.omp_get_max_threads(),
+            "target_recall": args.target_recall,
+        },
+        "results": {"configs": configs, "peak_rss_mb": peak_rss_mb()},
+        "recommendations": recommendations,
+    }
+    output = args.output or os.path.join(
+        CURRENT_DIR, "results", f"recall-{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['commit']}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1, ensure_ascii=False)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Benchmark Script'i
+Ingest ve sorgu sıcak yollarını (chunking, embedding, indeks kurulumu, yükleme, sorgu) ağa çıkmadan
+ölçer; sonuçlar commit ve ortam bilgisiyle benchmarks/results altına JSON olarak yazılır
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import resource
+import tempfile
+import subprocess
+import multiprocessing
+from datetime import datetime
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from dotenv import load_dotenv
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+BENCHMARKS = ("chunking", "embedding", "build", "load", "query")
+
+QUESTIONS = [
+    "Christopher Nolan'ın en iyi filmleri hangileri?",
+    "Which science fiction movies have the best visual effects?",
+    "Bana duygusal bir dram filmi öner",
+    "What do critics say about the acting in The Godfather?",
+    "Korku filmlerinde en çok övülen yapımlar hangileri?",
+    "Which comedies are recommended for a family evening?",
+    "Animasyon filmlerinde hikaye anlatımı nasıl değerlendiriliyor?",
+    "What are the most disappointing sequels according to reviews?",
+]
+
+
+def peak_rss_mb() -> float:
+    """Sürecin şimdiye kadarki en yüksek bellek kullanımı (ru_maxrss Linux'ta KB, macOS'ta bayt)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def latency_stats(seconds) -> dict:
+    values = np.asarray(seconds, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": int(len(values)),
+        "mean_ms": round(float(values.mean()), 2),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+def load_chunks(data_file: str, limit: int):
+    from src.data_processor import DataProcessor
+
+    processor = DataProcessor(chunk_size=1000, chunk_overlap=200)
+    return list(islice(processor.iter_file_documents(data_file), limit))
+
+
+def offline_environment():
+    """Benchmark'lar sıcak yolların kendisini ölçer: kalıcı önbellek ve LLM ağ çağrısı yok"""
+    os.environ["EMBEDDING_CACHE_DIR"] = "none"
+    os.environ["QUERY_CACHE_SIZE"] = "0"
+    os.environ["ANSWER_CACHE_SIZE"] = "0"
+    os.environ["OLLAMA_WARMUP"] = "0"
+
+
+def bench_chunking(args) -> dict:
+    """Tüm veri dosyası üzerinde DataProcessor hızı"""
+    from src.data_processor import DataProcessor
+
+    processor = DataProcessor(chunk_size=1000, chunk_overlap=200)
+    size = os.path.getsize(args.data_file)
+    start = time.perf_counter()
+    chunks = 0
+    characters = 0
+    for doc in processor.iter_file_documents(args.data_file):
+        chunks += 1
+        characters += len(doc.page_content)
+    seconds = time.perf_counter() - start
+    return {
+        "file_mb": round(size / 1e6, 2),
+        "chunks": chunks,
+        "characters": characters,
+        "seconds": round(seconds, 3),
+        "chunks_per_sec": round(chunks / seconds, 1),
+        "mb_per_sec": round(size / 1e6 / seconds, 2),
+    }
+
+
+def bench_embedding(args) -> dict:
+    """Her batch boyutunda saniyedeki belge sayısı (önce bir ısınma grubu)"""
+    from src.embeddings import create_embeddings, DEFAULT_EMBEDDING_MODEL
+
+    texts = [doc.page_content for doc in load_chunks(args.data_file, args.embed_docs)]
+    embeddings = create_embeddings(
+        os.getenv("EMBEDDING_BACKEND", "torch"),
+        model_name=os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL),
+        batch_size=args.batch_sizes[0],
+        quantize=os.getenv("EMBEDDING_QUANTIZE", "0").lower() in ("1", "true", "yes"),
+        cache_dir=os.getenv("ONNX_CACHE_DIR", "onnx_models"),
+    )
+    embeddings.embed_documents_array(texts[:args.batch_sizes[0]])
+    results = {}
+    for batch_size in args.batch_sizes:
+        embeddings.batch_size = batch_size
+        start = time.perf_counter()
+        embeddings.embed_documents_array(texts)
+        seconds = time.perf_counter() - start
+        results[str(batch_size)] = {"seconds": round(seconds, 3), "docs_per_sec": round(len(texts) / seconds, 1)}
+    return {"docs": len(texts), "backend": os.getenv("EMBEDDING_BACKEND", "torch"), "batch_sizes": results}
+
+
+def bench_build(args) -> dict:
+    """İlk --build-docs chunk için create_vectorstore süresi ve en yüksek bellek"""
+    offline_environment()
+    from src.rag_pipeline import RAGPipeline
+
+    documents = load_chunks(args.data_file, args.build_docs)
+    rag = RAGPipeline(persist_directory=args.persist_dir, model_provider="none")
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    summary = rag.create_vectorstore(documents)
+    seconds = time.perf_counter() - start
+    stages = rag.get_latency_summary("build").get("build", {})
+    return {
+        "chunks": summary["indexed"],
+        "index_spec": rag.index_spec,
+        "seconds": round(seconds, 3),
+        "chunks_per_sec": round(summary["indexed"] / seconds, 1),
+        "rss_before_mb": rss_before,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages_ms": {name: values["mean_ms"] for name, values in stages.items()},
+    }
+
+
+def bench_load(args) -> dict:
+    """Yeni süreçte soğuk başlangıç: pipeline kurulumu (embedding modeli), load_vectorstore, ilk arama"""
+    offline_environment()
+    start = time.perf_counter()
+    from src.rag_pipeline import RAGPipeline
+    imported = time.perf_counter()
+    rag = RAGPipeline(persist_directory=args.persist_dir, model_provider="none")
+    initialized = time.perf_counter()
+    rag.load_vectorstore()
+    loaded = time.perf_counter()
+    rag.get_similar_documents(QUESTIONS[0], k=4)
+    searched = time.perf_counter()
+    return {
+        "import_seconds": round(imported - start, 3),
+        "init_seconds": round(initialized - imported, 3),
+        "load_vectorstore_seconds": round(loaded - initialized, 3),
+        "first_search_seconds": round(searched - loaded, 3),
+        "total_seconds": round(searched - start, 3),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def bench_query(args) -> dict:
+    """Çevrimdışı stub LLM ile uçtan uca query() gecikmesi ve aşama bazında yüzdelikler"""
+    offline_environment()
+    os.environ["STUB_LLM_LATENCY"] = str(args.llm_latency)
+    os.environ["STUB_LLM_TOKENS_PER_SEC"] = "0"
+    from src.rag_pipeline import RAGPipeline
+
+    rag = RAGPipeline(persist_directory=args.persist_dir, model_provider="stub", fallback_providers=[])
+    rag.load_vectorstore()
+    rag.create_qa_chain(k=args.k)
+    rag.query(QUESTIONS[0])
+    rag.tracer.reset()
+
+    latencies = []
+    for i in range(args.queries):
+        # Her sorguda farklı metin: hiçbir önbellek katmanı yolu kısaltamasın
+        question = f"{QUESTIONS[i % len(QUESTIONS)]} ({i})"
+        start = time.perf_counter()
+        result = rag.query(question)
+        latencies.append(time.perf_counter() - start)
+        if result.get("error"):
+            raise RuntimeError(result["answer"])
+    stages = rag.get_latency_summary("query").get("query", {})
+    return {
+        "k": args.k,
+        "llm_latency_ms": round(args.llm_latency * 1000, 1),
+        "latency": latency_stats(latencies),
+        "qps": round(len(latencies) / sum(latencies), 2),
+        "stages_p50_ms": {name: values["p50_ms"] for name, values in stages.items()},
+        "stages_p95_ms": {name: values["p95_ms"] for name, values in stages.items()},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_isolated(fn, *args) -> dict:
+    """Benchmark'ı yeni bir yorumlayıcıda çalıştırır; en yüksek bellek ve soğuk başlangıç paylaşılmaz"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(fn, *args).result()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def metadata(args) -> dict:
+    from src.embeddings import DEFAULT_EMBEDDING_MODEL
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "embedding_model": os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL),
+        "embedding_backend": os.getenv("EMBEDDING_BACKEND", "torch"),
+        "index_spec": os.getenv("FAISS_INDEX_SPEC", "Flat"),
+        "data_file": args.data_file,
+        "build_docs": args.build_docs,
+        "queries": args.queries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the ingest and query hot paths (JSON output)")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help=f"Comma separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--data-file", default="data/imdb_50k_reviews.txt", help="Text file to chunk, embed and index")
+    parser.add_argument("--embed-docs", type=int, default=512, help="Chunks embedded per batch-size measurement")
+    parser.add_argument("--batch-sizes", default="8,16,32,64", help="Comma separated embedding batch sizes")
+    parser.add_argument("--build-docs", type=int, default=2000, help="Chunks indexed by the build benchmark")
+    parser.add_argument("--persist-dir", default=None, help="Index directory for build/load/query (default: temporary)")
+    parser.add_argument("--queries", type=int, default=100, help="Timed queries in the query benchmark")
+    parser.add_argument("--k", type=int, default=4, help="Documents retrieved per query")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Stub LLM delay per answer in seconds")
+    parser.add_argument("--output", default=None, help="Result JSON path (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    args.batch_sizes = [int(value) for value in args.batch_sizes.split(",") if value.strip()]
+    selected = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    temporary = None
+    if args.persist_dir is None:
+        temporary = tempfile.mkdtemp(prefix="rag_bench_")
+        args.persist_dir = os.path.join(temporary, "faiss_db")
+    if {"load", "query"} & set(selected) and "build" not in selected and not os.path.exists(args.persist_dir):
+        # load/query için indeks gerekir; raporlanmadan kurulur
+        print(f"Building index for load/query benchmarks in {args.persist_dir}")
+        run_isolated(bench_build, args)
+
+    report = {"meta": metadata(args), "results": {}}
+    functions = {
+        "chunking": bench_chunking,
+        "embedding": bench_embedding,
+        "build": bench_build,
+        "load": bench_load,
+        "query": bench_query,
+    }
+    try:
+        for name in BENCHMARKS:
+            if name not in selected:
+                continue
+            print(f"\n=== {name} ===")
+            start = time.perf_counter()
+            report["results"][name] = run_isolated(functions[name], args)
+            print(json.dumps(report["results"][name], indent=1))
+            print(f"({time.perf_counter() - start:.1f}s)")
+    finally:
+        if temporary is not None:
+            shutil.rmtree(temporary, ignore_errors=True)
+
+    output = args.output or os.path.join(
+        CURRENT_DIR, "results", f"{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['commit']}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1, ensure_ascii=False)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Stub Ollama Sunucusu
+Gerçek model ve ağ gerektirmeden Ollama'nın /api/generate, /api/chat ve /api/tags uçlarını
+taklit eder. Model bellekte değilse ilk istek load_seconds bekler (soğuk yükleme); yüklenen model
+keep_alive süresi boyunca bellekte kalır, keep_alive=0 modeli boşaltır
+"""
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Union
+
+# Ollama'nın keep_alive verilmediğindeki varsayılanı (5 dakika)
+DEFAULT_KEEP_ALIVE = 300.0
+UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+def keep_alive_seconds(value: Optional[Union[str, int, float]]) -> float:
+    """Ollama keep_alive değerini saniyeye çevirir ("30m", 600, -1 = süresiz, 0 = hemen boşalt)"""
+    if value is None:
+        return DEFAULT_KEEP_ALIVE
+    if isinstance(value, str) and value and value[-1] in UNITS:
+        seconds = float(value[:-1]) * UNITS[value[-1]]
+    else:
+        seconds = float(value)
+    return float("inf") if seconds < 0 else seconds
+
+
+class StubOllamaServer:
+    """
+    Arka plan iş parçacığında çalışan stub Ollama. Yüklemeler (gerçek Ollama gibi) sırayla
+    yapılır; loads soğuk yükleme sayısını, requests gelen istekleri tutar.
+    """
+
+    def __init__(self, load_seconds: float = 2.0, first_token_seconds: float = 0.05, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            load_seconds: Model bellekte değilken ilk isteğin beklediği süre
+            first_token_seconds: Model yüklüyken ilk token'a kadar geçen süre
+            host: Dinlenecek adres
+            port: Dinlenecek port (0 = boş bir port)
+        """
+        self.load_seconds = load_seconds
+        self.first_token_seconds = first_token_seconds
+        self.loaded_until = 0.0
+        self.loads = 0
+        self.requests = []
+        self._lock = threading.Lock()
+        handler = type("Handler", (_StubOllamaHandler,), {"stub": self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self.url = f"http://{host}:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-ollama", daemon=True)
+        self._thread.start()
+
+    def ensure_loaded(self, keep_alive) -> bool:
+        """Model bellekte değilse yükler (load_seconds bekler); keep_alive süresini yeniler. Yüklendiyse True"""
+        seconds = keep_alive_seconds(keep_alive)
+        with self._lock:
+            if seconds == 0:
+                self.loaded_until = 0.0
+                return False
+            cold = time.monotonic() >= self.loaded_until
+            if cold:
+                time.sleep(self.load_seconds)
+                self.loads += 1
+            self.loaded_until = time.monotonic() + seconds
+            return cold
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubOllamaServer":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _StubOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    stub: StubOllamaServer = None
+
+    def _reply(self, payload: bytes, content_type: str = "application/json"):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self.stub.requests.append(("GET", self.path))
+        self._reply(json.dumps({"models": [{"name": "stub"}]}).encode())
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        self.stub.requests.append(("POST", self.path))
+        self.stub.ensure_loaded(body.get("keep_alive"))
+        created = "2024-01-01T00:00:00Z"
+        if self.path == "/api/generate":
+            # Prompt'suz istek yalnızca modeli yükler/boşaltır (warm_up_ollama, keep_alive=0)
+            self._reply(json.dumps({"model": body.get("model"), "created_at": created, "response": "", "done": True}).encode())
+            return
+        time.sleep(self.stub.first_token_seconds)
+        lines = [
+            {"model": body.get("model"), "created_at": created,
+             "message": {"role": "assistant", "content": "stub"}, "done": False},
+            {"model": body.get("model"), "created_at": created,
+             "message": {"role": "assistant", "content": ""}, "done": True, "done_reason": "stop"},
+        ]
+        self._reply("".join(json.dumps(line) + "\n" for line in lines).encode(), "application/x-ndjson")
+
+    def log_message(self, *args):
+        pass
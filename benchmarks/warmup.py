@@ -0,0 +1,148 @@
+"""
+Isınma Ölçüm Script'i
+Bir Ollama sunucusunda ilk token gecikmesini ısınmasız (soğuk model, yeni bağlantı) ve
+warm_up_ollama sonrası ölçer. Her tur model bellekten boşaltılarak (keep_alive=0) başlar ve her
+ölçüm yeni bir süreçte çalışır; böylece bağlantı havuzu da turlar arasında paylaşılmaz. --stub
+ile gerçek Ollama yerine soğuk yükleme süresi ayarlanabilen yerel stub sunucu kullanılır (CI/offline).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+import httpx
+from dotenv import load_dotenv
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.run import git_commit, latency_stats, run_isolated
+from benchmarks.stub_ollama import StubOllamaServer
+
+PHASES = ("cold", "warm")
+
+
+def unload_model(base_url: str, model: str, timeout: float):
+    """Modeli Ollama belleğinden boşaltır (prompt'suz /api/generate, keep_alive=0)"""
+    response = httpx.post(
+        base_url.rstrip("/") + "/api/generate", json={"model": model, "keep_alive": 0}, timeout=timeout
+    )
+    response.raise_for_status()
+
+
+def measure_first_token(args, warm: bool) -> dict:
+    """
+    Yeni süreçte tek ölçüm: uygulamanın yaptığı gibi get_ollama_chat ile istemci kurulur,
+    warm=True ise önce warm_up_ollama (ön planda) çalıştırılır; ardından akışta ilk token'a
+    kadar geçen süre ölçülür
+    """
+    from src.llm_clients import get_ollama_chat, warm_up_ollama
+
+    llm, _ = get_ollama_chat(
+        args.base_url, args.model, temperature=0.0, num_predict=args.num_predict,
+        timeout=args.timeout, keep_alive=args.keep_alive
+    )
+    warmup_seconds = None
+    if warm:
+        start = time.perf_counter()
+        warm_up_ollama(args.base_url, args.model, keep_alive=args.keep_alive, timeout=args.timeout, background=False)
+        warmup_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    first_token = None
+    for chunk in llm.stream(args.prompt):
+        if first_token is None and chunk.content:
+            first_token = time.perf_counter() - start
+    total = time.perf_counter() - start
+    return {
+        "first_token_seconds": first_token if first_token is not None else total,
+        "total_seconds": total,
+        "warmup_seconds": warmup_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time to first token from an Ollama server, cold vs. after warm_up_ollama (JSON output)"
+    )
+    parser.add_argument("--stub", action="store_true", help="Measure against a local stub Ollama server instead of a real one")
+    parser.add_argument("--stub-load-seconds", type=float, default=2.0, help="Stub server cold model load time in seconds")
+    parser.add_argument("--stub-first-token", type=float, default=0.05, help="Stub server time to first token once loaded")
+    parser.add_argument("--base-url", default=None, help="Ollama server (default: first OLLAMA_BASE_URL entry or http://localhost:11434)")
+    parser.add_argument("--model", default=None, help="Model name (default: OLLAMA_MODEL or phi3:mini)")
+    parser.add_argument("--rounds", type=int, default=3, help="Measurements per phase")
+    parser.add_argument("--prompt", default="Reply with one word: hello", help="Prompt sent for each measurement")
+    parser.add_argument("--num-predict", type=int, default=8, help="Maximum tokens generated per measurement")
+    parser.add_argument("--keep-alive", default=None, help="keep_alive sent with requests (default: OLLAMA_KEEP_ALIVE or 30m)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="HTTP timeout in seconds (covers the cold model load)")
+    parser.add_argument("--output", default=None, help="Result JSON path (default: benchmarks/results/warmup-<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    # OLLAMA_BASE_URL birden fazla kopya içerebilir; ölçüm ilk sunucuda yapılır
+    args.base_url = args.base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434").split(",")[0].strip()
+    args.model = args.model or os.getenv("OLLAMA_MODEL", "phi3:mini")
+    keep_alive = args.keep_alive or os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    args.keep_alive = int(keep_alive) if keep_alive.lstrip("-").isdigit() else keep_alive
+
+    stub = None
+    if args.stub:
+        stub = StubOllamaServer(load_seconds=args.stub_load_seconds, first_token_seconds=args.stub_first_token)
+        args.base_url = stub.url
+        print(f"Stub Ollama server at {stub.url} (cold load {args.stub_load_seconds:g}s)")
+
+    measurements = {phase: [] for phase in PHASES}
+    print(f"{'round':>5} {'phase':<6} {'warm-up s':>9} {'first token s':>13} {'total s':>8}")
+    try:
+        for round_number in range(1, args.rounds + 1):
+            for phase in PHASES:
+                # Her ölçüm soğuk modelden başlar: fark yalnızca ısınma isteğinden gelir
+                unload_model(args.base_url, args.model, args.timeout)
+                result = run_isolated(measure_first_token, args, phase == "warm")
+                measurements[phase].append(result)
+                warmup = f"{result['warmup_seconds']:.2f}" if result["warmup_seconds"] is not None else "-"
+                print(f"{round_number:>5} {phase:<6} {warmup:>9} {result['first_token_seconds']:>13.3f} "
+                      f"{result['total_seconds']:>8.3f}")
+    finally:
+        if stub is not None:
+            stub.close()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "base_url": None if stub else args.base_url,
+            "stub": {"load_seconds": args.stub_load_seconds, "first_token_seconds": args.stub_first_token} if stub else None,
+            "model": args.model,
+            "rounds": args.rounds,
+            "num_predict": args.num_predict,
+            "keep_alive": args.keep_alive,
+        },
+        "results": {
+            phase: {
+                "first_token": latency_stats([m["first_token_seconds"] for m in measurements[phase]]),
+                "total": latency_stats([m["total_seconds"] for m in measurements[phase]]),
+                "runs": measurements[phase],
+            }
+            for phase in PHASES
+        },
+    }
+    report["results"]["warm"]["warmup"] = latency_stats([m["warmup_seconds"] for m in measurements["warm"]])
+    cold = report["results"]["cold"]["first_token"]["p50_ms"]
+    warm = report["results"]["warm"]["first_token"]["p50_ms"]
+    print(f"\nFirst token p50: cold {cold:.0f} ms, after warm-up {warm:.0f} ms")
+
+    output = args.output or os.path.join(
+        CURRENT_DIR, "results", f"warmup-{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['commit']}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1, ensure_ascii=False)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.data_processor import DataProcessor
+from src.embeddings import DEFAULT_EMBEDDING_MODEL, create_embeddings, compare_embeddings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ONNX (fp32 / int8) embeddings against the torch backend")
+    parser.add_argument("--data-file", default="data/sample_reviews.txt", help="Text file to chunk for probe texts")
+    parser.add_argument("--limit", type=int, default=256, help="Number of chunks to compare")
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="Fail if any vector falls below this cosine similarity")
+    args = parser.parse_args()
+
+    load_dotenv()
+    model_name = os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+    cache_dir = os.getenv("ONNX_CACHE_DIR", "onnx_models")
+
+    processor = DataProcessor(chunk_size=1000, chunk_overlap=200)
+    texts = [doc.page_content for doc in processor.process_review_file(args.data_file)][:args.limit]
+
+    reference = create_embeddings("torch", model_name=model_name)
+    start = time.perf_counter()
+    reference.embed_documents(texts)
+    torch_seconds = time.perf_counter() - start
+
+    failed = False
+    print(f"\n{len(texts)} chunks, torch: {torch_seconds:.2f}s")
+    print(f"{'backend':>10} {'max_abs_diff':>13} {'min_cos':>9} {'mean_cos':>9} {'seconds':>8} {'speedup':>8}")
+    for quantize in (False, True):
+        candidate = create_embeddings("onnx", model_name=model_name, quantize=quantize, cache_dir=cache_dir)
+        start = time.perf_counter()
+        candidate.embed_documents(texts)
+        seconds = time.perf_counter() - start
+        result = compare_embeddings(reference, candidate, texts)
+        name = "onnx-int8" if quantize else "onnx"
+        print(f"{name:>10} {result['max_abs_diff']:>13.2e} {result['min_cosine']:>9.5f} "
+              f"{result['mean_cosine']:>9.5f} {seconds:>8.2f} {torch_seconds / seconds:>7.2f}x")
+        failed = failed or result['min_cosine'] < args.min_cosine
+
+    if failed:
+        print(f"❌ Parity check failed (min cosine < {args.min_cosine})")
+        sys.exit(1)
+    print("✅ Parity check passed")
+
+
+if __name__ == "__main__":
+    main()
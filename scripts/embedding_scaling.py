@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.data_processor import DataProcessor
+from src.embeddings import CustomTransformerEmbeddings, DEFAULT_EMBEDDING_MODEL
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure embedding throughput (docs/sec) versus worker process count")
+    parser.add_argument("--data-file", default="data/imdb_50k_reviews.txt", help="Text file to chunk and embed")
+    parser.add_argument("--limit", type=int, default=2000, help="Number of chunks to embed per run")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma separated worker counts to measure")
+    parser.add_argument("--batch-size", type=int, default=32, help="Texts per embedding forward pass")
+    args = parser.parse_args()
+
+    load_dotenv()
+    model_name = os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+
+    processor = DataProcessor(chunk_size=1000, chunk_overlap=200)
+    texts = [doc.page_content for doc in processor.process_review_file(args.data_file)][:args.limit]
+    embeddings = CustomTransformerEmbeddings(model_name=model_name, batch_size=args.batch_size)
+
+    print(f"\n{len(texts)} chunks, batch_size={args.batch_size}, cpu_count={os.cpu_count()}")
+    print(f"{'workers':>8} {'seconds':>10} {'docs/sec':>10} {'speedup':>8}")
+    baseline = None
+    for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+        start = time.perf_counter()
+        embeddings.embed_documents_parallel(texts, workers=workers)
+        elapsed = time.perf_counter() - start
+        rate = len(texts) / elapsed
+        baseline = baseline or rate
+        print(f"{workers:>8} {elapsed:>10.2f} {rate:>10.1f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from dotenv import load_dotenv
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from src.retriever import MMRRetriever, mmr_select
+
+
+QUESTIONS = [
+    "Christopher Nolan'ın en iyi filmleri hangileri?",
+    "Which science fiction movies have the best visual effects?",
+    "Bana duygusal bir dram filmi öner",
+    "What do critics say about the acting in The Godfather?",
+    "Korku filmlerinde en çok övülen yapımlar hangileri?",
+    "Which comedies are recommended for a family evening?",
+    "Animasyon filmlerinde hikaye anlatımı nasıl değerlendiriliyor?",
+    "What are the most disappointing sequels according to reviews?",
+]
+
+
+def time_per_call(fn, repeat: int) -> float:
+    """Average milliseconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def benchmark_selection(dimension: int, fetch_ks, k: int, lambda_mult: float, repeat: int):
+    """MMR selection only: LangChain loop versus the vectorized matrix version on random candidates"""
+    rng = np.random.default_rng(0)
+    print(f"\nMMR selection (k={k}, dimension={dimension}, {repeat} runs)")
+    print(f"{'fetch_k':>8} {'langchain ms':>13} {'native ms':>10} {'speedup':>8} {'same':>5}")
+    for fetch_k in fetch_ks:
+        query = rng.standard_normal(dimension).astype(np.float32)
+        candidates = rng.standard_normal((fetch_k, dimension)).astype(np.float32)
+        expected = maximal_marginal_relevance(query.reshape(1, -1), list(candidates), k=k, lambda_mult=lambda_mult)
+        actual = mmr_select(query, candidates, k, lambda_mult)
+        old = time_per_call(lambda: maximal_marginal_relevance(
+            query.reshape(1, -1), list(candidates), k=k, lambda_mult=lambda_mult), repeat)
+        new = time_per_call(lambda: mmr_select(query, candidates, k, lambda_mult), repeat)
+        print(f"{fetch_k:>8} {old:>13.3f} {new:>10.3f} {old / new:>7.1f}x {str(expected == actual):>5}")
+
+
+def benchmark_retrieval(persist_dir: str, k: int, lambda_mult: float, repeat: int):
+    """End-to-end retrieval on a saved index: LangChain FAISS MMR versus MMRRetriever (query embedding excluded)"""
+    from src.rag_pipeline import RAGPipeline
+    from src.sharded_store import ShardedVectorStore
+
+    rag = RAGPipeline(persist_directory=persist_dir, model_provider="none")
+    rag.load_vectorstore()
+    if isinstance(rag.vectorstore, ShardedVectorStore):
+        print("\nSharded index: the LangChain FAISS MMR path does not apply, skipping retrieval comparison")
+        return
+    fetch_k = max(k * 4, 20)
+    retriever = MMRRetriever(source=rag, embeddings=rag.embeddings, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult)
+    vectors = [rag.embeddings.embed_query_array(question) for question in QUESTIONS]
+
+    matches = 0
+    for vector in vectors:
+        expected = rag.vectorstore.max_marginal_relevance_search_by_vector(
+            vector.tolist(), k=k, fetch_k=fetch_k, lambda_mult=lambda_mult)
+        actual = retriever.select(vector)
+        matches += [doc.page_content for doc in expected] == [doc.page_content for doc in actual]
+
+    def run_langchain():
+        for vector in vectors:
+            rag.vectorstore.max_marginal_relevance_search_by_vector(
+                vector.tolist(), k=k, fetch_k=fetch_k, lambda_mult=lambda_mult)
+
+    def run_native():
+        for vector in vectors:
+            retriever.select(vector)
+
+    old = time_per_call(run_langchain, repeat) / len(vectors)
+    new = time_per_call(run_native, repeat) / len(vectors)
+    print(f"\nRetrieval on {persist_dir} ({rag.vectorstore.index.ntotal} vectors, k={k}, fetch_k={fetch_k})")
+    print(f"{'langchain ms/query':>19} {'native ms/query':>16} {'speedup':>8} {'same results':>13}")
+    print(f"{old:>19.3f} {new:>16.3f} {old / new:>7.1f}x {matches:>7}/{len(vectors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare LangChain MMR with the vectorized MMR retriever (latency and result parity)")
+    parser.add_argument("--persist-dir", default="faiss_db", help="Saved vector database for the retrieval comparison (skipped if missing)")
+    parser.add_argument("--k", type=int, default=4, help="Documents selected per query")
+    parser.add_argument("--lambda-mult", type=float, default=0.5, help="MMR relevance/diversity trade-off")
+    parser.add_argument("--fetch-k", default="20,50,100,200", help="Comma separated candidate counts for the selection benchmark")
+    parser.add_argument("--dimension", type=int, default=384, help="Vector dimension for the selection benchmark")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed runs per measurement")
+    args = parser.parse_args()
+
+    load_dotenv()
+    fetch_ks = [int(value) for value in args.fetch_k.split(",") if value.strip()]
+    benchmark_selection(args.dimension, fetch_ks, args.k, args.lambda_mult, args.repeat)
+    if os.path.exists(args.persist_dir):
+        benchmark_retrieval(args.persist_dir, args.k, args.lambda_mult, max(1, args.repeat // 10))
+    else:
+        print(f"\n{args.persist_dir} not found, skipping retrieval comparison")
+
+
+if __name__ == "__main__":
+    main()
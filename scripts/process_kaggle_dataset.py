@@ -18,17 +18,28 @@ def main():
     parser.add_argument("--data-dir", default="data", help="Dataset directory containing CSV/JSON/TXT files")
     parser.add_argument("--model", choices=["gemini", "ollama", "none"], default="none", help="LLM provider (none for indexing only)")
     parser.add_argument("--k", type=int, default=2, help="Retriever top-k during chain creation")
+    parser.add_argument("--workers", type=int, default=1, help="Embedding worker processes (1 = single process)")
+    parser.add_argument("--incremental", action="store_true", help="Only embed added/changed files and drop deleted ones (uses the manifest stored in faiss_db)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Texts per embedding forward pass (default: EMBEDDING_BATCH_SIZE or 32)")
+    parser.add_argument("--ingest-batch", type=int, default=None, help="Chunks embedded and indexed per streaming batch (default: INGEST_BATCH_SIZE or 2048)")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted full build from its last checkpoint (faiss_db.staging)")
+    parser.add_argument("--shards", type=int, default=None, help="Number of index shards (default: FAISS_SHARDS or 1)")
+    parser.add_argument("--shard", default=None, help="Comma-separated shard ids to build, e.g. 0,2 (run one process per shard to build in parallel)")
     args = parser.parse_args()
 
     load_dotenv()
 
     processor = DataProcessor(chunk_size=1000, chunk_overlap=200)
-    documents = processor.process_directory(args.data_dir)
-
-    rag = RAGPipeline(model_provider=args.model)
-    rag.create_vectorstore(documents)
-    # QA zinciri yalnızca LLM etkinse
-    if args.model != "none":
+    rag = RAGPipeline(model_provider=args.model, embedding_batch_size=args.batch_size, shards=args.shards)
+    shard_ids = [int(part) for part in args.shard.split(",")] if args.shard else None
+    if args.incremental:
+        summary = rag.update_vectorstore(args.data_dir, processor, workers=args.workers, resume=args.resume, shard_ids=shard_ids)
+        print(f"Incremental update: {summary}")
+    else:
+        summary = rag.ingest_directory(args.data_dir, processor, workers=args.workers, batch_size=args.ingest_batch, resume=args.resume, shard_ids=shard_ids)
+        print(f"Streaming build: {summary}")
+    # QA zinciri yalnızca LLM etkinse; tek shard kuran süreçte birleşik veritabanı yüklenmez
+    if args.model != "none" and shard_ids is None:
         rag.create_qa_chain(k=args.k)
     print("Index build completed.")
 
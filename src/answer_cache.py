@@ -0,0 +1,214 @@
+"""
+Answer Cache Modülü - Soru embedding'ine göre anahtarlanan anlamsal cevap önbelleği: yakın
+anlamlı (kosinüs benzerliği eşiği geçen) sorular LLM'e gitmeden kayıtlı cevap ve kaynaklarla döner
+"""
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from langchain.schema import Document
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
+
+
+def _dump_documents(documents: List[Document]) -> str:
+    return json.dumps(
+        [{'id': doc.id, 'page_content': doc.page_content, 'metadata': doc.metadata} for doc in documents],
+        ensure_ascii=False
+    )
+
+
+def _load_documents(payload: str) -> List[Document]:
+    return [Document(**item) for item in json.loads(payload)]
+
+
+class SemanticAnswerCache:
+    """
+    Kapsam (indeks sürümü, model, k) başına tutulan, LRU + opsiyonel TTL tahliyeli cevap
+    önbelleği. Kayıtlar bellekte tutulur; path verilirse SQLite dosyasına da yazılır ve
+    yeniden başlatmada geri yüklenir.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_entries: int = 256,
+        ttl_seconds: float = 0,
+        path: Optional[str] = None
+    ):
+        """
+        Args:
+            threshold: İsabet için gereken en düşük kosinüs benzerliği
+            max_entries: Tutulacak en fazla cevap sayısı (tüm kapsamlar toplamı)
+            ttl_seconds: Kayıt ömrü (saniye, 0 = süresiz)
+            path: Kalıcı SQLite dosyası (None = yalnızca bellek)
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        # Kapsam -> (kayıt id'leri, birim vektör matrisi); kapsam değişince yeniden kurulur
+        self._matrices: Dict[str, Tuple[List[str], np.ndarray]] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._open(path)
+
+    def _open(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "id TEXT PRIMARY KEY, scope TEXT NOT NULL, question TEXT NOT NULL, answer TEXT NOT NULL, "
+            "sources TEXT NOT NULL, vector BLOB NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.commit()
+        # En az kullanılandan en çok kullanılana yükle (LRU sırası korunur)
+        for entry_id, scope, question, answer, sources, blob, created, last_used in self._conn.execute(
+            "SELECT id, scope, question, answer, sources, vector, created, last_used FROM answers ORDER BY last_used ASC"
+        ):
+            self._entries[entry_id] = {
+                'scope': scope,
+                'question': question,
+                'answer': answer,
+                'sources': _load_documents(sources),
+                'vector': np.frombuffer(blob, dtype=np.float32),
+                'created': created
+            }
+        self._purge_expired()
+        self._evict()
+        self._conn.commit()
+
+    def _expired(self, entry: dict, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - entry['created'] > self.ttl_seconds
+
+    def _remove(self, entry_ids: List[str]):
+        for entry_id in entry_ids:
+            entry = self._entries.pop(entry_id)
+            self._matrices.pop(entry['scope'], None)
+        if self._conn is not None and entry_ids:
+            self._conn.executemany("DELETE FROM answers WHERE id = ?", [(entry_id,) for entry_id in entry_ids])
+
+    def _purge_expired(self):
+        if not self.ttl_seconds:
+            return
+        now = time.time()
+        self._remove([entry_id for entry_id, entry in self._entries.items() if self._expired(entry, now)])
+
+    def _evict(self):
+        overflow = len(self._entries) - self.max_entries
+        if overflow > 0:
+            self._remove(list(self._entries.keys())[:overflow])
+            self.evictions += overflow
+
+    def _matrix(self, scope: str) -> Tuple[List[str], np.ndarray]:
+        if scope not in self._matrices:
+            ids = [entry_id for entry_id, entry in self._entries.items() if entry['scope'] == scope]
+            vectors = np.stack([self._entries[entry_id]['vector'] for entry_id in ids]) if ids else None
+            self._matrices[scope] = (ids, vectors)
+        return self._matrices[scope]
+
+    def lookup(self, vector: np.ndarray, scope: str) -> Optional[dict]:
+        """
+        Kapsamdaki en benzer soruyu bulur; benzerlik eşiği geçerse kaydı döndürür
+
+        Args:
+            vector: Sorunun embedding'i
+            scope: Önbellek kapsamı (indeks sürümü, model, k)
+
+        Returns:
+            {'answer', 'source_documents', 'question', 'similarity'} ya da None
+        """
+        query = _unit(vector)
+        with self._lock:
+            self._purge_expired()
+            ids, vectors = self._matrix(scope)
+            if vectors is None:
+                self.misses += 1
+                return None
+            similarities = vectors @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+            entry_id = ids[best]
+            entry = self._entries[entry_id]
+            self._entries.move_to_end(entry_id)
+            if self._conn is not None:
+                self._conn.execute("UPDATE answers SET last_used = ? WHERE id = ?", (time.time(), entry_id))
+                self._conn.commit()
+            self.hits += 1
+            return {
+                'answer': entry['answer'],
+                'source_documents': list(entry['sources']),
+                'question': entry['question'],
+                'similarity': float(similarities[best])
+            }
+
+    def put(self, vector: np.ndarray, scope: str, question: str, answer: str, source_documents: List[Document]):
+        """Cevabı kaydeder, sınır aşılırsa en az kullanılanları tahliye eder"""
+        entry_id = uuid.uuid4().hex
+        entry = {
+            'scope': scope,
+            'question': question,
+            'answer': answer,
+            'sources': list(source_documents),
+            'vector': _unit(vector),
+            'created': time.time()
+        }
+        with self._lock:
+            self._entries[entry_id] = entry
+            self._matrices.pop(scope, None)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT INTO answers (id, scope, question, answer, sources, vector, created, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (entry_id, scope, question, answer, _dump_documents(entry['sources']),
+                     entry['vector'].tobytes(), entry['created'], entry['created'])
+                )
+            self._evict()
+            if self._conn is not None:
+                self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrices.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM answers")
+                self._conn.commit()
+
+    def stats(self) -> dict:
+        """İsabet/ıska ve doluluk istatistiklerini döndürür"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'threshold': self.threshold
+            }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,118 @@
+"""
+Checkpoint Modülü - Tam indekslemeyi persist dizininin yanındaki hazırlık (staging) dizininde
+yürütür; yarıda kalan kurulum son checkpoint'ten sürdürülür, biten kurulum yeni nesil olarak yayınlanır
+"""
+import os
+import json
+import time
+import shutil
+from typing import Optional
+from src.generations import next_generation_path, publish_generation
+
+
+CHECKPOINT_FILENAME = "checkpoint.json"
+STAGING_SUFFIX = ".staging"
+
+
+def staging_directory(persist_directory: str) -> str:
+    """persist_directory için hazırlık dizini, ör. faiss_db -> faiss_db.staging"""
+    return os.path.normpath(persist_directory) + STAGING_SUFFIX
+
+
+class BuildCheckpoint:
+    """
+    Hazırlık dizini ve içindeki checkpoint.json: akışta kaç chunk'ın gömülüp kalıcı
+    olarak yazıldığını ve kurulumun hangi girdilerle başladığını (imza) tutar.
+    """
+
+    def __init__(self, directory: str, signature: dict, state: Optional[dict] = None):
+        self.directory = directory
+        self.signature = signature
+        self.state = state or {}
+
+    @property
+    def rows(self) -> int:
+        """Checkpoint'e kadar gömülmüş chunk sayısı (akıştaki konum)"""
+        return int(self.state.get('rows', 0))
+
+    @classmethod
+    def open(cls, persist_directory: str, signature: dict, resume: bool = False) -> "BuildCheckpoint":
+        """
+        Hazırlık dizinini açar. resume ise ve checkpoint aynı girdilerle başlatılmışsa
+        oradan devam edilir; aksi halde dizin temizlenip baştan başlanır.
+
+        Args:
+            persist_directory: Kurulumun sonunda yerine konacak vektör veritabanı dizini
+            signature: Girdileri tanımlayan JSON uyumlu imza (dosyalar, chunk ayarları, model, indeks tipi)
+            resume: Mevcut checkpoint'ten devam edilsin mi
+        """
+        directory = staging_directory(persist_directory)
+        # İmzayı JSON'dan okunmuş haliyle karşılaştırılabilir yap (tuple -> list)
+        signature = json.loads(json.dumps(signature))
+        state = cls._read(directory)
+        if resume:
+            if state is not None and state.get('signature') == signature:
+                print(f"↩️  Checkpoint bulundu: {state['rows']} chunk hazır, kaldığı yerden devam ediliyor ({directory})")
+                return cls(directory, signature, state)
+            if state is not None:
+                print("⚠️  Checkpoint farklı girdilerle oluşturulmuş (dosyalar/ayarlar değişmiş), baştan başlanıyor")
+            else:
+                print("ℹ️  Devam edilecek checkpoint yok, baştan başlanıyor")
+        elif state is not None:
+            print(f"⚠️  Önceki yarım kurulum siliniyor ({state['rows']} chunk); devam etmek için --resume kullanın")
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+        os.makedirs(directory)
+        return cls(directory, signature)
+
+    @staticmethod
+    def _read(directory: str) -> Optional[dict]:
+        path = os.path.join(directory, CHECKPOINT_FILENAME)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, rows: int, counters: Optional[dict] = None):
+        """
+        Checkpoint'i atomik olarak yazar. Çağırmadan önce docstore commit edilmiş ve
+        vektörler diske indirilmiş olmalıdır.
+
+        Args:
+            rows: Kalıcı olarak yazılmış chunk sayısı
+            counters: Bilgi amaçlı ilerleme sayaçları
+        """
+        self.state = {
+            'version': 1,
+            'signature': self.signature,
+            'rows': rows,
+            'counters': counters or {},
+            'updated': time.time()
+        }
+        path = os.path.join(self.directory, CHECKPOINT_FILENAME)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def promote(self, persist_directory: str) -> str:
+        """
+        Tamamlanan hazırlık dizinini persist_directory altında yeni bir nesil olarak yayınlar:
+        dizin gen_NNNNNN olarak taşınır ve CURRENT işaretçisi os.replace ile değiştirilir.
+        Açık indeks/docstore dosyalarına dokunulmaz (Windows'ta da çalışır) ve veritabanı
+        dizini hiçbir an eksik olmaz; eski nesiller sonraki yayınlarda silinir.
+
+        Returns:
+            Yayınlanan nesil dizini
+        """
+        os.remove(os.path.join(self.directory, CHECKPOINT_FILENAME))
+        os.makedirs(persist_directory, exist_ok=True)
+        target = next_generation_path(persist_directory)
+        os.rename(self.directory, target)
+        publish_generation(persist_directory, target)
+        return target
@@ -0,0 +1,184 @@
+"""
+Context Builder Modülü - LLM'e gidecek bağlamı token bütçesiyle kurar: aynı kaynağın
+komşu chunk'ları arasındaki örtüşmeyi atar, istenirse yalnızca soruyla en ilgili
+cümleleri tutar ve bütçeyi aşan belgeleri cümle sınırında kısaltır
+"""
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from langchain.schema import Document
+
+
+# Cümle sonu noktalama + boşluk ya da satır sonu
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?…])\s+|\n+')
+
+# Bu kadar karakterden kısa örtüşmeler tesadüfi kabul edilir
+MIN_OVERLAP_CHARS = 20
+
+
+def split_sentences(text: str) -> List[str]:
+    """Metni cümlelere (ve satırlara) böler, boş parçaları atar"""
+    return [part.strip() for part in SENTENCE_BOUNDARY.split(text) if part.strip()]
+
+
+def overlap_length(first: str, second: str, max_chars: int) -> int:
+    """first'ün sonu ile second'ın başının ortak olduğu en uzun kısım (yoksa 0)"""
+    for length in range(min(len(first), len(second), max_chars), MIN_OVERLAP_CHARS - 1, -1):
+        if first.endswith(second[:length]):
+            return length
+    return 0
+
+
+def _source_key(doc: Document) -> tuple:
+    # Aynı kayıttan (dosya + satır) gelen chunk'lar örtüşebilir
+    return doc.metadata.get('source'), doc.metadata.get('row_index')
+
+
+class ContextAssembler:
+    """
+    Getirilen belgeleri sırası korunarak bütçeye sığdırır. Belgelerin metni
+    değiştirilir, metadata korunur; ne kadar kısaltıldığı istatistiklerde raporlanır.
+    """
+
+    def __init__(
+        self,
+        count_tokens: Callable[[str], int],
+        max_tokens: int = 0,
+        dedupe: bool = True,
+        max_sentences: int = 0,
+        score_sentences: Optional[Callable[[str, List[str]], np.ndarray]] = None,
+        max_overlap_chars: int = 400,
+        min_tokens: int = 32
+    ):
+        """
+        Args:
+            count_tokens: Metnin token sayısını döndüren fonksiyon
+            max_tokens: Tüm prompt için token bütçesi (0 = sınırsız)
+            dedupe: Aynı kaynağın chunk'ları arasındaki tekrar eden metni at
+            max_sentences: Belge başına tutulacak en ilgili cümle sayısı (0 = hepsi)
+            score_sentences: (soru, cümleler) -> ilgililik puanları; max_sentences için gerekli
+            max_overlap_chars: Aranacak en uzun örtüşme (chunk_overlap'ten büyük olmalı)
+            min_tokens: Bütçede bundan az yer kalınca yeni belge eklenmez
+        """
+        self.count_tokens = count_tokens
+        self.max_tokens = max_tokens
+        self.dedupe = dedupe
+        self.max_sentences = max_sentences if score_sentences is not None else 0
+        self.score_sentences = score_sentences
+        self.max_overlap_chars = max_overlap_chars
+        self.min_tokens = min_tokens
+
+    def _remove_overlap(self, documents: List[Document]) -> Tuple[List[str], int]:
+        """Her belgenin, aynı kaynaktan önceki belgelerle tekrar etmeyen metni"""
+        texts: List[str] = []
+        removed = 0
+        kept_by_source: Dict[tuple, List[str]] = {}
+        for doc in documents:
+            text = doc.page_content
+            previous_texts = kept_by_source.setdefault(_source_key(doc), [])
+            for previous in previous_texts:
+                if text in previous:
+                    text = ''
+                    break
+                # Sonraki chunk: başı öncekinin sonunu tekrar eder; önceki chunk: sonu sonrakinin başını
+                head = overlap_length(previous, text, self.max_overlap_chars)
+                if head:
+                    text = text[head:].lstrip()
+                tail = overlap_length(text, previous, self.max_overlap_chars)
+                if tail:
+                    text = text[:-tail].rstrip()
+            removed += len(doc.page_content) - len(text)
+            if text:
+                previous_texts.append(doc.page_content)
+            texts.append(text)
+        return texts, removed
+
+    def _select_sentences(self, question: str, texts: List[str]) -> List[str]:
+        """Her belgede soruyla en ilgili max_sentences cümleyi (özgün sırasıyla) tutar"""
+        sentences = [split_sentences(text) for text in texts]
+        flat = [sentence for doc_sentences in sentences for sentence in doc_sentences]
+        if not flat:
+            return texts
+        # Tüm belgelerin cümleleri tek seferde puanlanır
+        scores = np.asarray(self.score_sentences(question, flat))
+        selected, offset = [], 0
+        for doc_sentences in sentences:
+            doc_scores = scores[offset:offset + len(doc_sentences)]
+            offset += len(doc_sentences)
+            keep = sorted(np.argsort(-doc_scores, kind='stable')[:self.max_sentences])
+            selected.append(' '.join(doc_sentences[i] for i in keep))
+        return selected
+
+    def _truncate(self, text: str, budget: int) -> str:
+        """Metni cümle sınırında budget token'a sığacak kadar kısaltır"""
+        kept: List[str] = []
+        used = 0
+        for sentence in split_sentences(text):
+            tokens = self.count_tokens(sentence)
+            if used + tokens > budget:
+                break
+            kept.append(sentence)
+            used += tokens
+        # Birleştirilen metin cümle başına sayımların toplamından uzun olabilir (sınırdaki token'lar)
+        while kept and self.count_tokens(' '.join(kept)) > budget:
+            kept.pop()
+        return ' '.join(kept)
+
+    def assemble(
+        self,
+        question: str,
+        documents: List[Document],
+        overhead_tokens: int = 0,
+        separator_tokens: int = 0
+    ) -> Tuple[List[Document], dict]:
+        """
+        Bağlamı kurar
+
+        Args:
+            question: Kullanıcı sorusu (cümle seçimi için)
+            documents: Getirilen belgeler, önem sırasıyla
+            overhead_tokens: Bağlam dışındaki prompt'un (talimatlar + soru) token sayısı
+            separator_tokens: Belgeler arasındaki ayracın token sayısı
+
+        Returns:
+            (LLM'e verilecek belgeler, istatistikler)
+        """
+        texts = [doc.page_content for doc in documents]
+        tokens_in = sum(self.count_tokens(text) for text in texts)
+        overlap_chars = 0
+        if self.dedupe:
+            texts, overlap_chars = self._remove_overlap(documents)
+        if self.max_sentences > 0:
+            texts = self._select_sentences(question, texts)
+
+        remaining = self.max_tokens - overhead_tokens if self.max_tokens > 0 else None
+        assembled: List[Document] = []
+        truncated = 0
+        context_tokens = 0
+        for doc, text in zip(documents, texts):
+            if not text:
+                continue
+            cost = self.count_tokens(text) + (separator_tokens if assembled else 0)
+            if remaining is not None and cost > remaining:
+                if remaining < self.min_tokens:
+                    break
+                text = self._truncate(text, remaining - (separator_tokens if assembled else 0))
+                if not text:
+                    continue
+                cost = self.count_tokens(text) + (separator_tokens if assembled else 0)
+                truncated += 1
+            assembled.append(Document(id=doc.id, page_content=text, metadata=doc.metadata))
+            context_tokens += cost
+            if remaining is not None:
+                remaining -= cost
+
+        return assembled, {
+            'documents_in': len(documents),
+            'documents_used': len(assembled),
+            'documents_truncated': truncated,
+            'overlap_chars_removed': overlap_chars,
+            'context_tokens_in': tokens_in,
+            'context_tokens': context_tokens,
+            'prompt_tokens': overhead_tokens + context_tokens,
+            'max_tokens': self.max_tokens
+        }
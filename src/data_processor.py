@@ -5,12 +5,17 @@ Veri İşleme Modülü - Film eleştirilerini yükler ve chunking yapar
 import os
 import sys
 import io
-from typing import List
+from typing import Iterator, List, Optional, Tuple
 import json
 import pandas as pd
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 
+SUPPORTED_EXTENSIONS = ('.txt', '.csv', '.json', '.jsonl')
+# CSV/JSONL dosyaları bu kadar satırlık parçalar halinde okunur (bellek dosya boyutundan bağımsız)
+RECORD_BLOCK_ROWS = 5000
+TITLE_CANDIDATES = ['title', 'movie', 'movie_title', 'film', 'name']
+
 # Not: Streamlit ortamında stdout/stderr'i yeniden sarmalamak I/O hatalarına yol açabilir.
 # Bu nedenle Windows'ta da varsayılan akışları olduğu gibi bırakıyoruz.
 
@@ -95,20 +100,136 @@ class DataProcessor:
         Returns:
             Document nesnelerinin listesi
         """
-        # Dosyayı yükle
-        content = self.load_text_file(file_path)
+        documents = list(self.iter_file_documents(file_path))
+        print(f"✓ {len(documents)} chunk oluşturuldu: {file_path}")
+        return documents
+    
+    def list_data_files(self, directory_path: str) -> List[str]:
+        """
+        Dizindeki desteklenen (.txt, .csv, .json, .jsonl) dosyaların yollarını döndürür
         
-        # Metadata oluştur
-        metadata = {
-            'source': file_path,
-            'type': 'film_review'
-        }
+        Args:
+            directory_path: Dizin yolu
+            
+        Returns:
+            Dosya yollarının listesi
+        """
+        if not os.path.exists(directory_path):
+            raise FileNotFoundError(f"Dizin bulunamadı: {directory_path}")
         
-        # Chunk'lara böl
-        documents = self.split_into_chunks(content, metadata)
+        # Sabit sıra: yarıda kalan indeksleme aynı akış konumundan sürdürülebilsin
+        return [
+            os.path.join(directory_path, filename)
+            for filename in sorted(os.listdir(directory_path))
+            if filename.lower().endswith(SUPPORTED_EXTENSIONS)
+        ]
+    
+    def process_file(self, file_path: str) -> List[Document]:
+        """
+        Tek bir dosyayı uzantısına göre uygun yükleyiciyle işler
         
-        print(f"✓ {len(documents)} chunk oluşturuldu: {file_path}")
-        return documents
+        Args:
+            file_path: Dosya yolu
+            
+        Returns:
+            Document nesnelerinin listesi
+        """
+        lower = file_path.lower()
+        if lower.endswith('.txt'):
+            return self.process_review_file(file_path)
+        if lower.endswith('.csv'):
+            return self.process_csv_file(file_path)
+        if lower.endswith('.json') or lower.endswith('.jsonl'):
+            return self.process_json_file(file_path)
+        return []
+    
+    def iter_file_records(self, file_path: str) -> Iterator[Tuple[str, dict]]:
+        """
+        Dosyadaki kayıtları (metin, metadata) olarak sırayla üretir. CSV ve JSONL
+        dosyaları RECORD_BLOCK_ROWS satırlık parçalar halinde, TXT dosyaları satır satır
+        (boş satırla ayrılmış bloklar halinde) okunur.
+        
+        Args:
+            file_path: Dosya yolu
+            
+        Returns:
+            (metin, metadata) üreteci
+        """
+        lower = file_path.lower()
+        if lower.endswith('.txt'):
+            for text in self._iter_text_records(file_path):
+                yield text, {'source': file_path, 'type': 'film_review'}
+        elif lower.endswith('.csv'):
+            frames = pd.read_csv(file_path, chunksize=RECORD_BLOCK_ROWS)
+            yield from self._iter_frame_records(frames, file_path, 'csv_record')
+        elif lower.endswith('.json') or lower.endswith('.jsonl'):
+            yield from self._iter_frame_records(self._iter_json_frames(file_path), file_path, 'json_record')
+    
+    def _iter_text_blocks(self, file_path: str) -> Iterator[str]:
+        """Metin dosyasını satır satır okur, boş satırla ayrılmış blokları (eleştiri, paragraf) üretir"""
+        block: List[str] = []
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    if line.strip():
+                        block.append(line)
+                    elif block:
+                        yield ''.join(block).rstrip('\n')
+                        block = []
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Dosya bulunamadı: {file_path}")
+        if block:
+            yield ''.join(block).rstrip('\n')
+    
+    def _iter_text_records(self, file_path: str) -> Iterator[str]:
+        """
+        Ardışık blokları chunk_size'ı aşmayacak şekilde tek kayıtta birleştirir (başlık gibi kısa
+        bloklar tek başına chunk olmaz); bellekte en fazla bir kayıt tutulur
+        """
+        parts: List[str] = []
+        size = 0
+        for block in self._iter_text_blocks(file_path):
+            if parts and size + len(block) > self.chunk_size:
+                yield '\n\n'.join(parts)
+                parts, size = [], 0
+            parts.append(block)
+            size += len(block) + 2
+        if parts:
+            yield '\n\n'.join(parts)
+    
+    def iter_file_documents(self, file_path: str, progress=None) -> Iterator[Document]:
+        """
+        Dosyanın chunk'larını kayıt kayıt üretir (dosyanın tamamı belleğe alınmaz)
+        
+        Args:
+            file_path: Dosya yolu
+            progress: Kayıt/chunk sayaçları güncellenecek IngestProgress (opsiyonel)
+        """
+        for text, metadata in self.iter_file_records(file_path):
+            documents = self.split_into_chunks(text, metadata)
+            if progress is not None:
+                progress.records += 1
+                progress.chunks += len(documents)
+            yield from documents
+    
+    def iter_directory_documents(self, directory_path: str, progress=None) -> Iterator[Document]:
+        """
+        Dizindeki tüm desteklenen dosyaların chunk'larını akış halinde üretir.
+        Okunamayan dosyalar atlanır.
+        
+        Args:
+            directory_path: Dizin yolu
+            progress: Dosya/kayıt/chunk sayaçları güncellenecek IngestProgress (opsiyonel)
+        """
+        for file_path in self.list_data_files(directory_path):
+            try:
+                yield from self.iter_file_documents(file_path, progress)
+            except Exception as e:
+                print(f"Dosya atlandı (hata): {os.path.basename(file_path)} -> {str(e)}")
+                if progress is not None:
+                    progress.files_failed += 1
+            if progress is not None:
+                progress.files_done += 1
     
     def process_directory(self, directory_path: str) -> List[Document]:
         """
@@ -122,25 +243,12 @@ class DataProcessor:
         """
         all_documents = []
         
-        if not os.path.exists(directory_path):
-            raise FileNotFoundError(f"Dizin bulunamadı: {directory_path}")
-        
         # Dizindeki desteklenen dosyaları işle
-        for filename in os.listdir(directory_path):
-            file_path = os.path.join(directory_path, filename)
-            lower = filename.lower()
+        for file_path in self.list_data_files(directory_path):
             try:
-                if lower.endswith('.txt'):
-                    documents = self.process_review_file(file_path)
-                    all_documents.extend(documents)
-                elif lower.endswith('.csv'):
-                    documents = self.process_csv_file(file_path)
-                    all_documents.extend(documents)
-                elif lower.endswith('.json') or lower.endswith('.jsonl'):
-                    documents = self.process_json_file(file_path)
-                    all_documents.extend(documents)
+                all_documents.extend(self.process_file(file_path))
             except Exception as e:
-                print(f"Dosya atlandı (hata): {filename} -> {str(e)}")
+                print(f"Dosya atlandı (hata): {os.path.basename(file_path)} -> {str(e)}")
         
         print(f"\n✓ Toplam {len(all_documents)} chunk oluşturuldu")
         return all_documents
@@ -190,40 +298,72 @@ class DataProcessor:
             parts = [str(v) for v in row.values() if isinstance(v, str) and v.strip()]
         return "\n\n".join(parts)
 
+    def _iter_json_frames(self, file_path: str) -> Iterator[pd.DataFrame]:
+        """JSON dizisini tek parça, JSONL'i RECORD_BLOCK_ROWS satırlık DataFrame parçaları olarak üretir"""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            first = f.read(1)
+            f.seek(0)
+            if first == '[':
+                # JSON array (standart kütüphane akış okumayı desteklemez)
+                records = json.load(f)
+                if records:
+                    yield pd.DataFrame(records)
+                return
+            # JSONL
+            block: List[dict] = []
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    block.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+                if len(block) >= RECORD_BLOCK_ROWS:
+                    yield pd.DataFrame(block)
+                    block = []
+            if block:
+                yield pd.DataFrame(block)
+
+    def _iter_frame_records(self, frames, file_path: str, record_type: str) -> Iterator[Tuple[str, dict]]:
+        """
+        DataFrame parçalarındaki satırları (metin, metadata) kayıtlarına çevirir.
+        Başlık ve metin sütunları ilk parçadan belirlenir.
+        """
+        title_cols: Optional[List[str]] = None
+        text_cols: List[str] = []
+        row_offset = 0
+        for df in frames:
+            if title_cols is None:
+                title_cols = [c for c in df.columns if c.lower() in TITLE_CANDIDATES]
+                text_cols = self._infer_text_columns(df)
+            # Satır numarası parçalar arasında dosya genelinde sürer
+            for position, row_dict in enumerate(df.to_dict('records')):
+                text = self._compose_record_text(row_dict, text_cols, title_cols)
+                if not text:
+                    continue
+                # Satırdan başlık al (varsa)
+                title_value = None
+                for tcol in title_cols:
+                    val = row_dict.get(tcol)
+                    if isinstance(val, str) and val.strip():
+                        title_value = val.strip()
+                        break
+                meta = {
+                    'source': file_path,
+                    'type': record_type,
+                    'row_index': row_offset + position
+                }
+                if title_value:
+                    meta['title'] = title_value
+                yield text, meta
+            row_offset += len(df)
+
     def process_csv_file(self, file_path: str) -> List[Document]:
         """
         CSV dosyasını yükler ve metin alanlarını chunk'lara böler.
         """
-        df = pd.read_csv(file_path)
-        # Başlık benzeri sütunlar
-        title_candidates = ['title', 'movie', 'movie_title', 'film', 'name']
-        title_cols = [c for c in df.columns if c.lower() in title_candidates]
-        text_cols = self._infer_text_columns(df)
-
-        documents: List[Document] = []
-        for idx, row in df.iterrows():
-            text = self._compose_record_text(row, text_cols, title_cols)
-            if not text:
-                continue
-            # Satırdan başlık al (varsa)
-            title_value = None
-            for tcol in title_cols:
-                try:
-                    val = row[tcol]
-                except Exception:
-                    val = None
-                if isinstance(val, str) and val.strip():
-                    title_value = val.strip()
-                    break
-            meta = {
-                'source': file_path,
-                'type': 'csv_record',
-                'row_index': int(idx)
-            }
-            if title_value:
-                meta['title'] = title_value
-            # Satırı chunk'la
-            documents.extend(self.split_into_chunks(text, meta))
+        documents = list(self.iter_file_documents(file_path))
         print(f"✓ CSV işlendi: {file_path} -> {len(documents)} chunk")
         return documents
 
@@ -231,53 +371,7 @@ class DataProcessor:
         """
         JSON veya JSONL dosyasını yükler ve metin alanlarını chunk'lara böler.
         """
-        records: List[dict] = []
-        with open(file_path, 'r', encoding='utf-8') as f:
-            first = f.read(1)
-            f.seek(0)
-            if first == '[':
-                # JSON array
-                records = json.load(f)
-            else:
-                # JSONL
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        records.append(json.loads(line))
-                    except json.JSONDecodeError:
-                        continue
-
-        if not records:
-            return []
-
-        df = pd.DataFrame(records)
-        title_candidates = ['title', 'movie', 'movie_title', 'film', 'name']
-        title_cols = [c for c in df.columns if c.lower() in title_candidates]
-        text_cols = self._infer_text_columns(df)
-
-        documents: List[Document] = []
-        for idx, row in df.iterrows():
-            row_dict = row.to_dict()
-            text = self._compose_record_text(row_dict, text_cols, title_cols)
-            if not text:
-                continue
-            # Satırdan başlık al (varsa)
-            title_value = None
-            for tcol in title_cols:
-                val = row_dict.get(tcol)
-                if isinstance(val, str) and val.strip():
-                    title_value = val.strip()
-                    break
-            meta = {
-                'source': file_path,
-                'type': 'json_record',
-                'row_index': int(idx)
-            }
-            if title_value:
-                meta['title'] = title_value
-            documents.extend(self.split_into_chunks(text, meta))
+        documents = list(self.iter_file_documents(file_path))
         print(f"✓ JSON işlendi: {file_path} -> {len(documents)} chunk")
         return documents
 
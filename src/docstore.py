@@ -0,0 +1,217 @@
+"""
+Docstore Modülü - Chunk metni ve metadata'sı için pickle'sız, id ile okunan SQLite deposu
+"""
+import os
+import json
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Set, Union
+from langchain.schema import Document
+from langchain_community.docstore.base import AddableMixin, Docstore
+
+
+DOCSTORE_FILENAME = "docstore.sqlite"
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS docs (id TEXT PRIMARY KEY, page_content TEXT NOT NULL, metadata TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS rows (row INTEGER PRIMARY KEY, id TEXT NOT NULL)"
+)
+
+
+def _connect(path: str, read_only: bool = False) -> sqlite3.Connection:
+    if read_only:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(path, check_same_thread=False)
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+    return conn
+
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    """
+    Belgeleri id ile diskten okuyan docstore. Açılışta hiçbir belge belleğe
+    yüklenmez; sayfa önbelleği süreçler arasında paylaşılır.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock):
+        self._conn = conn
+        self._lock = lock
+
+    def search(self, search: str) -> Union[str, Document]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_content, metadata FROM docs WHERE id = ?", (search,)
+            ).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=row[0], metadata=json.loads(row[1]))
+
+    def search_many(self, ids: List[str]) -> Dict[str, Document]:
+        """Birden fazla belgeyi tek sorguda okur"""
+        found: Dict[str, Document] = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                part = ids[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                for doc_id, content, metadata in self._conn.execute(
+                    f"SELECT id, page_content, metadata FROM docs WHERE id IN ({placeholders})", part
+                ):
+                    found[doc_id] = Document(id=doc_id, page_content=content, metadata=json.loads(metadata))
+        return found
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        rows = [
+            (doc_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False))
+            for doc_id, doc in texts.items()
+        ]
+        with self._lock:
+            existing = []
+            for start in range(0, len(rows), 500):
+                part = [r[0] for r in rows[start:start + 500]]
+                existing.extend(self._conn.execute(
+                    f"SELECT id FROM docs WHERE id IN ({','.join('?' * len(part))})", part
+                ).fetchall())
+            if existing:
+                raise ValueError(f"Tried to add ids that already exist: {[r[0] for r in existing]}")
+            self._conn.executemany("INSERT INTO docs (id, page_content, metadata) VALUES (?, ?, ?)", rows)
+
+    def delete(self, ids: List) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM docs WHERE id = ?", [(doc_id,) for doc_id in ids])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def unique_titles(self) -> Set[str]:
+        """metadata.title değerlerini belgeleri yüklemeden döndürür"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT json_extract(metadata, '$.title') FROM docs "
+                "WHERE json_extract(metadata, '$.title') IS NOT NULL"
+            ).fetchall()
+        return {row[0] for row in rows if row[0]}
+
+
+class SQLiteRowMapping(MutableMapping):
+    """FAISS satırı -> docstore id eşlemesi (LangChain'in index_to_docstore_id sözlüğü yerine)"""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock):
+        self._conn = conn
+        self._lock = lock
+
+    def __getitem__(self, row: int) -> str:
+        with self._lock:
+            result = self._conn.execute("SELECT id FROM rows WHERE row = ?", (int(row),)).fetchone()
+        if result is None:
+            raise KeyError(row)
+        return result[0]
+
+    def __setitem__(self, row: int, doc_id: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO rows (row, id) VALUES (?, ?)", (int(row), doc_id))
+
+    def __delitem__(self, row: int):
+        with self._lock:
+            if self._conn.execute("DELETE FROM rows WHERE row = ?", (int(row),)).rowcount == 0:
+                raise KeyError(row)
+
+    def __iter__(self) -> Iterator[int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT row FROM rows ORDER BY row").fetchall()
+        return iter(row[0] for row in rows)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+    def items(self):
+        with self._lock:
+            return self._conn.execute("SELECT row, id FROM rows ORDER BY row").fetchall()
+
+    def values(self):
+        return [doc_id for _, doc_id in self.items()]
+
+    def update(self, other=(), **kwargs):
+        pairs = other.items() if hasattr(other, 'items') else other
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rows (row, id) VALUES (?, ?)",
+                [(int(row), doc_id) for row, doc_id in pairs]
+            )
+
+    def replace_all(self, mapping: Dict[int, str]):
+        """Tüm eşlemeyi verilen sözlükle değiştirir (ör. silme sonrası sıkıştırılmış satırlar)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM rows")
+            self._conn.executemany(
+                "INSERT INTO rows (row, id) VALUES (?, ?)",
+                [(int(row), doc_id) for row, doc_id in mapping.items()]
+            )
+
+
+class SQLiteStore:
+    """Aynı SQLite dosyası üzerindeki docstore ve satır eşlemesi"""
+
+    def __init__(self, path: str, read_only: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = _connect(path, read_only=read_only)
+        self.docstore = SQLiteDocstore(self._conn, self._lock)
+        self.index_to_docstore_id = SQLiteRowMapping(self._conn, self._lock)
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    def truncate(self, rows: int):
+        """Satır numarası rows ve üzerindeki kayıtları siler (checkpoint'ten devam için)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM docs WHERE id IN (SELECT id FROM rows WHERE row >= ?)", (rows,))
+            self._conn.execute("DELETE FROM rows WHERE row >= ?", (rows,))
+            self._conn.commit()
+
+    def ids_by_source(self) -> Dict[str, List[str]]:
+        """metadata.source -> satır sırasıyla docstore id'leri (manifest üretimi için)"""
+        by_source: Dict[str, List[str]] = {}
+        with self._lock:
+            for doc_id, source in self._conn.execute(
+                "SELECT rows.id, json_extract(docs.metadata, '$.source') FROM rows "
+                "JOIN docs ON docs.id = rows.id ORDER BY rows.row"
+            ):
+                if source:
+                    by_source.setdefault(source, []).append(doc_id)
+        return by_source
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def write_store(persist_directory: str, documents: Dict[str, Document], index_to_docstore_id: Dict[int, str]) -> str:
+    """
+    Belgeleri ve satır eşlemesini yeni bir SQLite dosyasına yazıp atomik olarak yerine koyar
+
+    Args:
+        persist_directory: Vektör veritabanı dizini
+        documents: docstore id -> Document
+        index_to_docstore_id: FAISS satırı -> docstore id
+
+    Returns:
+        docstore.sqlite yolu
+    """
+    os.makedirs(persist_directory, exist_ok=True)
+    path = os.path.join(persist_directory, DOCSTORE_FILENAME)
+    tmp_path = path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    store = SQLiteStore(tmp_path)
+    store.docstore.add(documents)
+    store.index_to_docstore_id.update(index_to_docstore_id)
+    store.commit()
+    store.close()
+    os.replace(tmp_path, path)
+    return path
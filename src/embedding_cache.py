@@ -0,0 +1,298 @@
+"""
+Embedding Cache Modülü - Diskte kalıcı belge embedding önbelleği ve süreç içi sorgu önbelleği
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+from langchain.embeddings.base import Embeddings
+
+
+class EmbeddingCache:
+    """SQLite tabanlı, boyutu sınırlı (LRU tahliyeli) embedding deposu"""
+
+    def __init__(self, cache_dir: str = "embedding_cache", max_bytes: int = 512 * 1024 * 1024):
+        """
+        Önbelleği açar (yoksa oluşturur)
+
+        Args:
+            cache_dir: Önbellek dizini
+            max_bytes: Saklanacak toplam vektör boyutu üst sınırı (byte)
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "embeddings.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON embeddings(last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(namespace: str, text: str) -> str:
+        """Model adı/kesme ayarları (namespace) ve metinden içerik adresli anahtar üretir"""
+        digest = hashlib.sha256()
+        digest.update(namespace.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Bulunan anahtarların float32 vektörlerini döndürür ve isabet/ıska sayaçlarını günceller"""
+        found: Dict[str, np.ndarray] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            # SQLite parametre sınırı nedeniyle parça parça sorgula
+            for start in range(0, len(unique), 500):
+                part = unique[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]):
+        """Vektörleri kaydeder, sınır aşılırsa en az kullanılanları tahliye eder"""
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, vector in items.items():
+            blob = np.ascontiguousarray(vector, dtype=np.float32).tobytes()
+            rows.append((key, blob, len(blob), now))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_access) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Sınırın %90'ına inene kadar en eski erişilenleri sil
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM embeddings ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM embeddings WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+        self.evictions += removed
+
+    def stats(self) -> dict:
+        """İsabet/ıska ve boyut istatistiklerini döndürür"""
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embeddings"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': entries,
+            'bytes': total
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class QueryEmbeddingCache:
+    """Süreç içi, boyutu sınırlı LRU (+ opsiyonel TTL) sorgu vektörü önbelleği"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 0, lowercase: bool = False):
+        """
+        Args:
+            max_entries: Tutulacak en fazla sorgu vektörü sayısı
+            ttl_seconds: Kayıt ömrü (saniye, 0 = süresiz)
+            lowercase: Anahtarı küçük harfe çevir (yalnızca tokenizer zaten küçültüyorsa: do_lower_case)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.lowercase = lowercase
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def normalize(self, text: str) -> str:
+        """
+        Önbellek anahtarı: boşluklar sadeleştirilir (tokenizer boşluğa göre böler, vektör değişmez);
+        küçük harfe yalnızca lowercase açıksa çevrilir, büyük/küçük harf duyarlı modellerde
+        "Apple" ve "apple" ayrı vektörlerdir.
+        """
+        text = " ".join(text.split())
+        return text.lower() if self.lowercase else text
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds and time.time() - entry[1] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, vector: np.ndarray):
+        # Paylaşılan vektör çağıranlar tarafından değiştirilemesin
+        vector = np.array(vector, dtype=np.float32)
+        vector.setflags(write=False)
+        with self._lock:
+            self._entries[key] = (vector, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embedding modelinin önündeki önbellek katmanı: belgeler için diskteki
+    embedding önbelleği, sorgular için süreç içi LRU önbelleği
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache: Optional[EmbeddingCache] = None,
+        query_cache: Optional[QueryEmbeddingCache] = None
+    ):
+        """
+        Args:
+            embeddings: Asıl embedding modeli (cache_namespace özelliği olmalı)
+            cache: Diskteki embedding önbelleği (None ise belgeler doğrudan gömülür)
+            query_cache: Sorgu vektörü önbelleği (None ise her sorgu modele gider)
+        """
+        self.embeddings = embeddings
+        self.cache = cache
+        self.query_cache = query_cache
+
+    @property
+    def cache_namespace(self) -> str:
+        return self.embeddings.cache_namespace
+
+    @property
+    def dimension(self) -> int:
+        return self.embeddings.dimension
+
+    def _embed_with_cache(self, texts: List[str], embed_fn) -> np.ndarray:
+        if self.cache is None:
+            return embed_fn(texts)
+        namespace = self.cache_namespace
+        keys = [EmbeddingCache.make_key(namespace, text) for text in texts]
+        found = self.cache.get_many(keys)
+
+        # Iskalanları (tekrarsız) tek seferde göm
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = embed_fn(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(computed)
+            found.update(computed)
+
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for row, key in enumerate(keys):
+            embeddings[row] = found[key]
+        return embeddings
+
+    def embed_documents_array(self, texts: List[str]) -> np.ndarray:
+        return self._embed_with_cache(texts, self.embeddings.embed_documents_array)
+
+    def embed_documents_parallel(self, texts: List[str], workers: int, **kwargs) -> np.ndarray:
+        return self._embed_with_cache(
+            texts,
+            lambda missing: self.embeddings.embed_documents_parallel(missing, workers=workers, **kwargs)
+        )
+
+    def worker_pool(self, workers: int, **kwargs):
+        return self.embeddings.worker_pool(workers, **kwargs)
+
+    def embed_query_array(self, text: str) -> np.ndarray:
+        if self.query_cache is None:
+            return self.embeddings.embed_query_array(text)
+        key = f"{self.cache_namespace}\0{self.query_cache.normalize(text)}"
+        vector = self.query_cache.get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query_array(text)
+            self.query_cache.put(key, vector)
+        return vector
+
+    def embed_queries_array(self, texts: List[str]) -> np.ndarray:
+        """Sorguları önbellekten alır; ıskalananlar (tekrarsız) tek seferde gömülür"""
+        if self.query_cache is None:
+            return self.embeddings.embed_queries_array(texts)
+        namespace = self.cache_namespace
+        keys = [f"{namespace}\0{self.query_cache.normalize(text)}" for text in texts]
+        found: Dict[str, np.ndarray] = {}
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in found or key in missing:
+                continue
+            vector = self.query_cache.get(key)
+            if vector is None:
+                missing[key] = text
+            else:
+                found[key] = vector
+        if missing:
+            vectors = self.embeddings.embed_queries_array(list(missing.values()))
+            for key, vector in zip(missing.keys(), vectors):
+                self.query_cache.put(key, vector)
+                found[key] = vector
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for row, key in enumerate(keys):
+            embeddings[row] = found[key]
+        return embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_query_array(text).tolist()
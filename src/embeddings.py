@@ -0,0 +1,401 @@
+"""
+Embedding Modülü - Transformers tabanlı lokal embedding modeli (sentence-transformers olmadan)
+"""
+import os
+
+# TensorFlow'u devre dışı bırak (sadece PyTorch kullan)
+os.environ['USE_TF'] = 'NO'
+os.environ['USE_TORCH'] = 'YES'
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+import numpy as np
+import torch
+from transformers import AutoConfig, AutoTokenizer, AutoModel
+from langchain.embeddings.base import Embeddings
+
+
+DEFAULT_EMBEDDING_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_MAX_LENGTH = 512
+DEFAULT_ONNX_CACHE_DIR = 'onnx_models'
+
+# Dışa aktarılan ONNX modelini torch ile karşılaştırmak için örnek cümleler
+PARITY_PROBES = [
+    "Christopher Nolan'ın en iyi filmleri hangileri?",
+    "The Shawshank Redemption is a story about hope and friendship.",
+    "Aksiyon filmleri öner",
+    "A slow, beautifully shot drama with an outstanding lead performance and a weak ending."
+]
+
+# Worker süreçlerinde bir kez yüklenen model (süreç başına tek kopya)
+_worker_embeddings = None
+
+
+class CustomTransformerEmbeddings(Embeddings):
+    """all-MiniLM-L6-v2 ile mean pooling embedding'i - toplu (batched) çıkarım destekli"""
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_EMBEDDING_MODEL,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_length: int = DEFAULT_MAX_LENGTH,
+        num_threads: Optional[int] = None
+    ):
+        """
+        Embedding modelini yükler
+
+        Args:
+            model_name: HuggingFace model adı veya lokal yol
+            batch_size: Tek forward pass'te işlenecek metin sayısı
+            max_length: Token cinsinden kesme (truncation) uzunluğu
+            num_threads: Çıkarım thread sayısı (None ise kütüphane varsayılanı)
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size en az 1 olmalı: {batch_size}")
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.num_threads = num_threads
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self._load_model()
+
+    def _load_model(self):
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+        self.model = AutoModel.from_pretrained(self.model_name)
+        self.model.eval()
+        self.config = self.model.config
+
+    def _worker_config(self) -> dict:
+        """Worker süreçlerinde aynı modeli kurmak için gereken ayarlar"""
+        return {
+            'model_name': self.model_name,
+            'batch_size': self.batch_size,
+            'max_length': self.max_length
+        }
+
+    @property
+    def cache_namespace(self) -> str:
+        """Embedding önbellek anahtarına giren model ve kesme ayarları"""
+        return f"torch|{self.model_name}|max_length={self.max_length}"
+
+    def _encode_batch(self, features: List[dict]) -> np.ndarray:
+        """
+        Önceden tokenize edilmiş bir grubu yalnızca kendi en uzun dizisine kadar
+        doldurur (padding) ve mean pooling uygulanmış vektörleri döndürür.
+        """
+        encoded = self.tokenizer.pad(features, padding=True, return_tensors='pt')
+        with torch.no_grad():
+            output = self.model(**encoded)
+        # Mean pooling (padding token'ları hariç)
+        mask = encoded['attention_mask'].unsqueeze(-1).to(output.last_hidden_state.dtype)
+        summed = (output.last_hidden_state * mask).sum(dim=1)
+        counts = mask.sum(dim=1).clamp(min=1e-9)
+        return (summed / counts).numpy()
+
+    def embed_documents_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Metinleri token uzunluğuna göre sıralayıp gruplar halinde gömer,
+        sonuçları giriş sırasıyla tek bir float32 matriste döndürür.
+
+        Args:
+            texts: Gömülecek metinler
+
+        Returns:
+            (len(texts), boyut) şeklinde, C-contiguous float32 matris
+        """
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        # Tek seferde tokenize et (padding yok), uzunluğa göre sırala
+        tokenized = self.tokenizer(list(texts), truncation=True, max_length=self.max_length)
+        keys = list(tokenized.keys())
+        order = sorted(range(len(texts)), key=lambda i: len(tokenized['input_ids'][i]), reverse=True)
+
+        embeddings = None
+        for start in range(0, len(order), self.batch_size):
+            batch_ids = order[start:start + self.batch_size]
+            features = [{key: tokenized[key][i] for key in keys} for i in batch_ids]
+            vectors = self._encode_batch(features)
+            if embeddings is None:
+                embeddings = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            # Giriş sırasına geri yerleştir
+            embeddings[batch_ids] = vectors
+        return embeddings
+
+    def embed_query_array(self, text: str) -> np.ndarray:
+        return self.embed_documents_array([text])[0]
+
+    def embed_queries_array(self, texts: List[str]) -> np.ndarray:
+        """Birden fazla sorguyu tek çağrıda (aynı gruplu forward pass'lerle) gömer"""
+        return self.embed_documents_array(texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # LangChain Embeddings arayüzü (liste bekleyen çağıranlar için)
+        return self.embed_documents_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_query_array(text).tolist()
+
+    @property
+    def dimension(self) -> int:
+        return self.config.hidden_size
+
+    def worker_pool(self, workers: int, threads_per_worker: Optional[int] = None) -> ProcessPoolExecutor:
+        """
+        Modeli her worker'da bir kez yükleyen süreç havuzu açar. Akış indekslemede
+        havuz gruplar arasında yeniden kullanılır (embed_documents_parallel(executor=...)).
+
+        Args:
+            workers: Worker süreç sayısı
+            threads_per_worker: Worker başına torch thread sayısı (varsayılan: çekirdek / worker)
+        """
+        if threads_per_worker is None:
+            threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+        # fork yerine spawn: torch/tokenizers thread havuzlarıyla güvenli
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(type(self), self._worker_config(), threads_per_worker)
+        )
+
+    def embed_documents_parallel(
+        self,
+        texts: List[str],
+        workers: int,
+        threads_per_worker: Optional[int] = None,
+        shard_size: Optional[int] = None,
+        executor: Optional[ProcessPoolExecutor] = None
+    ) -> np.ndarray:
+        """
+        Metinleri ardışık parçalara (shard) bölüp bir süreç havuzunda gömer.
+        Her worker modeli bir kez yükler; sonuçlar giriş sırasıyla birleştirilir.
+
+        Args:
+            texts: Gömülecek metinler
+            workers: Worker süreç sayısı (1 ise tek süreçte çalışır)
+            threads_per_worker: Worker başına torch thread sayısı (varsayılan: çekirdek / worker)
+            shard_size: Worker'a tek seferde gönderilecek metin sayısı
+            executor: worker_pool ile açılmış havuz (None ise bu çağrı için açılıp kapatılır)
+
+        Returns:
+            (len(texts), boyut) şeklinde float32 matris (giriş sırasıyla)
+        """
+        if workers <= 1 or len(texts) <= self.batch_size:
+            return self.embed_documents_array(texts)
+
+        if shard_size is None:
+            shard_size = self.batch_size * 8
+        shards = [texts[i:i + shard_size] for i in range(0, len(texts), shard_size)]
+
+        if executor is not None:
+            # map giriş sırasını korur
+            return np.concatenate(list(executor.map(_embed_shard, shards)))
+        with self.worker_pool(workers, threads_per_worker) as executor:
+            return np.concatenate(list(executor.map(_embed_shard, shards)))
+
+
+def _init_worker(embeddings_cls: type, config: dict, num_threads: int):
+    """Worker süreci başlatıcı: thread sayısını sabitler ve modeli bir kez yükler"""
+    global _worker_embeddings
+    os.environ['TOKENIZERS_PARALLELISM'] = 'false'
+    torch.set_num_interop_threads(1)
+    _worker_embeddings = embeddings_cls(**config, num_threads=num_threads)
+
+
+def _embed_shard(texts: List[str]) -> np.ndarray:
+    return _worker_embeddings.embed_documents_array(texts)
+
+
+class OnnxTransformerEmbeddings(CustomTransformerEmbeddings):
+    """
+    Aynı modelin ONNX Runtime (CPU) ile çalıştırılan sürümü. Model ilk kullanımda
+    ONNX'e aktarılır, istenirse dinamik int8 kuantizasyon uygulanır ve lokal
+    dizinde saklanır; sonraki açılışlarda doğrudan bu dosya yüklenir.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_EMBEDDING_MODEL,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_length: int = DEFAULT_MAX_LENGTH,
+        num_threads: Optional[int] = None,
+        quantize: bool = False,
+        cache_dir: str = DEFAULT_ONNX_CACHE_DIR
+    ):
+        """
+        Args:
+            model_name: HuggingFace model adı veya lokal yol
+            batch_size: Tek forward pass'te işlenecek metin sayısı
+            max_length: Token cinsinden kesme (truncation) uzunluğu
+            num_threads: ONNX Runtime intra-op thread sayısı (None ise varsayılan)
+            quantize: Dinamik int8 kuantize model kullan
+            cache_dir: Dışa aktarılan ONNX modellerinin saklandığı dizin
+        """
+        self.quantize = quantize
+        self.cache_dir = cache_dir
+        super().__init__(model_name, batch_size, max_length, num_threads)
+
+    @property
+    def cache_namespace(self) -> str:
+        backend = 'onnx-int8' if self.quantize else 'onnx'
+        return f"{backend}|{self.model_name}|max_length={self.max_length}"
+
+    def _worker_config(self) -> dict:
+        config = super()._worker_config()
+        config.update({'quantize': self.quantize, 'cache_dir': self.cache_dir})
+        return config
+
+    def _model_dir(self) -> str:
+        slug = self.model_name.strip('/').replace('/', '__').replace(os.sep, '__')
+        return os.path.join(self.cache_dir, slug)
+
+    def _load_model(self):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("ONNX backend'i için onnxruntime gerekli: pip install onnxruntime onnx onnxscript")
+
+        self.config = AutoConfig.from_pretrained(self.model_name)
+        model_path = self._export_if_needed()
+        options = ort.SessionOptions()
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.input_names = [item.name for item in self.session.get_inputs()]
+
+    def _export_if_needed(self) -> str:
+        """ONNX modelini (ve istenirse int8 sürümünü) yoksa oluşturur, yolunu döndürür"""
+        model_dir = self._model_dir()
+        fp32_path = os.path.join(model_dir, 'model.onnx')
+        int8_path = os.path.join(model_dir, 'model.int8.onnx')
+        os.makedirs(model_dir, exist_ok=True)
+
+        if not os.path.exists(fp32_path):
+            print(f"📦 Embedding modeli ONNX'e aktarılıyor: {fp32_path}")
+            self._export(fp32_path)
+
+        if not self.quantize:
+            return fp32_path
+
+        if not os.path.exists(int8_path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+
+            print(f"📦 Dinamik int8 kuantizasyon: {int8_path}")
+            tmp_path = int8_path + '.tmp'
+            quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, int8_path)
+        return int8_path
+
+    def _export(self, path: str):
+        model = AutoModel.from_pretrained(self.model_name, attn_implementation='eager')
+        model.eval()
+        sample = self.tokenizer(PARITY_PROBES[:2], padding=True, return_tensors='pt')
+        input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+
+        class _LastHiddenState(torch.nn.Module):
+            def __init__(self, inner):
+                super().__init__()
+                self.inner = inner
+
+            def forward(self, input_ids, attention_mask, token_type_ids=None):
+                inputs = {'input_ids': input_ids, 'attention_mask': attention_mask}
+                if token_type_ids is not None:
+                    inputs['token_type_ids'] = token_type_ids
+                return self.inner(**inputs).last_hidden_state
+
+        dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names + ['last_hidden_state']}
+        tmp_path = path + '.tmp'
+        export_kwargs = dict(
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes
+        )
+        try:
+            torch.onnx.export(_LastHiddenState(model), tuple(sample[name] for name in input_names),
+                              tmp_path, dynamo=True, **export_kwargs)
+        except TypeError:
+            # torch<2.5: dynamo parametresi yok, TorchScript tabanlı dışa aktarım
+            torch.onnx.export(_LastHiddenState(model), tuple(sample[name] for name in input_names),
+                              tmp_path, opset_version=17, **export_kwargs)
+        if os.path.exists(tmp_path + '.data'):
+            # Ağırlıkları ayrı dosyaya yazan dışa aktarımı tek dosyada topla
+            import onnx
+
+            onnx.save_model(onnx.load(tmp_path), tmp_path, save_as_external_data=False)
+            os.remove(tmp_path + '.data')
+
+        # Farklı uzunluktaki girdilerle torch çıktısına karşı doğrula
+        import onnxruntime as ort
+
+        probe = self.tokenizer(PARITY_PROBES, padding=True, return_tensors='pt')
+        with torch.no_grad():
+            expected = model(**{name: probe[name] for name in input_names}).last_hidden_state.numpy()
+        session = ort.InferenceSession(tmp_path, providers=['CPUExecutionProvider'])
+        actual = session.run(None, {name: probe[name].numpy().astype(np.int64) for name in input_names})[0]
+        max_diff = float(np.abs(expected - actual).max())
+        if max_diff > 1e-3:
+            os.remove(tmp_path)
+            raise ValueError(f"ONNX çıktısı torch ile uyuşmuyor (max fark: {max_diff:.2e})")
+        os.replace(tmp_path, path)
+        print(f"✓ ONNX dışa aktarımı doğrulandı (torch ile max fark: {max_diff:.2e})")
+
+    def _encode_batch(self, features: List[dict]) -> np.ndarray:
+        encoded = self.tokenizer.pad(features, padding=True, return_tensors='np')
+        inputs = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        hidden = self.session.run(['last_hidden_state'], inputs)[0]
+        # Mean pooling (padding token'ları hariç)
+        mask = inputs['attention_mask'][..., None].astype(hidden.dtype)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+def create_embeddings(backend: str = 'torch', **kwargs) -> CustomTransformerEmbeddings:
+    """
+    Seçilen backend için embedding modelini oluşturur
+
+    Args:
+        backend: "torch" (varsayılan) veya "onnx"
+        **kwargs: Model ayarları (onnx için ayrıca quantize, cache_dir)
+
+    Returns:
+        Embedding modeli
+    """
+    backend = backend.lower()
+    if backend == 'torch':
+        kwargs.pop('quantize', None)
+        kwargs.pop('cache_dir', None)
+        return CustomTransformerEmbeddings(**kwargs)
+    if backend == 'onnx':
+        return OnnxTransformerEmbeddings(**kwargs)
+    raise ValueError(f"Desteklenmeyen embedding backend'i: {backend}. Sadece 'torch' veya 'onnx' destekleniyor.")
+
+
+def compare_embeddings(
+    reference: CustomTransformerEmbeddings,
+    candidate: CustomTransformerEmbeddings,
+    texts: List[str]
+) -> dict:
+    """
+    İki embedding modelinin aynı metinler için ürettiği vektörleri karşılaştırır
+
+    Args:
+        reference: Referans model (ör. torch)
+        candidate: Karşılaştırılan model (ör. ONNX / int8)
+        texts: Örnek metinler
+
+    Returns:
+        max_abs_diff, min_cosine ve mean_cosine içeren dict
+    """
+    ref = reference.embed_documents_array(texts)
+    cand = candidate.embed_documents_array(texts)
+    norms = np.linalg.norm(ref, axis=1) * np.linalg.norm(cand, axis=1)
+    cosine = (ref * cand).sum(axis=1) / np.clip(norms, 1e-12, None)
+    return {
+        'max_abs_diff': float(np.abs(ref - cand).max()),
+        'min_cosine': float(cosine.min()),
+        'mean_cosine': float(cosine.mean())
+    }
@@ -0,0 +1,123 @@
+"""
+Nesil (Generation) Modülü - Vektör veritabanının dosyaları (index.faiss, docstore.sqlite ve
+içindeki satır eşlemesi, ayarlar, manifest, vectors.npy) yayınlandıktan sonra değişmeyen nesil
+dizinlerinde tutulur. Geçerli nesil CURRENT dosyasıyla atomik olarak (os.replace) değiştirilir;
+açık oturumlar açtıkları nesli okumaya devam eder, eski nesiller sonraki yayınlarda silinir.
+"""
+import os
+import shutil
+import contextlib
+from typing import List, Optional
+from src.docstore import DOCSTORE_FILENAME
+from src.index_manifest import MANIFEST_FILENAME
+from src.vector_index import EXACT_VECTORS_FILENAME, INDEX_CONFIG_FILENAME
+
+
+CURRENT_FILENAME = "CURRENT"
+GENERATION_PREFIX = "gen_"
+# Geçerli nesille birlikte korunan önceki nesil sayısı (eski neslin okuyucuları için)
+KEEP_PREVIOUS_GENERATIONS = 1
+# Nesil düzeninden önceki (dosyaların doğrudan persist dizininde olduğu) düzenin dosyaları
+LEGACY_FILES = (
+    'index.faiss', 'index.pkl', DOCSTORE_FILENAME, INDEX_CONFIG_FILENAME, MANIFEST_FILENAME, EXACT_VECTORS_FILENAME
+)
+
+
+def current_generation(persist_directory: str) -> Optional[str]:
+    """Geçerli neslin adı (CURRENT yoksa None: eski düz düzen veya boş dizin)"""
+    try:
+        with open(os.path.join(persist_directory, CURRENT_FILENAME), 'r', encoding='utf-8') as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return name or None
+
+
+def generation_path(persist_directory: str) -> str:
+    """Okunacak dosyaların dizini: geçerli nesil, yoksa persist dizininin kendisi (eski düzen)"""
+    name = current_generation(persist_directory)
+    return os.path.join(persist_directory, name) if name else persist_directory
+
+
+def has_index(persist_directory: str) -> bool:
+    """Dizinde okunabilir bir indeks var mı (nesil ya da eski düzen)"""
+    return os.path.exists(os.path.join(generation_path(persist_directory), 'index.faiss'))
+
+
+def _number(name: str) -> int:
+    suffix = name[len(GENERATION_PREFIX):]
+    return int(suffix) if name.startswith(GENERATION_PREFIX) and suffix.isdigit() else -1
+
+
+def list_generations(persist_directory: str) -> List[str]:
+    """Diskteki nesil dizinleri, eskiden yeniye"""
+    if not os.path.isdir(persist_directory):
+        return []
+    names = [
+        name for name in os.listdir(persist_directory)
+        if _number(name) >= 0 and os.path.isdir(os.path.join(persist_directory, name))
+    ]
+    return sorted(names, key=_number)
+
+
+def next_generation_path(persist_directory: str) -> str:
+    """Henüz var olmayan bir sonraki nesil dizininin yolu (dizin oluşturulmaz)"""
+    names = list_generations(persist_directory)
+    number = _number(names[-1]) + 1 if names else 1
+    return os.path.join(persist_directory, f"{GENERATION_PREFIX}{number:06d}")
+
+
+def new_generation(persist_directory: str) -> str:
+    """Yayınlanmamış, boş bir nesil dizini oluşturur ve yolunu döndürür"""
+    os.makedirs(persist_directory, exist_ok=True)
+    while True:
+        path = next_generation_path(persist_directory)
+        try:
+            os.makedirs(path)
+            return path
+        except FileExistsError:
+            continue
+
+
+def link_or_copy(source: str, target: str):
+    """Değişmeyen dosyayı yeni nesle sabit bağlantıyla (desteklenmiyorsa kopyalayarak) ekler"""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def publish_generation(persist_directory: str, path: str):
+    """
+    Tamamlanmış nesli geçerli yapar: CURRENT geçici dosyaya yazılıp os.replace ile
+    değiştirilir, okuyucular ya eski ya yeni nesli görür. Ardından eski nesiller temizlenir.
+
+    Args:
+        persist_directory: Vektör veritabanı dizini
+        path: persist_directory altındaki, dosyaları yazılmış nesil dizini
+    """
+    current = os.path.join(persist_directory, CURRENT_FILENAME)
+    tmp_path = current + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(os.path.basename(os.path.normpath(path)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, current)
+    prune_generations(persist_directory)
+
+
+def prune_generations(persist_directory: str, keep_previous: int = KEEP_PREVIOUS_GENERATIONS):
+    """
+    Geçerli nesil ve ondan önceki keep_previous nesil dışındaki eski nesilleri ve eski düz
+    düzenin dosyalarını siler. Hâlâ açık olan dosyalar (Windows'ta mmap'li indeks, açık
+    SQLite bağlantısı) silinemezse atlanır; bir sonraki yayında yeniden denenir.
+    """
+    current = current_generation(persist_directory)
+    if current is None:
+        return
+    older = [name for name in list_generations(persist_directory) if _number(name) < _number(current)]
+    for name in older[:max(0, len(older) - keep_previous)]:
+        shutil.rmtree(os.path.join(persist_directory, name), ignore_errors=True)
+    for name in LEGACY_FILES:
+        with contextlib.suppress(OSError):
+            os.remove(os.path.join(persist_directory, name))
@@ -0,0 +1,120 @@
+"""
+İndeks Manifest Modülü - Vektör veritabanına giren kaynak dosyaların kaydı (artımlı güncelleme için)
+"""
+import os
+import json
+import hashlib
+from typing import Dict, List, Optional
+
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+def file_sha256(file_path: str) -> str:
+    """Dosya içeriğinin SHA-256 özetini döndürür"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IndexManifest:
+    """Kaynak dosya -> (boyut, mtime, içerik özeti, docstore id'leri) eşlemesi"""
+
+    def __init__(self, files: Optional[Dict[str, dict]] = None):
+        self.files: Dict[str, dict] = files or {}
+
+    @staticmethod
+    def _key(file_path: str) -> str:
+        return os.path.normpath(file_path)
+
+    @classmethod
+    def load(cls, persist_directory: str) -> Optional["IndexManifest"]:
+        """Manifest'i okur (yoksa None)"""
+        path = os.path.join(persist_directory, MANIFEST_FILENAME)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f).get('files', {}))
+
+    def save(self, persist_directory: str):
+        """Manifest'i atomik olarak yazar"""
+        os.makedirs(persist_directory, exist_ok=True)
+        path = os.path.join(persist_directory, MANIFEST_FILENAME)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'files': self.files}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+
+    def record(self, file_path: str, doc_ids: List[str], sha256: Optional[str] = None):
+        """Bir dosyanın güncel durumunu ve indeksteki id'lerini kaydeder"""
+        stat = os.stat(file_path)
+        self.files[self._key(file_path)] = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'sha256': sha256 or file_sha256(file_path),
+            'doc_ids': doc_ids
+        }
+
+    def forget(self, file_path: str) -> List[str]:
+        """Dosyayı manifest'ten çıkarır, indeksteki id'lerini döndürür"""
+        entry = self.files.pop(self._key(file_path), None)
+        return entry['doc_ids'] if entry else []
+
+    def diff(self, file_paths: List[str]) -> dict:
+        """
+        Diskteki dosyaları manifest ile karşılaştırır. Boyut ve mtime aynıysa
+        dosya okunmaz; farklıysa içerik özeti ile gerçekten değişip değişmediği kontrol edilir.
+
+        Args:
+            file_paths: Dizindeki güncel (desteklenen) dosya yolları
+
+        Returns:
+            added, changed, deleted, unchanged listeleri ve yeni özetler (hashes)
+        """
+        current = {self._key(path): path for path in file_paths}
+        added, changed, unchanged = [], [], []
+        hashes: Dict[str, str] = {}
+        for key, path in current.items():
+            entry = self.files.get(key)
+            if entry is None:
+                added.append(path)
+                continue
+            stat = os.stat(path)
+            if stat.st_size == entry['size'] and stat.st_mtime == entry['mtime']:
+                unchanged.append(path)
+                continue
+            digest = file_sha256(path)
+            hashes[key] = digest
+            if digest == entry['sha256']:
+                # Yalnızca mtime değişmiş (ör. touch/kopyalama)
+                unchanged.append(path)
+                entry['mtime'] = stat.st_mtime
+                entry['size'] = stat.st_size
+            else:
+                changed.append(path)
+        deleted = [key for key in self.files if key not in current]
+        return {
+            'added': added,
+            'changed': changed,
+            'deleted': deleted,
+            'unchanged': unchanged,
+            'hashes': hashes
+        }
+
+    @classmethod
+    def from_sources(cls, ids_by_source: Dict[str, List[str]]) -> "IndexManifest":
+        """Kaynak dosya -> docstore id'leri eşlemesinden manifest üretir"""
+        manifest = cls()
+        for source, ids in ids_by_source.items():
+            if os.path.isfile(source):
+                manifest.record(source, ids)
+        return manifest
+
+    def record_incomplete(self, file_path: str, doc_ids: List[str]):
+        """
+        Yarıda kalan bir dosyanın indekse girmiş id'lerini kaydeder; sonraki
+        güncellemede dosya değişmiş sayılır ve bu id'ler çıkarılıp yeniden işlenir.
+        """
+        self.files[self._key(file_path)] = {'size': -1, 'mtime': 0, 'sha256': '', 'doc_ids': doc_ids}
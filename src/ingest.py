@@ -0,0 +1,56 @@
+"""
+Ingest Modülü - Akış (streaming) indeksleme için yardımcılar: sabit boyutlu gruplama ve aşama bazlı ilerleme
+"""
+import time
+from itertools import islice
+from typing import Iterable, Iterator, List, TypeVar
+
+
+T = TypeVar('T')
+
+DEFAULT_INGEST_BATCH_SIZE = 2048
+
+
+def batched(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Bir iterable'ı en fazla size elemanlı listeler halinde tüketir (tamamını belleğe almadan)"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class IngestProgress:
+    """Dosya -> kayıt -> chunk -> embedding -> indeks aşamalarının sayaçları"""
+
+    def __init__(self, files_total: int = 0):
+        self.files_total = files_total
+        self.files_done = 0
+        self.files_failed = 0
+        self.records = 0
+        self.chunks = 0
+        self.embedded = 0
+        self.indexed = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def report(self):
+        """Tek satırlık ilerleme özeti yazdırır"""
+        rate = self.indexed / self.elapsed if self.elapsed > 0 else 0.0
+        print(f"📦 Dosya {self.files_done}/{self.files_total} | kayıt {self.records} | chunk {self.chunks} | "
+              f"gömülen {self.embedded} | indekslenen {self.indexed} | {rate:.0f} chunk/sn")
+
+    def summary(self) -> dict:
+        return {
+            'files': self.files_done,
+            'files_failed': self.files_failed,
+            'records': self.records,
+            'chunks': self.chunks,
+            'embedded': self.embedded,
+            'indexed': self.indexed,
+            'seconds': round(self.elapsed, 2)
+        }
@@ -0,0 +1,132 @@
+"""
+LLM Clients Modülü - Süreç genelinde paylaşılan Ollama bağlantı havuzları: aynı sunucuya
+bağlanan her RAGPipeline (Streamlit oturumları, model değişimi, yeniden yükleme) senkron
+istekleri aynı keep-alive HTTP bağlantı havuzundan (httpx transport) gönderir; model
+açılışta arka planda belleğe yüklenir. Asenkron istemci paylaşılmaz: httpx'in asenkron
+bağlantıları açıldıkları olay döngüsüne bağlıdır, her ChatOllama kendi istemcisini kurar.
+"""
+import time
+import threading
+from typing import Dict, Optional, Tuple, Union
+import httpx
+from langchain_ollama import ChatOllama
+
+
+_transports: Dict[str, httpx.HTTPTransport] = {}
+_warming: set = set()
+_lock = threading.Lock()
+
+
+def _limits(max_connections: int) -> httpx.Limits:
+    # httpx varsayılanı boşta kalan bağlantıyı 5 sn sonra kapatır; sohbet aralıkları daha uzun
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=60
+    )
+
+
+def get_transport(base_url: str, max_connections: int = 32) -> Tuple[httpx.HTTPTransport, bool]:
+    """
+    Sunucunun paylaşılan senkron bağlantı havuzunu döndürür, yoksa oluşturur
+    (max_connections ilk çağrıdan alınır)
+
+    Returns:
+        (transport, havuzdan mı geldi)
+    """
+    with _lock:
+        if base_url in _transports:
+            return _transports[base_url], True
+        transport = httpx.HTTPTransport(limits=_limits(max_connections))
+        _transports[base_url] = transport
+        return transport, False
+
+
+def get_ollama_chat(
+    base_url: str,
+    model: str,
+    temperature: float,
+    num_predict: int,
+    timeout: float,
+    keep_alive: Optional[Union[str, int]] = None,
+    max_connections: int = 32
+) -> Tuple[ChatOllama, bool]:
+    """
+    Sunucunun paylaşılan senkron bağlantı havuzunu kullanan yeni bir ChatOllama oluşturur
+
+    Args:
+        base_url: Ollama sunucu adresi
+        model: Model adı
+        temperature: Örnekleme sıcaklığı
+        num_predict: En fazla üretilecek token
+        timeout: HTTP zaman aşımı (saniye)
+        keep_alive: Modelin son istekten sonra bellekte kalma süresi (ör. "30m", -1 = sürekli)
+        max_connections: Havuzdaki en fazla bağlantı
+
+    Returns:
+        (istemci, bağlantı havuzu önceden var mıydı)
+    """
+    transport, pooled = get_transport(base_url, max_connections)
+    llm = ChatOllama(
+        model=model,
+        temperature=temperature,
+        base_url=base_url,
+        num_predict=num_predict,
+        keep_alive=keep_alive,
+        client_kwargs={'timeout': timeout},
+        sync_client_kwargs={'transport': transport},
+        async_client_kwargs={'limits': _limits(max_connections)}
+    )
+    return llm, pooled
+
+
+def warm_up_ollama(
+    base_url: str,
+    model: str,
+    keep_alive: Optional[Union[str, int]] = None,
+    timeout: float = 120.0,
+    background: bool = True
+) -> Optional[threading.Thread]:
+    """
+    Modeli Ollama'da belleğe yükletir (prompt'suz /api/generate, keep_alive ile) ve paylaşılan
+    havuzdaki HTTP bağlantısını açar. Model zaten yüklüyse istek hemen döner ve yalnızca
+    keep_alive süresini yeniler. Aynı sunucu ve model için eşzamanlı ikinci ısınma atlanır.
+
+    Args:
+        base_url: Ollama sunucu adresi
+        model: Model adı
+        keep_alive: Modelin bellekte kalma süresi (None = sunucu varsayılanı)
+        timeout: Yükleme için beklenecek en uzun süre (saniye)
+        background: True ise ısınma bir iş parçacığında yürütülür
+
+    Returns:
+        background=True ise ısınmayı yürüten iş parçacığı (atlandıysa None)
+    """
+    key = (base_url, model)
+    with _lock:
+        if key in _warming:
+            return None
+        _warming.add(key)
+
+    def run():
+        start = time.perf_counter()
+        payload = {'model': model} if keep_alive is None else {'model': model, 'keep_alive': keep_alive}
+        try:
+            transport, _ = get_transport(base_url)
+            # Sorgularla aynı havuz: açılan bağlantı sonraki istekte yeniden kullanılır. İstemci
+            # kapatılmaz; close() paylaşılan transport'u da kapatırdı
+            client = httpx.Client(base_url=base_url, transport=transport, timeout=timeout)
+            client.post('/api/generate', json=payload).raise_for_status()
+            print(f"🔥 Ollama modeli ısındı: {model} ({time.perf_counter() - start:.1f} sn)")
+        except Exception as e:
+            print(f"⚠️ Ollama ısınma isteği başarısız: {str(e)}")
+        finally:
+            with _lock:
+                _warming.discard(key)
+
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name='ollama-warmup', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,391 @@
+"""
+LLM Router Modülü - Yapılandırılmış LLM sağlayıcıları (Ollama, Gemini modelleri) arasında
+çalışma zamanında yönlendirme: kayan pencere gecikme/hata istatistikleri, hatalı backend'lerde
+devre kesici (circuit breaker), sağlık yoklaması ve istek başına zaman aşımı
+"""
+import json
+import time
+import asyncio
+import threading
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Iterator, List, Optional
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def http_probe(url: str, timeout: float = 2.0, headers: Optional[dict] = None) -> Callable[[], bool]:
+    """URL'ye GET atan yoklama: 2xx -> sağlıklı, hata/zaman aşımı/diğer kodlar -> sağlıksız"""
+    def probe() -> bool:
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {}), timeout=timeout) as response:
+                return 200 <= response.status < 300
+        except Exception:
+            return False
+    return probe
+
+
+def ollama_probe(base_url: str, model: str, timeout: float = 2.0) -> Callable[[], bool]:
+    """Ollama sunucusu ayakta ve model yüklü mü (/api/tags)"""
+    url = base_url.rstrip('/') + '/api/tags'
+
+    def probe() -> bool:
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                names = {item.get('name') for item in json.load(response).get('models', [])}
+        except Exception:
+            return False
+        # "phi3:mini" ya da etiketsiz "phi3" -> "phi3:latest"
+        return not names or model in names or f"{model}:latest" in names
+    return probe
+
+
+class LLMBackend:
+    """
+    Router'daki tek bir LLM: kayan penceredeki gecikme ve başarı kayıtları ile devre durumu.
+    Durum değişiklikleri LLMRouter'ın kilidi altında yapılır. Aynı model değerine sahip
+    backend'ler aynı modelin eşdeğer kopyalarıdır (ör. farklı sunuculardaki aynı Ollama modeli).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        llm: BaseChatModel,
+        probe: Optional[Callable[[], bool]] = None,
+        window: int = 20,
+        model: Optional[str] = None
+    ):
+        self.name = name
+        self.llm = llm
+        self.probe = probe
+        self.model = model or name
+        self.calls: deque = deque(maxlen=window)  # (saniye, başarılı mı)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.last_error: Optional[str] = None
+
+    def latency(self) -> Optional[float]:
+        """Penceredeki başarılı çağrıların medyan süresi (hiç yoksa None)"""
+        durations = sorted(seconds for seconds, ok in self.calls if ok)
+        return durations[len(durations) // 2] if durations else None
+
+    def error_rate(self) -> float:
+        return sum(1 for _, ok in self.calls if not ok) / len(self.calls) if self.calls else 0.0
+
+    def stats(self) -> dict:
+        durations = sorted(seconds for seconds, ok in self.calls if ok)
+        latency = self.latency()
+        return {
+            'name': self.name,
+            'state': self.state,
+            'calls': len(self.calls),
+            'error_rate': round(self.error_rate(), 3),
+            'latency_p50_ms': round(latency * 1000, 1) if latency is not None else None,
+            'latency_p95_ms': round(durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1000, 1)
+            if durations else None,
+            'last_error': self.last_error
+        }
+
+
+class RouterError(Exception):
+    """Hiçbir backend isteği karşılayamadı"""
+
+
+class LLMRouter(BaseChatModel):
+    """
+    LangChain sohbet modeli arayüzünde yönlendirici. Backend'ler yapılandırma sırasıyla denenir
+    (seçili sağlayıcı ve aday modelleri önce, yedekler sonra); sıradaki backend'e yalnızca hata
+    ya da zaman aşımında geçilir. Farklı modeller birbirinin yerine geçmez: gecikmeye göre
+    seçim yalnızca aynı modelin kopyaları arasında yapılır (medyan gecikmesi en düşük olan,
+    henüz ölçülmemiş kopyalar önce).
+
+    Üst üste failure_threshold hata ya da penceredeki hata oranı max_error_rate'i aşınca
+    devre açılır ve backend cooldown_seconds boyunca atlanır. Süre dolunca backend'in
+    yoklaması (varsa) çalıştırılır; başarılıysa tek bir deneme isteğine izin verilir
+    (half-open), deneme başarılıysa devre kapanır.
+    """
+
+    backends: List[Any]
+    """LLMBackend listesi, tercih sırasıyla"""
+    model: str = ''
+    request_timeout: float = 60.0
+    failure_threshold: int = 3
+    max_error_rate: float = 0.5
+    min_calls: int = 5
+    cooldown_seconds: float = 30.0
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _executor: Any = PrivateAttr(default=None)
+
+    def __init__(self, **data: Any):
+        super().__init__(**data)
+        if not self.model:
+            self.model = ','.join(backend.name for backend in self.backends)
+        # Senkron çağrılar zaman aşımı uygulanabilsin diye iş parçacığında yürütülür; takılan
+        # çağrılar iş parçacığını zaman aşımından sonra da tuttuğu için havuz geniş tutulur
+        self._executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix='llm-router')
+
+    @property
+    def _llm_type(self) -> str:
+        return "llm-router"
+
+    # ---- yönlendirme ve devre kesici ----
+
+    def _available(self, backend: LLMBackend, now: float) -> bool:
+        if backend.state == CLOSED:
+            return True
+        if backend.state == HALF_OPEN:
+            return not backend.trial_in_flight
+        return now - backend.opened_at >= self.cooldown_seconds
+
+    def _candidates(self) -> List[LLMBackend]:
+        """Denenecek backend'ler: modeller yapılandırma sırasıyla, aynı modelin kopyaları en hızlıdan yavaşa"""
+        now = time.monotonic()
+        with self._lock:
+            available = [backend for backend in self.backends if self._available(backend, now)]
+        order = {}
+        for backend in self.backends:
+            order.setdefault(backend.model, len(order))
+        return sorted(available, key=lambda backend: (order[backend.model], self._rank(backend)))
+
+    @staticmethod
+    def _rank(backend: LLMBackend) -> float:
+        # Kopyalar arasında: hiç denenmemiş olan önce ölçülür, yalnızca hata kaydı olan sona kalır
+        if not backend.calls:
+            return 0.0
+        latency = backend.latency()
+        return latency if latency is not None else float('inf')
+
+    def _acquire(self, backend: LLMBackend) -> Optional[bool]:
+        """
+        Backend'e istek gönderilebilir mi; bekleme süresi dolan açık devre için yoklama yapılır.
+
+        Returns:
+            None: gönderilemez, False: devre kapalı, True: yarı açık devrenin deneme hakkı bu
+            isteğe ait (sonuç _record ile, iptal _release ile bildirilmeli)
+        """
+        with self._lock:
+            if backend.state == CLOSED:
+                return False
+            if backend.state == HALF_OPEN and backend.trial_in_flight:
+                return None
+            if backend.state == OPEN and time.monotonic() - backend.opened_at < self.cooldown_seconds:
+                return None
+            # Deneme hakkı bu isteğe ait: diğer istekler devreyi açık görmeye devam eder
+            backend.state = HALF_OPEN
+            backend.trial_in_flight = True
+        if backend.probe is not None and not backend.probe():
+            with self._lock:
+                self._open(backend, "sağlık yoklaması başarısız")
+            return None
+        return True
+
+    async def _aacquire(self, backend: LLMBackend) -> Optional[bool]:
+        """_acquire'ın asenkron hâli: yoklama ağ çağrısı yapabilir, olay döngüsünü bloklamasın"""
+        future = self._executor.submit(self._acquire, backend)
+        try:
+            return await asyncio.wrap_future(future)
+        except BaseException:
+            # İstek yoklama sürerken iptal edildi: alınan deneme hakkı yoklama bitince bırakılır
+            future.add_done_callback(
+                lambda done: self._release(backend, not done.cancelled() and done.exception() is None and done.result())
+            )
+            raise
+
+    def _release(self, backend: LLMBackend, trial: Optional[bool]):
+        """
+        İptal edilen (CancelledError, KeyboardInterrupt) isteğin deneme hakkını bırakır: iptal
+        backend'in hatası sayılmaz, devre yarı açık kalır ve sıradaki istek denemeyi yapar
+        """
+        if not trial:
+            return
+        with self._lock:
+            if backend.state == HALF_OPEN:
+                backend.trial_in_flight = False
+
+    def _open(self, backend: LLMBackend, error: str):
+        backend.state = OPEN
+        backend.opened_at = time.monotonic()
+        backend.trial_in_flight = False
+        backend.last_error = error
+        print(f"⚠️ LLM devresi açıldı: {backend.name} ({error})")
+
+    def _record(self, backend: LLMBackend, seconds: float, error: Optional[BaseException] = None):
+        with self._lock:
+            if error is None and backend.state != CLOSED:
+                # Deneme başarılı: devre açılmadan önceki hatalar pencereden silinir
+                backend.calls.clear()
+                print(f"✓ LLM devresi kapandı: {backend.name}")
+            backend.calls.append((seconds, error is None))
+            if error is None:
+                backend.state = CLOSED
+                backend.trial_in_flight = False
+                backend.consecutive_failures = 0
+                return
+            backend.consecutive_failures += 1
+            message = str(error) or type(error).__name__
+            backend.last_error = message
+            # Devre açılmadan önce gönderilmiş isteklerin hataları bekleme süresini uzatmaz
+            if backend.state == OPEN:
+                return
+            if (
+                backend.state == HALF_OPEN
+                or backend.consecutive_failures >= self.failure_threshold
+                or (len(backend.calls) >= self.min_calls and backend.error_rate() >= self.max_error_rate)
+            ):
+                self._open(backend, message)
+
+    def _no_backend_error(self, errors: List[str]) -> RouterError:
+        if not errors:
+            return RouterError("Kullanılabilir LLM yok: tüm devreler açık")
+        return RouterError("Hiçbir LLM cevap veremedi: " + "; ".join(errors))
+
+    # ---- LangChain arayüzü ----
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        errors = []
+        for backend in self._candidates():
+            trial = self._acquire(backend)
+            if trial is None:
+                continue
+            start = time.monotonic()
+            try:
+                future = self._executor.submit(backend.llm.invoke, messages, stop=stop, **kwargs)
+                message = future.result(timeout=self.request_timeout)
+            except FutureTimeoutError:
+                # Takılan çağrı arka planda biter; sonucu kullanılmaz
+                error = TimeoutError(f"{self.request_timeout:g} sn zaman aşımı")
+                self._record(backend, time.monotonic() - start, error)
+                errors.append(f"{backend.name}: {error}")
+                continue
+            except Exception as e:
+                self._record(backend, time.monotonic() - start, e)
+                errors.append(f"{backend.name}: {str(e)}")
+                continue
+            except BaseException:
+                self._release(backend, trial)
+                raise
+            self._record(backend, time.monotonic() - start)
+            message.response_metadata = {**message.response_metadata, 'llm_backend': backend.name}
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        raise self._no_backend_error(errors)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        errors = []
+        for backend in self._candidates():
+            trial = await self._aacquire(backend)
+            if trial is None:
+                continue
+            start = time.monotonic()
+            try:
+                message = await asyncio.wait_for(
+                    backend.llm.ainvoke(messages, stop=stop, **kwargs), timeout=self.request_timeout
+                )
+            except asyncio.TimeoutError:
+                error = TimeoutError(f"{self.request_timeout:g} sn zaman aşımı")
+                self._record(backend, time.monotonic() - start, error)
+                errors.append(f"{backend.name}: {error}")
+                continue
+            except Exception as e:
+                self._record(backend, time.monotonic() - start, e)
+                errors.append(f"{backend.name}: {str(e)}")
+                continue
+            except BaseException:
+                # asyncio.CancelledError: çağıran vazgeçti, backend'in hatası değil
+                self._release(backend, trial)
+                raise
+            self._record(backend, time.monotonic() - start)
+            message.response_metadata = {**message.response_metadata, 'llm_backend': backend.name}
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        raise self._no_backend_error(errors)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        """
+        İlk parça gelene kadar hata/zaman aşımında sıradaki backend'e geçilir; ilk parçadan
+        sonraki hatalar kayıt edilip çağırana iletilir (yarım cevap tekrarlanmaz)
+        """
+        errors = []
+        for backend in self._candidates():
+            trial = self._acquire(backend)
+            if trial is None:
+                continue
+            start = time.monotonic()
+            try:
+                chunks = backend.llm.stream(messages, stop=stop, **kwargs)
+                first = self._executor.submit(next, chunks, None).result(timeout=self.request_timeout)
+            except FutureTimeoutError:
+                error = TimeoutError(f"{self.request_timeout:g} sn içinde ilk token gelmedi")
+                self._record(backend, time.monotonic() - start, error)
+                errors.append(f"{backend.name}: {error}")
+                continue
+            except Exception as e:
+                self._record(backend, time.monotonic() - start, e)
+                errors.append(f"{backend.name}: {str(e)}")
+                continue
+            except BaseException:
+                self._release(backend, trial)
+                raise
+            try:
+                for chunk in ([first] if first is not None else []):
+                    yield self._chunk(chunk, backend, run_manager)
+                for chunk in chunks:
+                    yield self._chunk(chunk, backend, run_manager)
+            except GeneratorExit:
+                # Okuyan taraf akışı erken bıraktı: backend'in hatası değil
+                self._record(backend, time.monotonic() - start)
+                raise
+            except Exception as e:
+                self._record(backend, time.monotonic() - start, e)
+                raise
+            except BaseException:
+                self._release(backend, trial)
+                raise
+            self._record(backend, time.monotonic() - start)
+            return
+        raise self._no_backend_error(errors)
+
+    @staticmethod
+    def _chunk(chunk, backend: LLMBackend, run_manager: Optional[CallbackManagerForLLMRun]) -> ChatGenerationChunk:
+        chunk.response_metadata = {**chunk.response_metadata, 'llm_backend': backend.name}
+        generation = ChatGenerationChunk(message=chunk)
+        if run_manager:
+            run_manager.on_llm_new_token(chunk.content, chunk=generation)
+        return generation
+
+    # ---- izleme ----
+
+    def get_stats(self) -> List[dict]:
+        """Backend başına devre durumu, çağrı sayısı, hata oranı ve gecikme (p50/p95)"""
+        with self._lock:
+            return [backend.stats() for backend in self.backends]
@@ -7,13 +7,49 @@ import os
 os.environ['USE_TF'] = 'NO'
 os.environ['USE_TORCH'] = 'YES'
 
-from typing import List, Optional
+import copy
+import glob
+import uuid
+import asyncio
+import shutil
+import time
+import hashlib
+import contextlib
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+import faiss
+import numpy as np
 from dotenv import load_dotenv
 from langchain.schema import Document
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain.chains import RetrievalQA
-from langchain_ollama import ChatOllama
+from langchain_core.prompts import format_document
 from langchain_google_genai import ChatGoogleGenerativeAI
+from src.data_processor import DataProcessor
+from src.index_manifest import MANIFEST_FILENAME, IndexManifest
+from src.docstore import DOCSTORE_FILENAME, SQLiteStore, SQLiteDocstore, SQLiteRowMapping, write_store
+from src.checkpoint import BuildCheckpoint
+from src.generations import (
+    CURRENT_FILENAME, GENERATION_PREFIX, generation_path, has_index, link_or_copy, new_generation, publish_generation
+)
+from src.ingest import DEFAULT_INGEST_BATCH_SIZE, IngestProgress, batched
+from src.retriever import MMRRetriever
+from src.answer_cache import SemanticAnswerCache
+from src.context_builder import ContextAssembler
+from src.llm_router import LLMBackend, LLMRouter, http_probe, ollama_probe
+from src.llm_clients import get_ollama_chat, warm_up_ollama
+from src.stub_llm import StubChatModel
+from src.tracing import activate, get_tracer, stage
+from src.sharded_store import (
+    SHARDS_FILENAME, SHARD_STRATEGIES, LazyShard, ShardedVectorStore, ShardDataProcessor,
+    shard_name, shard_of_document, merge_summaries, save_shard_config, load_shard_config
+)
+from src.vector_index import (
+    DEFAULT_INDEX_SPEC, EXACT_VECTORS_FILENAME, INDEX_CONFIG_FILENAME, ExactVectors, ExactVectorsWriter, build_index,
+    prepare_index, set_search_params, supports_removal, is_quantized, infer_spec, describe_index,
+    training_size, save_index_config, load_index_config
+)
 
 
 class RAGPipeline:
@@ -23,76 +59,145 @@ class RAGPipeline:
         self, 
         persist_directory: str = "faiss_db",
         model_provider: str = "ollama",
-        api_key: Optional[str] = None
+        api_key: Optional[str] = None,
+        embedding_batch_size: Optional[int] = None,
+        embedding_cache_dir: Optional[str] = None,
+        embedding_backend: Optional[str] = None,
+        index_spec: Optional[str] = None,
+        shards: Optional[int] = None,
+        fallback_providers: Optional[List[str]] = None
     ):
         """
         RAG Pipeline'ı başlatır
         
         Args:
             persist_directory: FAISS veritabanı dizini
-            model_provider: LLM sağlayıcısı ("ollama" veya "gemini")
+            model_provider: LLM sağlayıcısı ("ollama", "gemini", yük testi için "stub" veya "none")
             api_key: API anahtarı (Gemini için gerekli, .env'den okunabilir)
+            embedding_batch_size: Embedding forward pass başına metin sayısı (.env: EMBEDDING_BATCH_SIZE)
+            embedding_cache_dir: Diskteki embedding önbelleği dizini (.env: EMBEDDING_CACHE_DIR, "none" ile kapatılır)
+            embedding_backend: Embedding çıkarım backend'i, "torch" veya "onnx" (.env: EMBEDDING_BACKEND)
+            index_spec: FAISS index_factory tanımı, ör. "Flat", "IVF256,Flat", "HNSW32" (.env: FAISS_INDEX_SPEC)
+            shards: İndeks shard sayısı, 1 = tek indeks (.env: FAISS_SHARDS; bölme yöntemi FAISS_SHARD_BY)
+            fallback_providers: model_provider'a ek olarak yönlendiriciye eklenecek sağlayıcılar (.env: LLM_FALLBACK_PROVIDERS)
         """
         # .env dosyasını yükle
         load_dotenv()
         
         self.persist_directory = persist_directory
         self.model_provider = model_provider.lower()
+        if fallback_providers is None:
+            fallback_providers = os.getenv('LLM_FALLBACK_PROVIDERS', '').split(',')
+        self.fallback_providers = [
+            provider.strip().lower() for provider in fallback_providers
+            if provider.strip() and provider.strip().lower() != self.model_provider
+        ]
         # Accept both GEMINI_API_KEY and GOOGLE_API_KEY for compatibility
         self.api_key = (
             api_key
             or os.getenv('GEMINI_API_KEY')
             or os.getenv('GOOGLE_API_KEY')
         )
+        self.embedding_model = os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
+        self.embedding_batch_size = embedding_batch_size or int(os.getenv('EMBEDDING_BATCH_SIZE', '32'))
+        self.embedding_cache_dir = embedding_cache_dir or os.getenv('EMBEDDING_CACHE_DIR', 'embedding_cache')
+        self.embedding_backend = (embedding_backend or os.getenv('EMBEDDING_BACKEND', 'torch')).lower()
+        self.index_spec = index_spec or os.getenv('FAISS_INDEX_SPEC', DEFAULT_INDEX_SPEC)
+        # Sorgu zamanı ayarları (yeniden indeksleme gerektirmez)
+        self.search_params = {
+            'nprobe': int(os.getenv('FAISS_NPROBE')) if os.getenv('FAISS_NPROBE') else None,
+            'ef_search': int(os.getenv('FAISS_EF_SEARCH')) if os.getenv('FAISS_EF_SEARCH') else None
+        }
+        # Shard'lar kaynak dosyaya ('source') ya da chunk metnine ('hash') göre ayrılır
+        self.shard_count = shards or int(os.getenv('FAISS_SHARDS', '1'))
+        self.shard_by = os.getenv('FAISS_SHARD_BY', 'source').lower()
+        if self.shard_by not in SHARD_STRATEGIES:
+            raise ValueError(f"Geçersiz FAISS_SHARD_BY: {self.shard_by} ({' / '.join(SHARD_STRATEGIES)})")
+        # Akış indekslemede tek seferde gömülüp indekse eklenen chunk sayısı
+        self.ingest_batch_size = int(os.getenv('INGEST_BATCH_SIZE', str(DEFAULT_INGEST_BATCH_SIZE)))
+        # query_batch'te aynı anda yürüyen en fazla LLM çağrısı
+        self.llm_max_concurrency = int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+        # LLM bağlamı: tüm prompt için token bütçesi (0 = sınırsız), chunk örtüşmesi temizliği ve
+        # belge başına en ilgili cümle sayısı (0 = tüm metin)
+        self.context_max_tokens = int(os.getenv('CONTEXT_MAX_TOKENS', '0'))
+        self.context_dedupe = os.getenv('CONTEXT_DEDUPE', '1').lower() in ('1', 'true', 'yes')
+        self.context_sentences = int(os.getenv('CONTEXT_SENTENCES', '0'))
+        self.context_assembler = None
+        # Anlamsal cevap önbelleği: eşiği geçen benzer sorular LLM'e gitmez (0 = kapalı)
+        self.answer_cache = None
+        answer_cache_size = int(os.getenv('ANSWER_CACHE_SIZE', '256'))
+        if answer_cache_size > 0:
+            self.answer_cache = SemanticAnswerCache(
+                threshold=float(os.getenv('ANSWER_CACHE_THRESHOLD', '0.95')),
+                max_entries=answer_cache_size,
+                ttl_seconds=float(os.getenv('ANSWER_CACHE_TTL', '0')),
+                path=os.getenv('ANSWER_CACHE_PATH') or None
+            )
+        # Kuantize indekslerde k * rerank_factor aday float32 kopyayla kesin sıralanır (0 = kapalı)
+        self.rerank_factor = int(os.getenv('FAISS_RERANK_FACTOR', '4'))
+        self.exact_vectors = None
+        # Kaydedilmiş indeks bellek eşlemeli (mmap) açılır: açılış süresi indeks boyutundan bağımsız
+        self.mmap_index = os.getenv('FAISS_MMAP', '1').lower() in ('1', 'true', 'yes')
+        self._index_mmapped = False
+        self._store = None
+        # Oturumun okuduğu nesil dizini; sonradan yayınlanan nesiller açık oturumu etkilemez
+        self.generation_directory = None
+        # Açılan indeksin sürümü (cevap önbelleği kapsamı); yükleme ve kayıt sonrasında bir kez hesaplanır
+        self._index_version = None
+        # Shard kopyalarında belge düşmeyen shard boş bir indeksle kurulur
+        self._allow_empty_index = False
         self.embeddings = None
         self.vectorstore = None
         self.llm = None
+        self.retriever = None
         self.qa_chain = None
+        # Aşama süreleri (süreç genelinde özetlenir, .env: TRACE_LOG ile JSON satırı olarak yazılır)
+        self.tracer = get_tracer()
+        
+        # LLM'i başlat (önce: Ollama ısınması embedding modeli yüklenirken arka planda sürer)
+        self._initialize_llm()
         
         # Embedding modelini başlat
         self._initialize_embeddings()
-        
-        # LLM'i başlat
-        self._initialize_llm()
     
     def _initialize_embeddings(self):
         """Embedding modelini başlatır - Custom Transformers Embeddings (sentence-transformers olmadan)"""
         try:
             # Direkt transformers kullan, sentence-transformers'a gerek yok
-            from transformers import AutoTokenizer, AutoModel
-            import torch
-            from langchain.embeddings.base import Embeddings
-            from typing import List
-            
-            print("📥 Embedding modeli yükleniyor (lokal, transformers kullanarak)...")
-            
-            # Custom embedding class
-            class CustomTransformerEmbeddings(Embeddings):
-                def __init__(self):
-                    self.tokenizer = AutoTokenizer.from_pretrained('sentence-transformers/all-MiniLM-L6-v2')
-                    self.model = AutoModel.from_pretrained('sentence-transformers/all-MiniLM-L6-v2')
-                    self.model.eval()
-                
-                def embed_documents(self, texts: List[str]) -> List[List[float]]:
-                    embeddings = []
-                    for text in texts:
-                        encoded = self.tokenizer(text, padding=True, truncation=True, return_tensors='pt', max_length=512)
-                        with torch.no_grad():
-                            output = self.model(**encoded)
-                        # Mean pooling
-                        embedding = output.last_hidden_state.mean(dim=1).squeeze().tolist()
-                        embeddings.append(embedding)
-                    return embeddings
-                
-                def embed_query(self, text: str) -> List[float]:
-                    encoded = self.tokenizer(text, padding=True, truncation=True, return_tensors='pt', max_length=512)
-                    with torch.no_grad():
-                        output = self.model(**encoded)
-                    embedding = output.last_hidden_state.mean(dim=1).squeeze().tolist()
-                    return embedding
+            from src.embeddings import create_embeddings
+            
+            print(f"📥 Embedding modeli yükleniyor (lokal, backend: {self.embedding_backend})...")
+            
+            self.embeddings = create_embeddings(
+                self.embedding_backend,
+                model_name=self.embedding_model,
+                batch_size=self.embedding_batch_size,
+                quantize=os.getenv('EMBEDDING_QUANTIZE', '0').lower() in ('1', 'true', 'yes'),
+                cache_dir=os.getenv('ONNX_CACHE_DIR', 'onnx_models')
+            )
+            print(f"✅ Embedding modeli başlatıldı ({self.embeddings.cache_namespace.split('|')[0]} - LOKAL, batch={self.embedding_batch_size})")
             
-            self.embeddings = CustomTransformerEmbeddings()
-            print("✅ Embedding modeli başlatıldı (Custom Transformers - LOKAL)")
+            # Kalıcı embedding önbelleği: yeniden indekslemede yalnızca yeni/değişen chunk'lar gömülür
+            from src.embedding_cache import EmbeddingCache, QueryEmbeddingCache, CachedEmbeddings
+            
+            cache = None
+            if self.embedding_cache_dir and self.embedding_cache_dir.lower() != 'none':
+                max_mb = int(os.getenv('EMBEDDING_CACHE_MAX_MB', '512'))
+                cache = EmbeddingCache(self.embedding_cache_dir, max_bytes=max_mb * 1024 * 1024)
+                print(f"✓ Embedding önbelleği aktif: {self.embedding_cache_dir} (en fazla {max_mb} MB)")
+            
+            # Sorgu vektörü önbelleği: tekrar eden sorular modele hiç gitmez
+            query_cache = None
+            query_cache_size = int(os.getenv('QUERY_CACHE_SIZE', '1024'))
+            if query_cache_size > 0:
+                query_cache = QueryEmbeddingCache(
+                    max_entries=query_cache_size,
+                    ttl_seconds=float(os.getenv('QUERY_CACHE_TTL', '0')),
+                    lowercase=bool(getattr(getattr(self.embeddings, 'tokenizer', None), 'do_lower_case', False))
+                )
+            
+            if cache is not None or query_cache is not None:
+                self.embeddings = CachedEmbeddings(self.embeddings, cache=cache, query_cache=query_cache)
             
         except Exception as e:
             print(f"❌ Embedding hatası: {str(e)}")
@@ -101,108 +206,932 @@ class RAGPipeline:
             raise Exception(f"Lokal embedding modeli başlatılamadı: {str(e)}")
     
     def _initialize_llm(self):
-        """LLM modelini başlatır"""
+        """
+        LLM'i başlatır. Seçili sağlayıcı ve LLM_FALLBACK_PROVIDERS'taki yedekler tek bir
+        LLMRouter arkasında toplanır: istekler bu sırayla denenir, yedeklere yalnızca hata ya da
+        zaman aşımında geçilir; hata veren backend'in devresi açılır.
+        """
         try:
             if self.model_provider == "none":
                 # LLM kullanılmayacak (sadece indeksleme için)
                 self.llm = None
                 print("✓ LLM devre dışı (yalnızca FAISS işlemleri)")
-            elif self.model_provider == "ollama":
-                # Ollama - Tamamen lokal, API key gerektirmez
-                ollama_base_url = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
-                ollama_model = os.getenv('OLLAMA_MODEL', 'phi3:mini')
-                temperature = float(os.getenv('OLLAMA_TEMPERATURE', '0.5'))
-                num_predict = int(os.getenv('OLLAMA_NUM_PREDICT', '512'))
-                self.llm = ChatOllama(
-                    model=ollama_model,
-                    temperature=temperature,
-                    base_url=ollama_base_url,
-                    num_predict=num_predict
-                )
-                print(f"✓ Ollama modeli başlatıldı: {ollama_model} ({ollama_base_url})")
+                return
             
-            elif self.model_provider == "gemini":
-                if not self.api_key:
-                    raise ValueError("Gemini API anahtarı bulunamadı. .env dosyasına GEMINI_API_KEY veya GOOGLE_API_KEY ekleyin.")
-
-                user_model = os.getenv('GEMINI_MODEL')
-                temperature = float(os.getenv('GEMINI_TEMPERATURE', '0.7'))
-
-                # Sağlam model fallback sırası (v1beta uyumlu bilinen alias'lar)
-                candidate_models = [
-                    user_model if user_model else 'gemini-flash-latest',
-                    'gemini-pro-latest',
-                    'gemini-1.5-pro',
-                    'gemini-1.5-flash'
-                ]
-
-                last_error = None
-                for candidate in candidate_models:
-                    if not candidate:
-                        continue
-                    try:
-                        self.llm = ChatGoogleGenerativeAI(
-                            model=candidate,
-                            google_api_key=self.api_key,
-                            temperature=temperature,
-                            convert_system_message_to_human=True
-                        )
-                        print(f"✓ Google Gemini modeli başlatıldı: {candidate} 🚀")
-                        last_error = None
-                        break
-                    except Exception as e:
-                        last_error = e
-                        continue
-
-                if last_error is not None:
-                    raise last_error
+            if self.model_provider not in ("ollama", "gemini", "stub"):
+                raise ValueError(f"Desteklenmeyen model: {self.model_provider}. Sadece 'ollama', 'gemini', 'stub' veya 'none' destekleniyor.")
             
-            else:
-                raise ValueError(f"Desteklenmeyen model: {self.model_provider}. Sadece 'ollama', 'gemini' veya 'none' destekleniyor.")
+            backends = []
+            errors = []
+            for provider in [self.model_provider] + self.fallback_providers:
+                try:
+                    backends.extend(self._create_llm_backends(provider))
+                except Exception as e:
+                    errors.append(e)
+                    print(f"⚠️ LLM sağlayıcısı atlandı ({provider}): {str(e)}")
+            if not backends:
+                raise errors[0]
+            
+            self.llm = LLMRouter(
+                backends=backends,
+                request_timeout=float(os.getenv('LLM_REQUEST_TIMEOUT', '60')),
+                failure_threshold=int(os.getenv('LLM_CIRCUIT_FAILURES', '3')),
+                cooldown_seconds=float(os.getenv('LLM_CIRCUIT_COOLDOWN', '30'))
+            )
+            print(f"✓ LLM yönlendirici: {', '.join(backend.name for backend in backends)}")
                 
         except Exception as e:
             raise Exception(f"LLM başlatılamadı: {str(e)}")
     
-    def create_vectorstore(self, documents: List[Document]):
+    def _create_llm_backends(self, provider: str) -> List[LLMBackend]:
+        """Sağlayıcının router backend'leri (Gemini'de aday model başına bir backend)"""
+        timeout = float(os.getenv('LLM_REQUEST_TIMEOUT', '60'))
+        if provider == "ollama":
+            # Ollama - Tamamen lokal, API key gerektirmez. Virgülle ayrılmış birden fazla adres aynı
+            # modelin kopyalarıdır; router istekleri aralarında en hızlı sağlıklı olana gönderir
+            ollama_base_urls = [
+                url.strip() for url in os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434').split(',') if url.strip()
+            ]
+            ollama_model = os.getenv('OLLAMA_MODEL', 'phi3:mini')
+            temperature = float(os.getenv('OLLAMA_TEMPERATURE', '0.5'))
+            num_predict = int(os.getenv('OLLAMA_NUM_PREDICT', '512'))
+            # Modelin son istekten sonra bellekte kalma süresi ("30m", "-1" = sürekli)
+            keep_alive = os.getenv('OLLAMA_KEEP_ALIVE', '30m')
+            keep_alive = int(keep_alive) if keep_alive.lstrip('-').isdigit() else keep_alive
+            warmup = os.getenv('OLLAMA_WARMUP', '1').lower() in ('1', 'true', 'yes')
+            backends = []
+            for ollama_base_url in ollama_base_urls:
+                # Süreç genelinde paylaşılan bağlantı havuzu: pipeline yeniden kurulunca bağlantılar korunur
+                llm, pooled = get_ollama_chat(
+                    ollama_base_url,
+                    ollama_model,
+                    temperature,
+                    num_predict,
+                    timeout,
+                    keep_alive=keep_alive
+                )
+                print(f"✓ Ollama modeli başlatıldı: {ollama_model} ({ollama_base_url}, {'paylaşılan' if pooled else 'yeni'} bağlantı havuzu)")
+                if warmup:
+                    # İlk kullanıcı sorusu model yükleme süresini beklemesin
+                    warm_up_ollama(ollama_base_url, ollama_model, keep_alive=keep_alive)
+                name = f"ollama:{ollama_model}" if len(ollama_base_urls) == 1 else f"ollama:{ollama_model}@{ollama_base_url}"
+                backends.append(LLMBackend(
+                    name, llm, probe=ollama_probe(ollama_base_url, ollama_model), model=f"ollama:{ollama_model}"
+                ))
+            return backends
+        
+        if provider == "gemini":
+            if not self.api_key:
+                raise ValueError("Gemini API anahtarı bulunamadı. .env dosyasına GEMINI_API_KEY veya GOOGLE_API_KEY ekleyin.")
+            
+            user_model = os.getenv('GEMINI_MODEL')
+            temperature = float(os.getenv('GEMINI_TEMPERATURE', '0.7'))
+            # Boş = Google'ın varsayılan uç noktası; verilirse REST ile bu adrese gidilir
+            endpoint = os.getenv('GEMINI_API_ENDPOINT', '').rstrip('/')
+            extra = {'client_options': {'api_endpoint': endpoint}, 'transport': 'rest'} if endpoint else {}
+            
+            # Sağlam model fallback sırası (v1beta uyumlu bilinen alias'lar); model adı ilk
+            # istekte doğrulandığından her aday ayrı backend olur, geçersiz olanın devresi açılır
+            candidate_models = [
+                user_model if user_model else 'gemini-flash-latest',
+                'gemini-pro-latest',
+                'gemini-1.5-pro',
+                'gemini-1.5-flash'
+            ]
+            backends = []
+            for candidate in dict.fromkeys(candidate_models):
+                llm = ChatGoogleGenerativeAI(
+                    model=candidate,
+                    google_api_key=self.api_key,
+                    temperature=temperature,
+                    convert_system_message_to_human=True,
+                    timeout=timeout,
+                    # Yeniden deneme yerine router sıradaki backend'e geçer
+                    max_retries=int(os.getenv('GEMINI_MAX_RETRIES', '1')),
+                    **extra
+                )
+                probe = http_probe(
+                    f"{endpoint or 'https://generativelanguage.googleapis.com'}/v1beta/models/{candidate}",
+                    headers={'x-goog-api-key': self.api_key}
+                )
+                backends.append(LLMBackend(f"gemini:{candidate}", llm, probe=probe))
+            print(f"✓ Google Gemini modelleri hazır: {', '.join(dict.fromkeys(candidate_models))} 🚀")
+            return backends
+        
+        if provider == "stub":
+            # Ağa çıkmayan deterministik model (yük testi / benchmark)
+            llm = StubChatModel(
+                latency=float(os.getenv('STUB_LLM_LATENCY', '0.5')),
+                tokens_per_second=float(os.getenv('STUB_LLM_TOKENS_PER_SEC', '50')),
+                answer_tokens=int(os.getenv('STUB_LLM_ANSWER_TOKENS', '64'))
+            )
+            print(f"✓ Stub LLM hazır (ilk token {llm.latency} sn, {llm.tokens_per_second:g} token/sn)")
+            return [LLMBackend("stub", llm)]
+        
+        raise ValueError(f"Desteklenmeyen model: {provider}. Sadece 'ollama', 'gemini', 'stub' veya 'none' destekleniyor.")
+    
+    def create_vectorstore(
+        self,
+        documents: List[Document],
+        workers: Optional[int] = None,
+        resume: bool = False
+    ) -> dict:
         """
         Belgelerden vektör veritabanı oluşturur
         
         Args:
             documents: Document nesnelerinin listesi
+            workers: Paralel embedding worker süreç sayısı (.env: EMBEDDING_WORKERS, varsayılan 1)
+            resume: Aynı belgelerle yarıda kalmış kurulumun checkpoint'inden devam et
+            
+        Returns:
+            Aşama sayaçları (bkz. ingest_directory)
+        """
+        if self.shard_count > 1:
+            parts = [[] for _ in range(self.shard_count)]
+            for doc in documents:
+                parts[shard_of_document(doc, self.shard_count, self.shard_by)].append(doc)
+            return self._build_shards(
+                lambda shard_id, shard, _: shard.create_vectorstore(parts[shard_id], workers=workers, resume=resume),
+                DataProcessor(chunk_size=1000, chunk_overlap=200)
+            )
+        print(f"\n📊 {len(documents)} belge vektör veritabanına ekleniyor...")
+        # İmza: belge sırası ve içeriği aynıysa checkpoint geçerlidir
+        digest = hashlib.sha256()
+        for doc in documents:
+            digest.update(doc.page_content.encode('utf-8'))
+            digest.update(b'\0')
+        signature = {'documents': len(documents), 'sha256': digest.hexdigest()}
+        progress = IngestProgress()
+        progress.chunks = len(documents)
+        return self._build_staged(iter(documents), progress, signature, workers, None, resume)
+    
+    def ingest_directory(
+        self,
+        directory_path: str,
+        processor: Optional[DataProcessor] = None,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        resume: bool = False,
+        shard_ids: Optional[List[int]] = None
+    ) -> dict:
+        """
+        Dizini akış halinde indeksler: dosyalar kayıt, kayıtlar chunk üretir; chunk'lar
+        sabit boyutlu gruplar halinde gömülüp hemen indekse ve diskteki docstore'a eklenir.
+        Bellek kullanımı veri seti boyutuyla büyümez (FAISS indeksinin kendisi hariç).
+        
+        Args:
+            directory_path: Veri dizini
+            processor: Chunking için DataProcessor (varsayılan 1000/200)
+            workers: Paralel embedding worker süreç sayısı (.env: EMBEDDING_WORKERS)
+            batch_size: Grup başına chunk sayısı (.env: INGEST_BATCH_SIZE, varsayılan 2048)
+            resume: Aynı dosyalarla yarıda kalmış kurulumun checkpoint'inden devam et
+            shard_ids: Shard'lı düzende yalnızca bu shard'ları kur (ayrı süreçlerde paralel kurulum için)
+            
+        Returns:
+            Aşama sayaçları: files, files_failed, records, chunks, embedded, indexed, seconds
         """
+        processor = processor or DataProcessor(chunk_size=1000, chunk_overlap=200)
+        if self.shard_count > 1:
+            return self._build_shards(
+                lambda _, shard, shard_processor: shard.ingest_directory(
+                    directory_path, shard_processor, workers=workers, batch_size=batch_size, resume=resume
+                ),
+                processor,
+                shard_ids
+            )
+        files = processor.list_data_files(directory_path)
+        print(f"\n📊 {directory_path} akış halinde indeksleniyor...")
+        # İmza: dosyalar (boyut, mtime) ve chunk ayarları aynıysa akış aynı chunk'ları üretir
+        signature = {
+            'files': [[os.path.normpath(path), os.path.getsize(path), os.path.getmtime(path)] for path in files],
+            'chunk_size': processor.chunk_size,
+            'chunk_overlap': processor.chunk_overlap
+        }
+        progress = IngestProgress(files_total=len(files))
+        documents = processor.iter_directory_documents(directory_path, progress)
+        return self._build_staged(documents, progress, signature, workers, batch_size, resume)
+    
+    def _build_staged(
+        self,
+        documents: Iterator[Document],
+        progress: IngestProgress,
+        signature: dict,
+        workers: Optional[int],
+        batch_size: Optional[int],
+        resume: bool
+    ) -> dict:
+        """
+        Chunk akışından tam indeks kurar. Kurulum persist dizininin yanındaki hazırlık
+        dizininde yürür; her INGEST_CHECKPOINT_BATCHES grupta docstore commit edilir,
+        vektörler diske indirilir ve akıştaki konum checkpoint.json'a yazılır. Hata olursa
+        hazırlık dizini korunur, resume=True ile gömülmüş chunk'lar tekrar gömülmez.
+        Bitince dizin persist_directory altında yeni nesil olarak yayınlanır.
+        Eğitim gerektiren indekslerde (IVF, SQ, PQ) ilk örnek kadar vektör biriktirilir.
+        """
+        if workers is None:
+            workers = int(os.getenv('EMBEDDING_WORKERS', '1'))
+        batch_size = batch_size or self.ingest_batch_size
+        signature = dict(signature, spec=self.index_spec, embeddings=self.embeddings.cache_namespace)
+        checkpoint = BuildCheckpoint.open(self.persist_directory, signature, resume=resume)
+        store = None
+        vector_log = None
+        row = checkpoint.rows
+        # Aşamalar: chunk (okuma + bölme), embed, index (FAISS), write (docstore, vektör kaydı, dosyalar)
+        trace = self.tracer.start('build', persist_directory=self.persist_directory, spec=self.index_spec, resumed_rows=row)
         try:
-            print(f"\n📊 {len(documents)} belge vektör veritabanına ekleniyor...")
+            self._close_store()
+            self.vectorstore = None
+            self.exact_vectors = None
+            store = SQLiteStore(os.path.join(checkpoint.directory, DOCSTORE_FILENAME))
+            # Checkpoint sonrası yazılmış (commit edilmemiş ya da yarım) kayıtları at
+            store.truncate(row)
+            dimension = self.embeddings.dimension
+            vector_log = ExactVectorsWriter(checkpoint.directory, dimension, resume_rows=row)
+            
+            needed = training_size(self.index_spec, dimension)
+            index = None
+            pending: List[np.ndarray] = []  # eğitim örneği dolana kadar bekleyen vektörler
+            
+            def index_vectors(vectors: np.ndarray):
+                nonlocal index
+                vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+                if index is not None:
+                    index.add(vectors)
+                    progress.indexed += len(vectors)
+                    return
+                pending.append(vectors)
+                if sum(len(v) for v in pending) >= needed:
+                    flush_pending()
+            
+            def flush_pending():
+                nonlocal index
+                vectors = np.concatenate(pending)
+                index = build_index(vectors, self.index_spec)
+                index.add(vectors)
+                progress.indexed += len(vectors)
+                pending.clear()
+            
+            if row:
+                # Checkpoint'teki vektörleri yeniden gömmeden indekse geri yükle
+                for vectors in vector_log.iter_blocks(batch_size):
+                    index_vectors(vectors)
+                progress.embedded = row
+            
+            checkpoint_every = max(1, int(os.getenv('INGEST_CHECKPOINT_BATCHES', '1')))
+            uncommitted = 0
+            pool = self.embeddings.worker_pool(workers) if workers > 1 else contextlib.nullcontext()
+            with pool as executor:
+                # Checkpoint'e kadarki chunk'lar yeniden üretilir ama gömülmez
+                for batch in trace.iterate(batched(islice(documents, row, None), batch_size), 'chunk'):
+                    with trace.stage('embed'):
+                        vectors = self._embed_texts([doc.page_content for doc in batch], workers, executor)
+                    progress.embedded += len(batch)
+                    
+                    with trace.stage('write'):
+                        ids = [str(uuid.uuid4()) for _ in batch]
+                        store.docstore.add(dict(zip(ids, batch)))
+                        store.index_to_docstore_id.update(enumerate(ids, start=row))
+                        vector_log.append(vectors)
+                    with trace.stage('index'):
+                        index_vectors(vectors)
+                    row += len(batch)
+                    
+                    uncommitted += 1
+                    if uncommitted >= checkpoint_every:
+                        with trace.stage('write'):
+                            store.commit()
+                            vector_log.flush()
+                            checkpoint.save(row, progress.summary())
+                        uncommitted = 0
+                    progress.report()
+            
+            if pending:
+                with trace.stage('index'):
+                    flush_pending()
+            if index is None:
+                if not self._allow_empty_index:
+                    raise ValueError("Vektör veritabanı için en az bir belge gerekli")
+                # Eğitilemeyen boş shard: düz indeks (ilk belgeler geldiğinde tip farkı tam kurulum tetikler)
+                index = faiss.IndexFlatL2(dimension)
+            with trace.stage('write'):
+                store.commit()
+                vector_log.flush()
+                checkpoint.save(row, progress.summary())
+                set_search_params(index, **self.search_params)
+                
+                # Hazırlık dizinini tamamla: indeks, ayarlar, kesin sıralama kopyası ve manifest
+                faiss.write_index(index, os.path.join(checkpoint.directory, 'index.faiss'))
+                built_spec = self.index_spec if index.ntotal else DEFAULT_INDEX_SPEC
+                save_index_config(checkpoint.directory, {'spec': built_spec, 'dimension': int(index.d)})
+                if is_quantized(self.index_spec) and self.rerank_factor > 0:
+                    vector_log.finish()
+                else:
+                    vector_log.abort()
+                vector_log = None
+                IndexManifest.from_sources(store.ids_by_source()).save(checkpoint.directory)
+                store.close()
+                store = None
+                generation = checkpoint.promote(self.persist_directory)
             
-            # FAISS vektör DB oluştur
-            self.vectorstore = FAISS.from_documents(
-                documents=documents,
-                embedding=self.embeddings
+            self.vectorstore = FAISS(
+                embedding_function=self.embeddings,
+                index=index,
+                docstore=InMemoryDocstore({}),
+                index_to_docstore_id={}
             )
+            self.generation_directory = generation
+            self._index_version = self._read_index_version()
+            self._open_store(read_only=True)
+            exact_path = os.path.join(self.generation_directory, EXACT_VECTORS_FILENAME)
+            if os.path.exists(exact_path):
+                self.exact_vectors = ExactVectors(exact_path)
             
-            # FAISS'i kaydet
-            self.vectorstore.save_local(self.persist_directory)
-            print(f"✓ Vektör veritabanı oluşturuldu ve kaydedildi: {self.persist_directory}")
+            summary = progress.summary()
+            trace.finish(chunks=summary['indexed'], files=summary['files'])
+            print(f"✓ Vektör veritabanı oluşturuldu ve kaydedildi: {self.persist_directory} "
+                  f"({summary['indexed']} chunk, {summary['seconds']} sn)")
+            cache_stats = self.get_embedding_cache_stats()
+            if cache_stats:
+                print(f"🗃️  Embedding önbelleği: {cache_stats['hits']} isabet, {cache_stats['misses']} ıska")
+            return summary
             
         except Exception as e:
+            trace.finish(error=True, chunks=row)
+            # Commit edilmemiş grup geri alınır; checkpoint'e kadarki iş hazırlık dizininde kalır
+            if store is not None:
+                store.close()
+            if vector_log is not None:
+                vector_log.close()
+            if os.path.exists(checkpoint.directory) and checkpoint.rows:
+                print(f"💾 Checkpoint korundu: {checkpoint.rows} chunk ({checkpoint.directory}); "
+                      f"resume=True / --resume ile devam edilebilir")
             raise Exception(f"Vektör veritabanı oluşturulamadı: {str(e)}")
     
-    def load_vectorstore(self):
-        """Mevcut vektör veritabanını yükler"""
+    def update_vectorstore(
+        self,
+        directory_path: str,
+        processor: Optional[DataProcessor] = None,
+        workers: Optional[int] = None,
+        resume: bool = False,
+        shard_ids: Optional[List[int]] = None
+    ) -> dict:
+        """
+        Vektör veritabanını artımlı günceller: yalnızca eklenen/değişen dosyalar
+        chunk'lanıp gömülür, silinen/değişen dosyaların vektörleri indeksten çıkarılır.
+        Manifest yoksa (ilk kurulum veya eski indeks) tam indeksleme yapılır.
+        
+        Args:
+            directory_path: Veri dizini
+            processor: Chunking için DataProcessor (varsayılan 1000/200)
+            workers: Paralel embedding worker süreç sayısı
+            resume: Tam indeksleme gerekirse yarıda kalmış kurulumun checkpoint'inden devam et
+            shard_ids: Shard'lı düzende yalnızca bu shard'ları güncelle
+            
+        Returns:
+            added, changed, deleted, unchanged dosya sayıları ve eklenen/silinen chunk sayıları
+        """
+        processor = processor or DataProcessor(chunk_size=1000, chunk_overlap=200)
+        if self.shard_count > 1:
+            # Her shard kendi manifest'iyle bağımsız güncellenir
+            return self._build_shards(
+                lambda _, shard, shard_processor: shard.update_vectorstore(
+                    directory_path, shard_processor, workers=workers, resume=resume
+                ),
+                processor,
+                shard_ids
+            )
+        trace = self.tracer.start('update', persist_directory=self.persist_directory)
+        target = None
+        published = False
+        try:
+            def full_rebuild(reason: str) -> dict:
+                print(f"ℹ️  {reason}, tam indeksleme yapılıyor...")
+                summary = self.ingest_directory(directory_path, processor, workers=workers, resume=resume)
+                trace.finish(full_rebuild=True)
+                return {
+                    'full_rebuild': True, 'added': summary['files'] - summary['files_failed'], 'changed': 0,
+                    'deleted': 0, 'unchanged': 0, 'chunks_added': summary['indexed'], 'chunks_removed': 0
+                }
+            
+            directory = generation_path(self.persist_directory)
+            manifest = IndexManifest.load(directory)
+            if manifest is None or not has_index(self.persist_directory):
+                return full_rebuild("Manifest bulunamadı")
+            if load_index_config(directory).get('spec') != self.index_spec:
+                return full_rebuild(f"İndeks tipi değişti ({self.index_spec})")
+            
+            diff = manifest.diff(processor.list_data_files(directory_path))
+            print(f"📂 Eklenen: {len(diff['added'])}, değişen: {len(diff['changed'])}, "
+                  f"silinen: {len(diff['deleted'])}, değişmeyen: {len(diff['unchanged'])}")
+            if not (diff['added'] or diff['changed'] or diff['deleted']):
+                # İndeks değişmedi, yeni nesil yayınlanmaz; manifest'i (yenilenen mtime'lar) yalnızca güncelleme okur
+                manifest.save(directory)
+                trace.finish(full_rebuild=False, chunks_added=0, chunks_removed=0)
+                print("✓ Vektör veritabanı güncel")
+                return {
+                    'full_rebuild': False, 'added': 0, 'changed': 0, 'deleted': 0,
+                    'unchanged': len(diff['unchanged']), 'chunks_added': 0, 'chunks_removed': 0
+                }
+            
+            if self.vectorstore is None or self._index_mmapped or self.generation_directory != directory:
+                # Güncelleme son yayınlanmış nesilden başlar; mmap'li indeks salt okunur, belleğe yüklenir
+                self.load_vectorstore(mmap=False)
+            
+            # Silinen ve değişen dosyaların vektörlerini çıkar
+            stale_ids = []
+            for file_path in diff['deleted'] + diff['changed']:
+                stale_ids.extend(manifest.forget(file_path))
+            if stale_ids and not supports_removal(self.vectorstore.index):
+                return full_rebuild(f"'{self.index_spec}' indeksi vektör silmeyi desteklemiyor")
+            
+            # Değişiklikler yeni nesle yazılır; açık oturumların okuduğu nesil (indeks, satır eşlemesi, belgeler) değişmez
+            target = self._fork_generation()
+            removed_rows = []
+            if stale_ids:
+                row_of = {doc_id: row for row, doc_id in self.vectorstore.index_to_docstore_id.items()}
+                removed_rows = [row_of[doc_id] for doc_id in stale_ids if doc_id in row_of]
+                self.vectorstore.delete(stale_ids)
+            
+            # Eklenen ve değişen dosyaları akış halinde işle, gruplar halinde mevcut indekse ekle
+            chunks_added = 0
+            added_vectors = []
+            for file_path in diff['added'] + diff['changed']:
+                ids = []
+                try:
+                    for batch in trace.iterate(
+                        batched(processor.iter_file_documents(file_path), self.ingest_batch_size), 'chunk'
+                    ):
+                        with trace.stage('embed'):
+                            vectors = self._embed_texts([doc.page_content for doc in batch], workers)
+                        with trace.stage('index'):
+                            ids.extend(self._add_to_vectorstore(batch, vectors))
+                        if self.exact_vectors is not None:
+                            added_vectors.append(vectors)
+                        chunks_added += len(batch)
+                except Exception as e:
+                    print(f"Dosya atlandı (hata): {os.path.basename(file_path)} -> {str(e)}")
+                    if ids:
+                        manifest.record_incomplete(file_path, ids)
+                    continue
+                manifest.record(file_path, ids, sha256=diff['hashes'].get(os.path.normpath(file_path)))
+            
+            with trace.stage('write'):
+                self._save_vectorstore(target)
+                if self.exact_vectors is not None and (removed_rows or added_vectors):
+                    # Kesin sıralama kopyasını indeksle aynı satır düzeninde tut
+                    kept = np.delete(np.asarray(self.exact_vectors.vectors), removed_rows, axis=0)
+                    self.exact_vectors = None
+                    self._save_exact_vectors(np.concatenate([kept] + added_vectors))
+                manifest.save(target)
+                self._publish_generation(target)
+                published = True
+            trace.finish(full_rebuild=False, chunks_added=chunks_added, chunks_removed=len(stale_ids))
+            print(f"✓ Vektör veritabanı güncellendi: +{chunks_added} / -{len(stale_ids)} chunk")
+            
+            return {
+                'full_rebuild': False,
+                'added': len(diff['added']),
+                'changed': len(diff['changed']),
+                'deleted': len(diff['deleted']),
+                'unchanged': len(diff['unchanged']),
+                'chunks_added': chunks_added,
+                'chunks_removed': len(stale_ids)
+            }
+            
+        except Exception as e:
+            trace.finish(error=True)
+            if target is not None and not published:
+                # Yarım nesil atılır; geçerli nesil değişmedi, sonraki sorgu/güncelleme onu yeniden açar
+                self._close_store()
+                self.vectorstore = None
+                self.exact_vectors = None
+                self.generation_directory = None
+                shutil.rmtree(target, ignore_errors=True)
+            raise Exception(f"Vektör veritabanı güncellenemedi: {str(e)}")
+    
+    def _shard_pipeline(self, shard_id: int) -> "RAGPipeline":
+        """
+        Tek bir shard dizinine bakan hafif kopya: embedding modeli, LLM ve sorgu
+        ayarları (search_params sözlüğü) paylaşılır, indeks ve docstore ayrıdır.
+        """
+        shard = copy.copy(self)
+        shard.persist_directory = os.path.join(self.persist_directory, shard_name(shard_id))
+        shard.shard_count = 1
+        shard.vectorstore = None
+        shard.exact_vectors = None
+        shard.qa_chain = None
+        shard._store = None
+        shard.generation_directory = None
+        shard._index_mmapped = False
+        shard._allow_empty_index = True
+        return shard
+    
+    def _build_shards(self, build_fn, processor: DataProcessor, shard_ids: Optional[List[int]] = None) -> dict:
+        """
+        build_fn(shard_id, shard_pipeline, shard_processor) fonksiyonunu her shard için
+        çalıştırır. Shard düzeni değiştiyse (sayı / bölme yöntemi) eski veritabanı temizlenir.
+        """
+        config = {'count': self.shard_count, 'by': self.shard_by, 'spec': self.index_spec}
+        existing = load_shard_config(self.persist_directory)
+        layout_changed = existing is None or (existing.get('count'), existing.get('by')) != (self.shard_count, self.shard_by)
+        if layout_changed and shard_ids is not None and existing is not None:
+            raise ValueError("Shard düzeni değişti; tüm shard'lar birlikte yeniden kurulmalı")
+        self.vectorstore = None
+        self.exact_vectors = None
+        self._close_store()
+        if layout_changed:
+            # Tek shard kuran süreçler (--shard) birbirinin shard dizinine dokunmaz
+            self._reset_persist_directory(remove_shards=shard_ids is None)
+        # Ayrı süreçlerde kurulan shard'lar aynı düzeni görsün diye önce yazılır
+        save_shard_config(self.persist_directory, config)
+        
+        summaries = []
+        for shard_id in (shard_ids if shard_ids is not None else range(self.shard_count)):
+            if not 0 <= shard_id < self.shard_count:
+                raise ValueError(f"Geçersiz shard: {shard_id} (0-{self.shard_count - 1})")
+            print(f"\n🧩 Shard {shard_id + 1}/{self.shard_count} ({self.shard_by})")
+            shard = self._shard_pipeline(shard_id)
+            summaries.append(build_fn(shard_id, shard, ShardDataProcessor(processor, shard_id, self.shard_count, self.shard_by)))
+            shard._close_store()
+        if shard_ids is None:
+            self.load_vectorstore()
+        else:
+            self._index_version = self._read_index_version()
+        return merge_summaries(summaries, self.shard_by)
+    
+    def _reset_persist_directory(self, remove_shards: bool = True):
+        """Tek indeksli veritabanı dosyalarını ve (istenirse) farklı düzendeki shard dizinlerini siler"""
+        if not os.path.isdir(self.persist_directory):
+            return
+        print(f"ℹ️  Shard düzeni değişti, {self.persist_directory} yeniden kuruluyor")
+        for name in os.listdir(self.persist_directory):
+            path = os.path.join(self.persist_directory, name)
+            # Aynı anda çalışan shard süreçleri aynı dosyaları silebilir
+            with contextlib.suppress(FileNotFoundError):
+                if name.startswith('shard_') and os.path.isdir(path):
+                    if remove_shards:
+                        shutil.rmtree(path)
+                elif name.startswith(GENERATION_PREFIX) and os.path.isdir(path):
+                    shutil.rmtree(path)
+                elif name in ('index.faiss', 'index.pkl', DOCSTORE_FILENAME, 'manifest.json', 'index_config.json',
+                              EXACT_VECTORS_FILENAME, SHARDS_FILENAME, CURRENT_FILENAME):
+                    os.remove(path)
+    
+    def _embed_texts(self, texts: List[str], workers: Optional[int] = None, executor=None) -> np.ndarray:
+        """Metinleri tek süreçte ya da worker havuzunda float32 matrise gömer"""
+        if workers and workers > 1:
+            return self.embeddings.embed_documents_parallel(texts, workers=workers, executor=executor)
+        return self.embeddings.embed_documents_array(texts)
+    
+    def _add_to_vectorstore(self, documents: List[Document], vectors: np.ndarray) -> List[str]:
+        """Belgeleri ve float32 vektörlerini mevcut FAISS deposuna ekler, docstore id'lerini döndürür"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        ids = [str(uuid.uuid4()) for _ in documents]
+        start = self.vectorstore.index.ntotal
+        self.vectorstore.index.add(vectors)
+        self.vectorstore.docstore.add(dict(zip(ids, documents)))
+        for offset, doc_id in enumerate(ids):
+            self.vectorstore.index_to_docstore_id[start + offset] = doc_id
+        return ids
+    
+    def _fork_generation(self) -> str:
+        """
+        Okunan nesilden yeni (yayınlanmamış) bir nesil dizini açar: docstore.sqlite kopyalanıp
+        yazılabilir olarak bağlanır, değişmeyen dosyalar sabit bağlantıyla paylaşılır.
+        
+        Returns:
+            Yeni nesil dizini
+        """
+        source = self.generation_directory
+        target = new_generation(self.persist_directory)
+        for name in (INDEX_CONFIG_FILENAME, MANIFEST_FILENAME, EXACT_VECTORS_FILENAME):
+            if os.path.exists(os.path.join(source, name)):
+                link_or_copy(os.path.join(source, name), os.path.join(target, name))
+        if os.path.exists(os.path.join(source, DOCSTORE_FILENAME)):
+            self._close_store()
+            shutil.copyfile(os.path.join(source, DOCSTORE_FILENAME), os.path.join(target, DOCSTORE_FILENAME))
+            self.generation_directory = target
+            self._open_store(read_only=False)
+        return target
+    
+    def _publish_generation(self, directory: str):
+        """Yazılmış nesli CURRENT ile geçerli yapar; bu oturum yeni nesli okur"""
+        publish_generation(self.persist_directory, directory)
+        self.generation_directory = directory
+        self._index_version = self._read_index_version()
+    
+    def _save_vectorstore(self, directory: str):
+        """
+        FAISS indeksini index.faiss'e, belgeleri ve satır eşlemesini docstore.sqlite'a yazar
+        (pickle yok). directory henüz yayınlanmamış bir nesildir (bkz. _fork_generation).
+        """
+        faiss.write_index(self.vectorstore.index, os.path.join(directory, 'index.faiss'))
+        
+        docstore = self.vectorstore.docstore
+        if isinstance(docstore, SQLiteDocstore) and self._store is not None:
+            mapping = self.vectorstore.index_to_docstore_id
+            if not isinstance(mapping, SQLiteRowMapping):
+                # FAISS.delete eşlemeyi sıkıştırılmış bir dict ile değiştirir
+                self._store.index_to_docstore_id.replace_all(mapping)
+                self.vectorstore.index_to_docstore_id = self._store.index_to_docstore_id
+            self._store.commit()
+        else:
+            # Bellekteki docstore'u (eski format) SQLite'a yaz ve ona geç
+            self._close_store()
+            write_store(directory, docstore._dict, self.vectorstore.index_to_docstore_id)
+            self.generation_directory = directory
+            self._open_store(read_only=True)
+    
+    def _open_store(self, read_only: bool):
+        """docstore.sqlite'ı açar ve vektör deposunun docstore/eşlemesini ona bağlar"""
+        self._store = SQLiteStore(os.path.join(self.generation_directory, DOCSTORE_FILENAME), read_only=read_only)
+        if self.vectorstore is not None:
+            self.vectorstore.docstore = self._store.docstore
+            self.vectorstore.index_to_docstore_id = self._store.index_to_docstore_id
+    
+    def _close_store(self):
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+    
+    def _save_exact_vectors(self, vectors: np.ndarray):
+        """Kuantize indekslerde yeniden sıralama için float32 kopyayı yazar, diğerlerinde eskisini siler"""
+        path = os.path.join(self.generation_directory, EXACT_VECTORS_FILENAME)
+        self.exact_vectors = None
+        if is_quantized(self.index_spec) and self.rerank_factor > 0:
+            ExactVectors.save(self.generation_directory, vectors)
+            self.exact_vectors = ExactVectors(path)
+        elif os.path.exists(path):
+            os.remove(path)
+    
+    def _documents_for_indices(self, indices: np.ndarray) -> List[Optional[Document]]:
+        """FAISS satır indekslerini docstore'daki belgelere çevirir (sıra korunur; bulunamayan = None)"""
+        doc_ids = [self.vectorstore.index_to_docstore_id[int(i)] for i in indices]
+        docstore = self.vectorstore.docstore
+        if isinstance(docstore, SQLiteDocstore):
+            # Tek sorguda oku
+            found = docstore.search_many(doc_ids)
+            return [found.get(doc_id) for doc_id in doc_ids]
+        docs = [docstore.search(doc_id) for doc_id in doc_ids]
+        return [doc if isinstance(doc, Document) else None for doc in docs]
+    
+    def search_by_vector(self, vector: np.ndarray, k: int) -> List[Tuple[Document, float]]:
+        """
+        Tek indekste sorgu vektörüne en yakın k belge ve L2 mesafeleri. Kuantize
+        indekste k * rerank_factor aday float32 kopyayla kesin sıralanır.
+        
+        Args:
+            vector: (boyut,) sorgu vektörü
+            k: Döndürülecek belge sayısı
+            
+        Returns:
+            (belge, mesafe) listesi, en yakından uzağa
+        """
+        return self.search_by_vectors(np.asarray(vector, dtype=np.float32).reshape(1, -1), k)[0]
+    
+    def search_by_vectors(self, vectors: np.ndarray, k: int) -> List[List[Tuple[Document, float]]]:
+        """
+        search_by_vector'ün çok sorgulu hali: tek FAISS araması ve tek docstore okuması
+        
+        Args:
+            vectors: (sorgu sayısı, boyut) sorgu vektörleri
+            k: Sorgu başına döndürülecek belge sayısı
+            
+        Returns:
+            Her sorgu için (belge, mesafe) listesi, en yakından uzağa
+        """
+        hits = self.search_rows(vectors, k)
+        if not hits:
+            return []
+        docs = self._documents_for_indices(np.concatenate([indices for _, indices in hits]))
+        results, offset = [], 0
+        for distances, indices in hits:
+            query_docs = docs[offset:offset + len(indices)]
+            offset += len(indices)
+            results.append([
+                (doc, float(distance)) for doc, distance in zip(query_docs, distances) if doc is not None
+            ])
+        return results
+    
+    def search_rows(self, vectors: np.ndarray, k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        search_by_vectors'ün belge okumayan hali (recall ölçümü de bunu kullanır)
+        
+        Args:
+            vectors: (sorgu sayısı, boyut) sorgu vektörleri
+            k: Sorgu başına döndürülecek satır sayısı
+            
+        Returns:
+            Her sorgu için (L2 mesafeleri, FAISS satırları), en yakından uzağa
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.vectorstore.index.d)
+        if not len(vectors):
+            return []
+        if self.exact_vectors is not None:
+            # Kuantize indeksten geniş aday kümesi al, float32 kopyayla kesin sırala
+            _, candidates = self.vectorstore.index.search(vectors, k * self.rerank_factor)
+            hits = [self.exact_vectors.rerank(vector, row, k) for vector, row in zip(vectors, candidates)]
+        else:
+            distances, indices = self.vectorstore.index.search(vectors, k)
+            hits = list(zip(distances, indices))
+        return [(distances[indices != -1], indices[indices != -1]) for distances, indices in hits]
+    
+    def mmr_candidates(self, vector: np.ndarray, fetch_k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        MMR için en yakın fetch_k aday. Vektörler aramanın döndürdüğü satırlardan tek
+        seferde alınır; kuantize indekste vektörler ve mesafeler float32 kopyadan okunur.
+        Belgeler okunmaz, yalnızca seçilenler candidate_documents ile alınır.
+        
+        Returns:
+            (FAISS satırları (n,), L2 mesafeleri (n,), vektörler (n, boyut)), en yakından uzağa
+        """
+        return self.mmr_candidates_batch(np.asarray(vector, dtype=np.float32).reshape(1, -1), fetch_k)[0]
+    
+    def mmr_candidates_batch(
+        self, vectors: np.ndarray, fetch_k: int
+    ) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """mmr_candidates'ın çok sorgulu hali (tek FAISS araması)"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.vectorstore.index.d)
+        all_distances, all_indices = self.vectorstore.index.search(vectors, fetch_k)
+        candidates = []
+        for vector, distances, indices in zip(vectors, all_distances, all_indices):
+            keep = indices != -1
+            distances, indices = distances[keep], indices[keep]
+            if not len(indices):
+                candidates.append((indices, distances, np.empty((0, len(vector)), dtype=np.float32)))
+                continue
+            if self.exact_vectors is not None:
+                rows = np.asarray(self.exact_vectors.vectors[indices], dtype=np.float32)
+                distances = ((rows - vector) ** 2).sum(axis=1)
+            else:
+                rows = self.vectorstore.index.reconstruct_batch(indices)
+            candidates.append((indices, distances, rows))
+        return candidates
+    
+    def candidate_documents(self, rows: np.ndarray) -> List[Optional[Document]]:
+        """mmr_candidates satırlarının belgeleri (sıra korunur; bulunamayan = None)"""
+        return self._documents_for_indices(rows)
+    
+    def get_embedding_cache_stats(self) -> Optional[dict]:
+        """Embedding önbelleği istatistiklerini döndürür (önbellek kapalıysa None)"""
+        cache = getattr(self.embeddings, 'cache', None)
+        return cache.stats() if cache else None
+    
+    def get_query_cache_stats(self) -> Optional[dict]:
+        """Sorgu vektörü önbelleği istatistiklerini döndürür (önbellek kapalıysa None)"""
+        query_cache = getattr(self.embeddings, 'query_cache', None)
+        return query_cache.stats() if query_cache else None
+    
+    def count_unique_titles(self) -> int:
+        """Vektör deposundaki benzersiz metadata.title sayısı (belgeler belleğe alınmadan)"""
+        return len(self._unique_titles())
+    
+    def _unique_titles(self) -> set:
+        if self.vectorstore is None:
+            return set()
+        if isinstance(self.vectorstore, ShardedVectorStore):
+            titles = set()
+            for shard in self.vectorstore.all_shards():
+                titles |= shard._unique_titles()
+            return titles
+        docstore = self.vectorstore.docstore
+        if isinstance(docstore, SQLiteDocstore):
+            return docstore.unique_titles()
+        titles = {doc.metadata.get('title') for doc in getattr(docstore, '_dict', {}).values()}
+        titles.discard(None)
+        return titles
+    
+    def load_vectorstore(self, mmap: Optional[bool] = None):
+        """
+        Mevcut vektör veritabanını yükler
+        
+        Args:
+            mmap: İndeksi bellek eşlemeli (salt okunur) aç (.env: FAISS_MMAP, varsayılan açık).
+                Güncelleme için False verilir.
+        """
         try:
             if not os.path.exists(self.persist_directory):
                 raise FileNotFoundError(f"Vektör veritabanı bulunamadı: {self.persist_directory}")
+            if mmap is None:
+                mmap = self.mmap_index
             
-            # FAISS'i yükle
-            self.vectorstore = FAISS.load_local(
-                self.persist_directory,
-                embeddings=self.embeddings,
-                allow_dangerous_deserialization=True  # Local dosya güvenli
-            )
-            print("✓ Vektör veritabanı yüklendi")
+            shard_config = load_shard_config(self.persist_directory)
+            if shard_config is not None:
+                self._load_shards(shard_config, mmap)
+                return
+            
+            self._close_store()
+            self._index_mmapped = False
+            # Oturum açtığı nesli okur; güncellemeler yeni nesle yazılır ve CURRENT ile yayınlanır
+            directory = self.generation_directory = generation_path(self.persist_directory)
+            docstore_path = os.path.join(directory, DOCSTORE_FILENAME)
+            if os.path.exists(docstore_path):
+                # Sayfa önbelleği süreçler arasında paylaşılır; belgeler id ile diskten okunur
+                index_path = os.path.join(directory, 'index.faiss')
+                if mmap:
+                    flags = getattr(faiss, 'IO_FLAG_MMAP_IFC', faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+                    index = faiss.read_index(index_path, flags)
+                    self._index_mmapped = True
+                else:
+                    index = faiss.read_index(index_path)
+                self._store = SQLiteStore(docstore_path, read_only=True)
+                self.vectorstore = FAISS(
+                    embedding_function=self.embeddings,
+                    index=index,
+                    docstore=self._store.docstore,
+                    index_to_docstore_id=self._store.index_to_docstore_id
+                )
+            else:
+                # Eski format (index.pkl): bir kez yükle ve SQLite docstore'a dönüştür
+                self.vectorstore = FAISS.load_local(
+                    directory,
+                    embeddings=self.embeddings,
+                    allow_dangerous_deserialization=True  # Local dosya güvenli
+                )
+                target = self._fork_generation()
+                self._save_vectorstore(target)
+                self._publish_generation(target)
+                directory = target
+                print(f"✓ Eski pickle docstore {DOCSTORE_FILENAME} formatına dönüştürüldü")
+            self._index_version = self._read_index_version()
+            # İndeks formatı diskteki kayıttan (yoksa indeks sınıfından) algılanır;
+            # sorgu ayarları yeniden indekslemeden uygulanır
+            config = load_index_config(directory)
+            stored_spec = config.get('spec') if 'dimension' in config else infer_spec(self.vectorstore.index)
+            if stored_spec != self.index_spec:
+                print(f"ℹ️  Kayıtlı indeks tipi kullanılıyor: {stored_spec} (istenen: {self.index_spec})")
+                self.index_spec = stored_spec
+            prepare_index(self.vectorstore.index)
+            set_search_params(self.vectorstore.index, **self.search_params)
+            
+            # Kuantize indeks + float32 kopya varsa kesin yeniden sıralamayı aç
+            self.exact_vectors = None
+            exact_path = os.path.join(directory, EXACT_VECTORS_FILENAME)
+            if self.rerank_factor > 0 and os.path.exists(exact_path):
+                exact_vectors = ExactVectors(exact_path)
+                if len(exact_vectors.vectors) == self.vectorstore.index.ntotal:
+                    self.exact_vectors = exact_vectors
+                else:
+                    print("⚠️  vectors.npy indeksle uyuşmuyor, yeniden sıralama kapalı")
+            
+            info = describe_index(self.vectorstore.index, directory)
+            print(f"✓ Vektör veritabanı yüklendi ({self.index_spec}, {info['ntotal']} vektör, "
+                  f"{info['bytes_per_vector']:.0f} B/vektör, {info['compression']:.1f}x sıkıştırma"
+                  f"{', mmap' if self._index_mmapped else ''}"
+                  f"{', kesin yeniden sıralama' if self.exact_vectors is not None else ''})")
             
         except Exception as e:
             raise Exception(f"Vektör veritabanı yüklenemedi: {str(e)}")
     
+    def _load_shards(self, config: dict, mmap: bool):
+        """Shard'lı veritabanını açar; shard'lar ilk aramada tembel yüklenir"""
+        count = int(config['count'])
+        missing = [
+            shard_name(i) for i in range(count)
+            if not has_index(os.path.join(self.persist_directory, shard_name(i)))
+        ]
+        if missing:
+            raise FileNotFoundError(f"Eksik shard'lar: {', '.join(missing)} (önce bu shard'ları kurun)")
+        self._close_store()
+        self.exact_vectors = None
+        self.shard_count = count
+        self.shard_by = config.get('by', self.shard_by)
+        if config.get('spec') and config['spec'] != self.index_spec:
+            print(f"ℹ️  Kayıtlı indeks tipi kullanılıyor: {config['spec']} (istenen: {self.index_spec})")
+            self.index_spec = config['spec']
+        
+        def open_shard(shard_id: int) -> "RAGPipeline":
+            shard = self._shard_pipeline(shard_id)
+            shard.load_vectorstore(mmap=mmap)
+            return shard
+        
+        self._index_version = self._read_index_version()
+        shards = [LazyShard(shard_name(i), lambda i=i: open_shard(i)) for i in range(count)]
+        threads = int(os.getenv('FAISS_SHARD_THREADS', '0')) or count
+        self.vectorstore = ShardedVectorStore(self.embeddings, shards, max_workers=threads)
+        print(f"✓ Vektör veritabanı yüklendi ({count} shard, {self.shard_by} ile bölünmüş, "
+              f"{threads} arama iş parçacığı; shard'lar ilk aramada açılır)")
+    
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """
+        Sorgu zamanı indeks ayarlarını yeniden indekslemeden değiştirir
+        
+        Args:
+            nprobe: IVF indekslerinde taranacak küme sayısı
+            ef_search: HNSW indekslerinde arama derinliği
+        """
+        if nprobe is not None:
+            self.search_params['nprobe'] = nprobe
+        if ef_search is not None:
+            self.search_params['ef_search'] = ef_search
+        if isinstance(self.vectorstore, ShardedVectorStore):
+            # Açılmamış shard'lar paylaşılan search_params ile açılır
+            for shard in self.vectorstore.loaded_shards():
+                set_search_params(shard.vectorstore.index, **self.search_params)
+        elif self.vectorstore is not None:
+            set_search_params(self.vectorstore.index, **self.search_params)
+    
     def create_qa_chain(self, k: int = 4):
         """
         Soru-cevap zinciri oluşturur
@@ -215,16 +1144,26 @@ class RAGPipeline:
         
         try:
             if self.llm is None:
-                raise ValueError("LLM tanımlı değil. create_qa_chain için 'gemini' veya 'ollama' sağlayıcı kullanın.")
-            # Retriever oluştur (MMR ile daha çeşitli sonuçlar)
+                raise ValueError("LLM tanımlı değil. create_qa_chain için 'gemini', 'ollama' veya 'stub' sağlayıcı kullanın.")
+            # Retriever oluştur (MMR ile daha çeşitli sonuçlar). Aday vektörleri aramayla
+            # birlikte alınır, MMR tek matris hesabıyla seçilir
             fetch_k = max(k * 4, 20)
-            retriever = self.vectorstore.as_retriever(
-                search_type="mmr",
-                search_kwargs={
-                    "k": k,
-                    "fetch_k": fetch_k,
-                    "lambda_mult": 0.5
-                }
+            retriever = MMRRetriever(
+                source=self.vectorstore if isinstance(self.vectorstore, ShardedVectorStore) else self,
+                embeddings=self.embeddings,
+                k=k,
+                fetch_k=fetch_k,
+                lambda_mult=0.5
+            )
+            self.retriever = retriever
+            
+            # Getirilen belgeler LLM'den önce token bütçesine göre derlenir
+            self.context_assembler = ContextAssembler(
+                count_tokens=self._count_tokens,
+                max_tokens=self.context_max_tokens,
+                dedupe=self.context_dedupe,
+                max_sentences=self.context_sentences,
+                score_sentences=self._score_sentences
             )
             
             # QA zinciri oluştur
@@ -236,14 +1175,290 @@ class RAGPipeline:
                 verbose=False
             )
             
-            print(f"✓ QA zinciri oluşturuldu (k={k}, MMR fetch_k={fetch_k}) - ÇEŞİTLİ GETİRME AKTİF")
+            budget = f"{self.context_max_tokens} token" if self.context_max_tokens > 0 else "sınırsız"
+            print(f"✓ QA zinciri oluşturuldu (k={k}, MMR fetch_k={fetch_k}, bağlam bütçesi {budget}) - ÇEŞİTLİ GETİRME AKTİF")
             
         except Exception as e:
             raise Exception(f"QA zinciri oluşturulamadı: {str(e)}")
     
+    @staticmethod
+    def _build_question(question: str) -> str:
+        """Kullanıcı sorusunu asistan talimatlarıyla sarar (Türkçe için optimize)"""
+        return f"""
+Sen bir film uzmanı asistanısın. Sana verilen film eleştirileri bilgi tabanını kullanarak 
+kullanıcının sorusuna detaylı, bilgilendirici ve dostça bir şekilde cevap ver.
+
+Kullanıcı Sorusu: {question}
+
+Gerektiğinde en az 3 farklı filmden örnek ver ve aynı filmin tekrarı yerine
+çeşitliliği artır. Mümkünse film adlarını açıkça belirt.
+"""
+    
+    @staticmethod
+    def _error_result(question: str, error: Exception) -> dict:
+        return {
+            'answer': f"Üzgünüm, bir hata oluştu: {str(error)}",
+            'source_documents': [],
+            'question': question,
+            'error': str(error)
+        }
+    
+    def _read_index_version(self) -> str:
+        """
+        Diskteki indeksin sürümü: nesil işaretçilerinin ve (eski düzende) indeks/docstore dosyalarının
+        boyut ve mtime özeti. Sorgu başına değil, yükleme ve kayıt sonrasında bir kez okunur.
+        """
+        digest = hashlib.sha1()
+        patterns = ('index.faiss', DOCSTORE_FILENAME, SHARDS_FILENAME, CURRENT_FILENAME,
+                    os.path.join('shard_*', 'index.faiss'), os.path.join('shard_*', DOCSTORE_FILENAME),
+                    os.path.join('shard_*', CURRENT_FILENAME))
+        for pattern in patterns:
+            for path in sorted(glob.glob(os.path.join(self.persist_directory, pattern))):
+                stat = os.stat(path)
+                digest.update(f"{os.path.relpath(path, self.persist_directory)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        return digest.hexdigest()[:16]
+    
+    def _answer_cache_scope(self) -> str:
+        """Cevap önbelleği kapsamı: indeks sürümü, embedding modeli, LLM sağlayıcısı/modeli, k ve bağlam ayarları"""
+        model = getattr(self.llm, 'model', None) or getattr(self.llm, 'model_name', '')
+        k = self.retriever.k if self.retriever is not None else 0
+        context = f"{self.context_max_tokens}:{int(self.context_dedupe)}:{self.context_sentences}"
+        embeddings = getattr(self.embeddings, 'cache_namespace', '')
+        return f"{self._index_version}|{embeddings}|{self.model_provider}:{model}|k={k}|ctx={context}"
+    
+    def _cached_answer(self, question: str, vector: Optional[np.ndarray] = None) -> Tuple[Optional[dict], Optional[np.ndarray]]:
+        """
+        Cevap önbelleğine bakar. Anahtar talimatlarla sarılmamış sorunun embedding'idir (sorgu
+        vektörü LRU'sundan gelir); ortak talimat metni sorular arasındaki benzerliği şişirmez.
+        
+        Args:
+            question: Kullanıcı sorusu
+            vector: Sorunun önceden hesaplanmış embedding'i (None = burada gömülür)
+            
+        Returns:
+            (isabet varsa query() biçiminde sonuç, yoksa None; önbelleğe yazmak için soru vektörü)
+        """
+        if self.answer_cache is None:
+            return None, None
+        with stage('answer_cache'):
+            if vector is None:
+                vector = self.embeddings.embed_query_array(question)
+            hit = self.answer_cache.lookup(vector, self._answer_cache_scope())
+        if hit is None:
+            return None, vector
+        return {
+            'answer': hit['answer'],
+            'source_documents': hit['source_documents'],
+            'question': question,
+            'cached': True
+        }, vector
+    
+    def _remember_answer(self, vector: Optional[np.ndarray], result: dict):
+        if self.answer_cache is not None and vector is not None:
+            self.answer_cache.put(
+                vector, self._answer_cache_scope(), result['question'], result['answer'], result['source_documents']
+            )
+    
+    def _count_tokens(self, text: str) -> int:
+        """
+        Token sayısı. LLM'in tokenizer'ı lokal olmadığından embedding modelinin
+        tokenizer'ı yaklaşık ölçü olarak kullanılır (yoksa ~4 karakter = 1 token).
+        """
+        tokenizer = getattr(getattr(self.embeddings, 'embeddings', self.embeddings), 'tokenizer', None)
+        if tokenizer is None:
+            return max(1, len(text) // 4) if text else 0
+        return len(tokenizer.encode(text, add_special_tokens=False, verbose=False))
+    
+    def _score_sentences(self, question: str, sentences: List[str]) -> np.ndarray:
+        """Cümlelerin soruya kosinüs benzerliği (tek forward pass, belge önbelleği atlanır)"""
+        model = getattr(self.embeddings, 'embeddings', self.embeddings)
+        vectors = model.embed_documents_array([question] + sentences)
+        vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors[1:] @ vectors[0]
+    
+    def _render_prompt(self, prompt: str, documents: List[Document]):
+        """QA zincirinin "stuff" prompt'unu belgelerle doldurur (LLM'e gidecek PromptValue)"""
+        chain = self.qa_chain.combine_documents_chain
+        context = chain.document_separator.join(format_document(doc, chain.document_prompt) for doc in documents)
+        return chain.llm_chain.prompt.invoke({chain.document_variable_name: context, 'question': prompt})
+    
+    def _assemble_context(self, question: str, prompt: str, documents: List[Document]) -> Tuple[List[Document], dict]:
+        """
+        Getirilen belgeleri LLM bağlamına dönüştürür: örtüşme temizliği, opsiyonel cümle
+        seçimi ve prompt'un tamamı için token bütçesi
+        
+        Returns:
+            (LLM'e verilecek belgeler, bağlam istatistikleri - prompt_tokens dahil)
+        """
+        chain = self.qa_chain.combine_documents_chain
+        with stage('context'):
+            overhead = self._count_tokens(self._render_prompt(prompt, []).to_string())
+            return self.context_assembler.assemble(
+                question,
+                documents,
+                overhead_tokens=overhead,
+                separator_tokens=self._count_tokens(chain.document_separator)
+            )
+    
+    def _answer_result(self, question: str, answer: str, documents: List[Document], context_stats: dict) -> dict:
+        """query() biçiminde sonuç; kaynak olarak getirilen özgün belgeler döner (derlenen bağlam yalnızca prompt'ta)"""
+        return {
+            'answer': answer,
+            'source_documents': documents,
+            'question': question,
+            'prompt_tokens': context_stats['prompt_tokens'],
+            'context_stats': context_stats
+        }
+    
+    def get_llm_stats(self) -> List[dict]:
+        """LLM backend'lerinin devre durumu, hata oranı ve gecikmesi (LLM yoksa boş)"""
+        return self.llm.get_stats() if isinstance(self.llm, LLMRouter) else []
+    
+    def get_latency_summary(self, kind: Optional[str] = None) -> dict:
+        """
+        Aşama sürelerinin kayan pencere özeti (süreç geneli)
+        
+        Args:
+            kind: 'query', 'query_batch', 'search', 'build', 'update' (None = hepsi)
+            
+        Returns:
+            {iş tipi: {aşama: {'count', 'p50_ms', 'p95_ms', 'p99_ms', 'mean_ms'}}}
+        """
+        return self.tracer.summary(kind)
+    
+    @staticmethod
+    def _finish_trace(trace, result: dict) -> dict:
+        trace.finish(
+            cached=bool(result.get('cached')),
+            error=bool(result.get('error')),
+            prompt_tokens=result.get('prompt_tokens')
+        )
+        return result
+    
+    def get_answer_cache_stats(self) -> Optional[dict]:
+        """Cevap önbelleği istatistiklerini döndürür (önbellek kapalıysa None)"""
+        return self.answer_cache.stats() if self.answer_cache else None
+    
     def query(self, question: str) -> dict:
         """
-        Kullanıcı sorusuna cevap üretir
+        Kullanıcı sorusuna cevap üretir. Aynı kapsamda (indeks sürümü, model, k) yeterince
+        benzer bir soru daha önce cevaplandıysa cevap önbellekten döner.
+        
+        Args:
+            question: Kullanıcının sorusu
+            
+        Returns:
+            Cevap, LLM'e verilen kaynak belgeler ve prompt token sayısı ('prompt_tokens',
+            ayrıntılar 'context_stats') içeren dict (önbellekten geldiyse 'cached': True)
+        """
+        if self.qa_chain is None:
+            raise ValueError("Önce QA zinciri oluşturulmalıdır")
+        
+        trace = self.tracer.start('query', mode='invoke')
+        try:
+            with activate(trace):
+                cached, question_vector = self._cached_answer(question)
+                if cached is not None:
+                    return self._finish_trace(trace, cached)
+                
+                prompt = self._build_question(question)
+                sources = self.retriever.select(self.retriever.embed_query(prompt))
+                docs, context_stats = self._assemble_context(question, prompt, sources)
+                
+                # Derlenen bağlamla "stuff" zincirini çalıştır (invoke kullan, __call__ deprecated)
+                chain = self.qa_chain.combine_documents_chain
+                with stage('llm_total'):
+                    output = chain.invoke({'input_documents': docs, 'question': prompt})
+            
+            answer = self._answer_result(question, output[chain.output_key], sources, context_stats)
+            self._remember_answer(question_vector, answer)
+            return self._finish_trace(trace, answer)
+            
+        except Exception as e:
+            return self._finish_trace(trace, self._error_result(question, e))
+    
+    @staticmethod
+    def _emit(trace, event: dict) -> Iterator[dict]:
+        # Olayı okuyan tarafın (arayüz) bir sonraki olayı isteyene kadar geçen süresi = render
+        start = time.perf_counter()
+        yield event
+        trace.add('render', time.perf_counter() - start)
+    
+    def stream_query(self, question: str) -> Iterator[dict]:
+        """
+        query()'nin akış (streaming) hali: önce kaynak belgeler, ardından LLM'in ürettiği
+        cevap parçaları geldikçe olay olarak döndürülür. İlk görünür çıktı getirme
+        süresi + ilk token süresi kadar sonra gelir.
+        
+        Args:
+            question: Kullanıcının sorusu
+            
+        Yields:
+            {'type': 'sources', 'source_documents': [...]} (bir kez, ilk olay),
+            {'type': 'token', 'content': str} (her cevap parçası için),
+            son olarak query() ile aynı alanları taşıyan {'type': 'done', ...}
+            (hata durumunda {'type': 'error', ...})
+        """
+        if self.qa_chain is None:
+            raise ValueError("Önce QA zinciri oluşturulmalıdır")
+        
+        docs: List[Document] = []
+        parts: List[str] = []
+        # Okuyan taraf akışı yarıda bırakırsa da iş kapatılır (finally)
+        trace = self.tracer.start('query', mode='stream')
+        result: dict = {}
+        try:
+            # Bağlam yalnızca yield içermeyen bloklarda etkin; okuyan tarafa sızmaz
+            with activate(trace):
+                cached, question_vector = self._cached_answer(question)
+            if cached is not None:
+                result = cached
+                # Önbellekteki cevap tek parça halinde akıtılır
+                yield from self._emit(trace, {'type': 'sources', 'source_documents': cached['source_documents']})
+                yield from self._emit(trace, {'type': 'token', 'content': cached['answer']})
+                yield from self._emit(trace, {'type': 'done', **cached})
+                return
+            
+            prompt = self._build_question(question)
+            with activate(trace):
+                sources = self.retriever.select(self.retriever.embed_query(prompt))
+                docs, context_stats = self._assemble_context(question, prompt, sources)
+                prompt_value = self._render_prompt(prompt, docs)
+            result = {'prompt_tokens': context_stats['prompt_tokens']}
+            yield from self._emit(trace, {'type': 'sources', 'source_documents': sources})
+            
+            # QA zincirinin "stuff" prompt'unu aynı şekilde kur, LLM çıktısını parça parça akıt;
+            # LLM süresi yalnızca parça beklenen süredir (render hariç)
+            llm_started = time.perf_counter()
+            chunks = iter(self.llm.stream(prompt_value))
+            while True:
+                waited = time.perf_counter()
+                chunk = next(chunks, None)
+                trace.add('llm_total', time.perf_counter() - waited)
+                if chunk is None:
+                    break
+                content = getattr(chunk, 'content', chunk)
+                if content and isinstance(content, str):
+                    if not parts:
+                        trace.add('llm_first_token', time.perf_counter() - llm_started)
+                    parts.append(content)
+                    yield from self._emit(trace, {'type': 'token', 'content': content})
+            
+            result = self._answer_result(question, ''.join(parts), sources, context_stats)
+            self._remember_answer(question_vector, result)
+            yield from self._emit(trace, {'type': 'done', **result})
+            
+        except Exception as e:
+            result = self._error_result(question, e)
+            yield {'type': 'error', **result}
+        finally:
+            self._finish_trace(trace, result)
+    
+    async def aquery(self, question: str) -> dict:
+        """
+        query()'nin asenkron hali. Embedding ve FAISS araması olay döngüsünü bloklamadan
+        bir iş parçacığı havuzunda (executor) yürür, LLM çağrısı sağlayıcının asenkron
+        API'siyle (ainvoke) yapılır; böylece tek olay döngüsü birçok konuşmaya hizmet verebilir.
         
         Args:
             question: Kullanıcının sorusu
@@ -254,33 +1469,99 @@ class RAGPipeline:
         if self.qa_chain is None:
             raise ValueError("Önce QA zinciri oluşturulmalıdır")
         
+        # Görev başına bağlam: eşzamanlı sorgular kendi işlerine yazar
+        trace = self.tracer.start('query', mode='async')
         try:
-            # Prompt'u Türkçe için optimize et
-            enhanced_question = f"""
-Sen bir film uzmanı asistanısın. Sana verilen film eleştirileri bilgi tabanını kullanarak 
-kullanıcının sorusuna detaylı, bilgilendirici ve dostça bir şekilde cevap ver.
-
-Kullanıcı Sorusu: {question}
-
-Gerektiğinde en az 3 farklı filmden örnek ver ve aynı filmin tekrarı yerine
-çeşitliliği artır. Mümkünse film adlarını açıkça belirt.
-"""
+            with activate(trace):
+                loop = asyncio.get_running_loop()
+                # Gömme, önbellek ve arama iş parçacığında yürür; asyncio.to_thread bağlamı kopyalar,
+                # aşamalar bu işe yazılır
+                cached, question_vector = await asyncio.to_thread(self._cached_answer, question)
+                if cached is not None:
+                    return self._finish_trace(trace, cached)
+                
+                prompt = self._build_question(question)
+                vector = await asyncio.to_thread(self.retriever.embed_query, prompt)
+                sources = await asyncio.to_thread(self.retriever.select, vector)
+                # run_in_executor bağlamı taşımaz; executor'daki aşama burada ölçülür
+                with stage('context'):
+                    docs, context_stats = await loop.run_in_executor(None, self._assemble_context, question, prompt, sources)
+                
+                chain = self.qa_chain.combine_documents_chain
+                with stage('llm_total'):
+                    output = await chain.ainvoke({'input_documents': docs, 'question': prompt})
             
-            # Sorguyu çalıştır (invoke kullan, __call__ deprecated)
-            result = self.qa_chain.invoke({"query": enhanced_question})
+            answer = self._answer_result(question, output[chain.output_key], sources, context_stats)
+            self._remember_answer(question_vector, answer)
+            return self._finish_trace(trace, answer)
             
-            return {
-                'answer': result['result'],
-                'source_documents': result['source_documents'],
-                'question': question
-            }
+        except Exception as e:
+            return self._finish_trace(trace, self._error_result(question, e))
+    
+    def query_batch(self, questions: List[str], max_concurrency: Optional[int] = None) -> List[dict]:
+        """
+        Birden fazla soruyu cevaplar. Sorular tek forward pass'te gömülür, belgeler tek
+        çok sorgulu FAISS aramasıyla getirilir; LLM çağrıları sınırlı eşzamanlılıkla yürür.
+        
+        Args:
+            questions: Kullanıcı soruları
+            max_concurrency: Aynı anda yürüyen en fazla LLM çağrısı (.env: LLM_MAX_CONCURRENCY)
             
+        Returns:
+            Her soru için query() ile aynı biçimde dict, giriş sırasıyla
+        """
+        if self.qa_chain is None:
+            raise ValueError("Önce QA zinciri oluşturulmalıdır")
+        if not questions:
+            return []
+        
+        results: List[Optional[dict]] = [None] * len(questions)
+        question_vectors: List[Optional[np.ndarray]] = [None] * len(questions)
+        trace = self.tracer.start('query_batch', questions=len(questions))
+        try:
+            with activate(trace):
+                if self.answer_cache is not None:
+                    with stage('answer_cache'):
+                        # Önbellek için talimatsız sorular da tek forward pass'te gömülür
+                        question_vectors = list(self.embeddings.embed_queries_array(questions))
+                    for i, (question, vector) in enumerate(zip(questions, question_vectors)):
+                        results[i], _ = self._cached_answer(question, vector)
+                pending = [i for i, result in enumerate(results) if result is None]
+                if not pending:
+                    trace.finish(cached=len(questions), errors=0)
+                    return results
+                prompts = {i: self._build_question(questions[i]) for i in pending}
+                # Retriever query() ile aynı metni (talimatlarla sarılmış soru) gömer
+                with stage('embed'):
+                    vectors = self.embeddings.embed_queries_array([prompts[i] for i in pending])
+                sources = self.retriever.select_batch(vectors)
+                contexts = [
+                    self._assemble_context(questions[i], prompts[i], docs)
+                    for i, docs in zip(pending, sources)
+                ]
         except Exception as e:
-            return {
-                'answer': f"Üzgünüm, bir hata oluştu: {str(e)}",
-                'source_documents': [],
-                'question': question
-            }
+            trace.finish(error=True)
+            return [result or self._error_result(question, e) for question, result in zip(questions, results)]
+        
+        combine_chain = self.qa_chain.combine_documents_chain
+        with trace.stage('llm_total'):
+            outputs = combine_chain.batch(
+                [{'input_documents': docs, 'question': prompts[i]} for i, (docs, _) in zip(pending, contexts)],
+                config={'max_concurrency': max_concurrency or self.llm_max_concurrency},
+                return_exceptions=True
+            )
+        for i, docs, (_, context_stats), output in zip(pending, sources, contexts, outputs):
+            if isinstance(output, Exception):
+                results[i] = self._error_result(questions[i], output)
+            else:
+                results[i] = self._answer_result(questions[i], output[combine_chain.output_key], docs, context_stats)
+                self._remember_answer(question_vectors[i], results[i])
+        trace.finish(
+            cached=len(questions) - len(pending),
+            errors=sum(1 for result in results if result.get('error')),
+            prompt_tokens=sum(context_stats['prompt_tokens'] for _, context_stats in contexts)
+        )
+        return results
     
     def get_similar_documents(self, query: str, k: int = 3) -> List[Document]:
         """
@@ -296,10 +1577,67 @@ Gerektiğinde en az 3 farklı filmden örnek ver ve aynı filmin tekrarı yerine
         if self.vectorstore is None:
             raise ValueError("Önce vektör veritabanı oluşturulmalı veya yüklenmelidir")
         
+        trace = self.tracer.start('search', k=k)
+        try:
+            with trace.stage('embed'):
+                vector = self.embeddings.embed_query_array(query)
+            with trace.stage('search'):
+                if isinstance(self.vectorstore, ShardedVectorStore):
+                    # Shard'lara paralel dağıt, genel top-k'yı birleştir
+                    pairs = self.vectorstore.similarity_search_with_score_by_vector(vector, k)
+                else:
+                    pairs = self.search_by_vector(vector, k)
+            trace.finish()
+            return [doc for doc, _ in pairs]
+        except Exception as e:
+            trace.finish(error=True)
+            raise Exception(f"Benzer belgeler alınamadı: {str(e)}")
+    
+    async def aget_similar_documents(self, query: str, k: int = 3) -> List[Document]:
+        """
+        get_similar_documents'ın asenkron hali: embedding ve arama executor'da yürür,
+        olay döngüsü bloklanmaz
+        
+        Args:
+            query: Arama sorgusu
+            k: Döndürülecek belge sayısı
+            
+        Returns:
+            Benzer belgelerin listesi
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get_similar_documents, query, k)
+    
+    def get_similar_documents_batch(self, queries: List[str], k: int = 3) -> List[List[Document]]:
+        """
+        get_similar_documents'ın çok sorgulu hali: sorgular tek forward pass'te gömülür
+        ve tek FAISS aramasıyla (shard'lı veritabanında shard başına bir arama) aranır
+        
+        Args:
+            queries: Arama sorguları
+            k: Sorgu başına döndürülecek belge sayısı
+            
+        Returns:
+            Her sorgu için benzer belgelerin listesi, giriş sırasıyla
+        """
+        if self.vectorstore is None:
+            raise ValueError("Önce vektör veritabanı oluşturulmalı veya yüklenmelidir")
+        if not queries:
+            return []
+        
+        trace = self.tracer.start('search_batch', k=k, queries=len(queries))
         try:
-            docs = self.vectorstore.similarity_search(query, k=k)
-            return docs
+            with trace.stage('embed'):
+                vectors = self.embeddings.embed_queries_array(queries)
+            with trace.stage('search'):
+                if isinstance(self.vectorstore, ShardedVectorStore):
+                    results = self.vectorstore.search_by_vectors(vectors, k)
+                else:
+                    results = self.search_by_vectors(vectors, k)
+            trace.finish()
+            return [[doc for doc, _ in pairs] for pairs in results]
         except Exception as e:
+            trace.finish(error=True)
             raise Exception(f"Benzer belgeler alınamadı: {str(e)}")
 
 
@@ -0,0 +1,152 @@
+"""
+Retriever Modülü - Arama sırasında alınan aday vektörleri üzerinde tek matris hesabıyla
+çalışan MMR (maximal marginal relevance) seçimi ve RAGPipeline için LangChain retriever'ı
+"""
+from typing import Any, List, Sequence, Tuple
+import numpy as np
+from langchain.schema import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+from src.tracing import stage
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    """Satırları birim uzunluğa getirir; sıfır vektörler sıfır kalır (benzerlikleri 0 olur)"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def mmr_select(query: np.ndarray, candidates: np.ndarray, k: int = 4, lambda_mult: float = 0.5) -> List[int]:
+    """
+    MMR ile k aday seçer. Sorgu ve aday-aday kosinüs benzerlikleri tek seferde
+    hesaplanır; her adımda yalnızca seçilenlere en yüksek benzerlik vektörü güncellenir.
+    Seçim sırası ve eşitlik durumları LangChain'in maximal_marginal_relevance'ı ile aynıdır.
+
+    Args:
+        query: (boyut,) sorgu vektörü
+        candidates: (n, boyut) aday vektörleri
+        k: Seçilecek aday sayısı
+        lambda_mult: 1 = yalnızca alaka, 0 = yalnızca çeşitlilik
+
+    Returns:
+        Seçilen adayların satır indeksleri, seçim sırasıyla
+    """
+    candidates = np.asarray(candidates, dtype=np.float32)
+    k = min(k, len(candidates))
+    if k <= 0:
+        return []
+    unit = _unit_rows(candidates)
+    query_unit = _unit_rows(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+    query_similarity = unit @ query_unit
+    pair_similarity = unit @ unit.T
+
+    first = int(np.argmax(query_similarity))
+    selected = [first]
+    # Her adayın seçilenlere en yüksek benzerliği (artımlı güncellenir)
+    redundancy = pair_similarity[first].copy()
+    available = np.ones(len(candidates), dtype=bool)
+    available[first] = False
+    relevance = lambda_mult * query_similarity
+    for _ in range(1, k):
+        scores = relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, pair_similarity[best], out=redundancy)
+    return selected
+
+
+def merge_candidates(
+    parts: Sequence[Tuple[np.ndarray, np.ndarray, np.ndarray]], fetch_k: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Birden fazla kaynağın MMR adaylarını L2 mesafesine göre genel en yakın fetch_k'ya
+    indirger. Anahtarlar (kaynak sırası, kaynağın kendi anahtarı) çiftlerine dönüşür.
+    """
+    keys = np.concatenate([
+        np.column_stack((np.full(len(part_keys), position, dtype=np.int64), part_keys))
+        for position, (part_keys, _, _) in enumerate(parts)
+    ])
+    distances = np.concatenate([part[1] for part in parts])
+    vectors = np.concatenate([part[2] for part in parts])
+    order = np.argsort(distances, kind='stable')[:fetch_k]
+    return keys[order], distances[order], vectors[order]
+
+
+def select_documents(source: Any, vector: np.ndarray, k: int, fetch_k: int, lambda_mult: float) -> List[Document]:
+    """
+    Kaynaktan fetch_k aday alır, MMR ile k tanesini seçer ve yalnızca seçilenlerin
+    belgelerini okur
+
+    Args:
+        source: mmr_candidates_batch(vectors, fetch_k) ve candidate_documents(keys) sağlayan nesne
+        vector: (boyut,) sorgu vektörü
+        k: Döndürülecek belge sayısı
+        fetch_k: MMR'a giren aday sayısı
+        lambda_mult: 1 = yalnızca alaka, 0 = yalnızca çeşitlilik
+
+    Returns:
+        Seçim sırasıyla belgeler
+    """
+    vector = np.asarray(vector, dtype=np.float32)
+    return select_documents_batch(source, vector.reshape(1, -1), k, fetch_k, lambda_mult)[0]
+
+
+def select_documents_batch(
+    source: Any, vectors: np.ndarray, k: int, fetch_k: int, lambda_mult: float
+) -> List[List[Document]]:
+    """
+    select_documents'ın çok sorgulu hali: adaylar tek aramada alınır, seçilen
+    belgelerin tamamı tek seferde okunur
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    with stage('search'):
+        candidates_per_query = source.mmr_candidates_batch(vectors, fetch_k)
+    selections = []
+    with stage('mmr'):
+        for vector, (keys, _, candidates) in zip(vectors, candidates_per_query):
+            selections.append(keys[mmr_select(vector, candidates, k, lambda_mult)])
+    if not any(len(keys) for keys in selections):
+        return [[] for _ in selections]
+    with stage('fetch'):
+        docs = source.candidate_documents(np.concatenate([keys for keys in selections if len(keys)]))
+    results, offset = [], 0
+    for keys in selections:
+        results.append([doc for doc in docs[offset:offset + len(keys)] if doc is not None])
+        offset += len(keys)
+    return results
+
+
+class MMRRetriever(BaseRetriever):
+    """
+    MMR retriever'ı: adaylar vektörleriyle birlikte tek aramada alınır (bkz.
+    RAGPipeline.mmr_candidates_batch, ShardedVectorStore.mmr_candidates_batch) ve mmr_select ile
+    seçilir; LangChain'in aday başına reconstruct + Python döngüsü yolunun yerine geçer.
+    """
+
+    source: Any
+    """mmr_candidates_batch(vectors, fetch_k) ve candidate_documents(keys) sağlayan nesne"""
+    embeddings: Any
+    k: int = 4
+    fetch_k: int = 20
+    lambda_mult: float = 0.5
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def embed_query(self, query: str) -> np.ndarray:
+        with stage('embed'):
+            if hasattr(self.embeddings, 'embed_query_array'):
+                return self.embeddings.embed_query_array(query)
+            return np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+
+    def select(self, vector: np.ndarray) -> List[Document]:
+        """Sorgu vektörü için MMR ile seçilmiş k belge"""
+        return select_documents(self.source, vector, self.k, self.fetch_k, self.lambda_mult)
+
+    def select_batch(self, vectors: np.ndarray) -> List[List[Document]]:
+        """Her sorgu vektörü için MMR ile seçilmiş k belge (tek arama, tek docstore okuması)"""
+        return select_documents_batch(self.source, vectors, self.k, self.fetch_k, self.lambda_mult)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.select(self.embed_query(query))
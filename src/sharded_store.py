@@ -0,0 +1,247 @@
+"""
+Shard Modülü - Vektör veritabanını kaynak dosyaya ya da chunk özetine göre N bağımsız
+indekse böler; aramalar shard'lara paralel dağıtılıp genel top-k olarak birleştirilir
+"""
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from langchain.schema import Document
+from langchain.embeddings.base import Embeddings
+from langchain_core.vectorstores import VectorStore
+from src.data_processor import DataProcessor
+from src.retriever import merge_candidates, select_documents
+
+
+SHARDS_FILENAME = "shards.json"
+SHARD_STRATEGIES = ('source', 'hash')
+
+
+def shard_name(shard_id: int) -> str:
+    return f"shard_{shard_id:03d}"
+
+
+def assign_shard(key: str, count: int) -> int:
+    """Anahtarı süreçler ve çalıştırmalar arasında sabit olan bir shard'a eşler"""
+    # crc32'nin alt bitleri benzer dosya adlarında (p0.csv, p1.csv) çakışır; md5 düzgün dağılır
+    return int(hashlib.md5(key.encode('utf-8')).hexdigest()[:8], 16) % count
+
+
+def shard_of_document(doc: Document, count: int, by: str) -> int:
+    """Chunk'ın shard'ı: 'source' -> kaynak dosya adına göre, 'hash' -> chunk metnine göre"""
+    if by == 'source':
+        return assign_shard(os.path.basename(doc.metadata.get('source', '')), count)
+    return assign_shard(doc.page_content, count)
+
+
+def save_shard_config(persist_directory: str, config: dict):
+    """Shard düzenini (sayı, bölme yöntemi, indeks tipi) atomik olarak yazar"""
+    os.makedirs(persist_directory, exist_ok=True)
+    path = os.path.join(persist_directory, SHARDS_FILENAME)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+def load_shard_config(persist_directory: str) -> Optional[dict]:
+    """Kayıtlı shard düzenini okur (tek indeksli veritabanında None)"""
+    path = os.path.join(persist_directory, SHARDS_FILENAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class ShardDataProcessor(DataProcessor):
+    """
+    Yalnızca tek bir shard'a düşen dosyaları ('source') ya da chunk'ları ('hash')
+    üreten DataProcessor; shard'lar birbirinden bağımsız kurulup güncellenebilir.
+    'hash' bölmede chunk'ın shard'ı metninden belli olduğundan her shard tüm dosyaları
+    okuyup bölmek zorundadır: N shard için okuma ve chunking N kez yapılır (gömme ve
+    indeksleme yine tek kez). Okuma maliyeti baskınsa 'source' bölme tercih edilmeli.
+    """
+
+    def __init__(self, base: DataProcessor, shard_id: int, count: int, by: str):
+        super().__init__(chunk_size=base.chunk_size, chunk_overlap=base.chunk_overlap)
+        self.shard_id = shard_id
+        self.count = count
+        self.by = by
+
+    def list_data_files(self, directory_path: str) -> List[str]:
+        files = super().list_data_files(directory_path)
+        if self.by != 'source':
+            return files
+        return [path for path in files if assign_shard(os.path.basename(path), self.count) == self.shard_id]
+
+    def iter_file_documents(self, file_path: str, progress=None) -> Iterator[Document]:
+        documents = super().iter_file_documents(file_path, progress)
+        if self.by != 'hash':
+            return documents
+        return (doc for doc in documents if assign_shard(doc.page_content, self.count) == self.shard_id)
+
+
+def merge_summaries(summaries: List[dict], by: str) -> dict:
+    """
+    Shard özetlerini toplar. 'hash' bölmede her shard tüm dosyaları okuyup böldüğünden
+    dosya, kayıt ve chunk sayıları toplanmaz, en büyüğü alınır (gömülen/indekslenen
+    chunk'lar shard'lar arasında paylaşıldığından toplanır).
+    """
+    corpus_keys = {'files', 'files_failed', 'records', 'chunks', 'added', 'changed', 'deleted', 'unchanged'}
+    merged: dict = {'shards': len(summaries)}
+    for summary in summaries:
+        for key, value in summary.items():
+            if isinstance(value, bool):
+                merged[key] = merged.get(key, False) or value
+            elif isinstance(value, (int, float)):
+                if key in corpus_keys and by == 'hash':
+                    merged[key] = max(merged.get(key, 0), value)
+                else:
+                    merged[key] = merged.get(key, 0) + value
+    if 'seconds' in merged:
+        merged['seconds'] = round(merged['seconds'], 2)
+    return merged
+
+
+class LazyShard:
+    """Diskteki bir shard; ilk kullanımda (bir kez, iş parçacığı güvenli) yüklenir"""
+
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._shard = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._shard is not None
+
+    def get(self):
+        if self._shard is None:
+            with self._lock:
+                if self._shard is None:
+                    self._shard = self._loader()
+        return self._shard
+
+
+class ShardedVectorStore(VectorStore):
+    """
+    Shard'lar üzerinde LangChain VectorStore arayüzü. Her shard kendi indeksinde
+    top-k (MMR için fetch_k) arar; FAISS araması GIL'i bıraktığından shard'lar bir
+    iş parçacığı havuzunda eşzamanlı taranır ve sonuçlar L2 mesafesine göre birleştirilir.
+
+    Shard nesneleri search_by_vectors(vectors, k), mmr_candidates_batch(vectors, fetch_k)
+    ve candidate_documents(keys) sağlamalıdır (bkz. RAGPipeline).
+    """
+
+    def __init__(self, embedding: Embeddings, shards: List[LazyShard], max_workers: Optional[int] = None):
+        self._embedding = embedding
+        self.shards = shards
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or len(shards),
+            thread_name_prefix='faiss-shard'
+        )
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def loaded_shards(self) -> list:
+        """Şimdiye kadar açılmış shard'lar"""
+        return [shard.get() for shard in self.shards if shard.loaded]
+
+    def all_shards(self) -> list:
+        """Tüm shard'lar (açılmamış olanlar açılır)"""
+        return self._fan_out(lambda shard: shard)
+
+    def _fan_out(self, fn: Callable[[Any], Any]) -> list:
+        futures = [self._executor.submit(lambda lazy=lazy: fn(lazy.get())) for lazy in self.shards]
+        return [future.result() for future in futures]
+
+    def _embed_query(self, query: str) -> np.ndarray:
+        if hasattr(self._embedding, 'embed_query_array'):
+            return self._embedding.embed_query_array(query)
+        return np.asarray(self._embedding.embed_query(query), dtype=np.float32)
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: Iterable[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.search_by_vectors(np.asarray(embedding, dtype=np.float32).reshape(1, -1), k)[0]
+
+    def search_by_vectors(self, vectors: np.ndarray, k: int) -> List[List[Tuple[Document, float]]]:
+        """Çok sorgulu top-k: her shard tüm sorguları tek aramada tarar, sonuçlar sorgu başına birleştirilir"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        per_shard = self._fan_out(lambda shard: shard.search_by_vectors(vectors, k))
+        results = []
+        for query in range(len(vectors)):
+            pairs = [pair for shard_results in per_shard for pair in shard_results[query]]
+            pairs.sort(key=lambda pair: pair[1])
+            results.append(pairs[:k])
+        return results
+
+    def similarity_search_by_vector(self, embedding: Iterable[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def mmr_candidates_batch(
+        self, vectors: np.ndarray, fetch_k: int
+    ) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Shard'ların MMR adaylarından sorgu başına genel en yakın fetch_k (bkz.
+        RAGPipeline.mmr_candidates_batch). Anahtarlar (shard, satır) çiftleridir.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        per_shard = self._fan_out(lambda shard: shard.mmr_candidates_batch(vectors, fetch_k))
+        return [
+            merge_candidates([shard_candidates[query] for shard_candidates in per_shard], fetch_k)
+            for query in range(len(vectors))
+        ]
+
+    def candidate_documents(self, keys: np.ndarray) -> List[Optional[Document]]:
+        """mmr_candidates_batch anahtarlarının belgeleri; her shard'dan tek sorguda okunur"""
+        docs: List[Optional[Document]] = [None] * len(keys)
+        for shard_id in np.unique(keys[:, 0]):
+            positions = np.flatnonzero(keys[:, 0] == shard_id)
+            shard_docs = self.shards[int(shard_id)].get().candidate_documents(keys[positions, 1])
+            for position, doc in zip(positions, shard_docs):
+                docs[position] = doc
+        return docs
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: Iterable[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        **kwargs: Any
+    ) -> List[Document]:
+        # Genel fetch_k aday kümesi, ardından tek indeksteki MMR ile aynı seçim
+        return select_documents(self, np.asarray(embedding, dtype=np.float32), k, fetch_k, lambda_mult)
+
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        **kwargs: Any
+    ) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(self._embed_query(query), k, fetch_k, lambda_mult)
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return self._euclidean_relevance_score_fn
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[str]:
+        raise NotImplementedError("Shard'lara belge ekleme RAGPipeline.update_vectorstore ile yapılır")
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   **kwargs: Any) -> "ShardedVectorStore":
+        raise NotImplementedError("Shard'lı veritabanı RAGPipeline.ingest_directory ile kurulur")
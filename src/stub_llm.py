@@ -0,0 +1,96 @@
+"""
+Stub LLM Modülü - Ağa çıkmayan, deterministik cevap veren sohbet modeli: yük testi ve
+benchmark'larda gerçek Ollama/Gemini yerine "stub" sağlayıcısı olarak kullanılır. İlk token
+gecikmesi ve token hızı ayarlanabilir; aynı prompt her zaman aynı cevabı üretir.
+"""
+import time
+import asyncio
+import hashlib
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Deterministik sahte sohbet modeli. Cevap, prompt'un özetinden (sha1) ve prompt'taki
+    kelimelerden üretilir; süre = latency + (answer_tokens - 1) / tokens_per_second.
+    """
+
+    model: str = "stub"
+    latency: float = 0.5
+    """İlk token'a kadar geçen süre (saniye)"""
+    tokens_per_second: float = 50.0
+    """Token üretim hızı (0 = cevap tek seferde)"""
+    answer_tokens: int = 64
+    """Cevaptaki token (kelime) sayısı"""
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        words = prompt.split() or ["stub"]
+        digest = hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:8]
+        body = [words[i % len(words)] for i in range(max(0, self.answer_tokens - 1))]
+        return [f"[stub:{digest}]"] + [" " + word for word in body]
+
+    def _token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        tokens = self._tokens(messages)
+        time.sleep(self.latency + self._token_delay() * (len(tokens) - 1))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        tokens = self._tokens(messages)
+        await asyncio.sleep(self.latency + self._token_delay() * (len(tokens) - 1))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for i, token in enumerate(self._tokens(messages)):
+            if i:
+                time.sleep(self._token_delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for i, token in enumerate(self._tokens(messages)):
+            if i:
+                await asyncio.sleep(self._token_delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
@@ -0,0 +1,186 @@
+"""
+Tracing Modülü - Sorgu ve indeks kurulumu aşamalarının süre ölçümü: her iş (trace) için
+aşama süreleri JSON satırı olarak loglanır ve iş tipi/aşama başına kayan pencerede
+p50/p95/p99 özeti tutulur
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+import threading
+import contextlib
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, Optional, TypeVar
+import numpy as np
+
+
+T = TypeVar('T')
+
+_current: ContextVar[Optional["Trace"]] = ContextVar('rag_trace', default=None)
+
+
+class Trace:
+    """Tek bir işin (sorgu, kurulum) aşama süreleri; aynı aşama tekrar ölçülürse süreler toplanır"""
+
+    def __init__(self, tracer: "Tracer", kind: str, **attrs):
+        self.tracer = tracer
+        self.kind = kind
+        self.id = uuid.uuid4().hex[:12]
+        self.attrs = dict(attrs)
+        self.stages: Dict[str, float] = {}
+        self.started = time.perf_counter()
+        self.timestamp = time.time()
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def iterate(self, iterable: Iterable[T], name: str) -> Iterator[T]:
+        """iterable'ı tüketir; her elemanın üretilme süresi name aşamasına eklenir"""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(name, time.perf_counter() - start)
+                return
+            self.add(name, time.perf_counter() - start)
+            yield item
+
+    def finish(self, **attrs) -> Optional[dict]:
+        """İşi kapatır, loglar ve özete ekler (ikinci çağrı etkisizdir)"""
+        with self._lock:
+            if self.finished:
+                return None
+            self.finished = True
+            self.attrs.update(attrs)
+            stages = dict(self.stages)
+        record = {
+            'type': self.kind,
+            'trace_id': self.id,
+            'ts': round(self.timestamp, 3),
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'stages_ms': {name: round(seconds * 1000, 2) for name, seconds in stages.items()},
+            **self.attrs
+        }
+        self.tracer.record(record)
+        return record
+
+
+class Tracer:
+    """
+    İş tipi ve aşama başına son window ölçümü tutar. log_path verilirse her iş bir JSON
+    satırı olarak yazılır ("-" = stderr).
+    """
+
+    def __init__(self, window: int = 1000, log_path: Optional[str] = None):
+        self.window = window
+        self._samples: Dict[str, Dict[str, deque]] = {}
+        self._lock = threading.Lock()
+        self._logger = None
+        if log_path:
+            self._logger = logging.getLogger(f"rag.trace.{id(self)}")
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            if log_path == '-':
+                handler = logging.StreamHandler(sys.stderr)
+            else:
+                directory = os.path.dirname(log_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                handler = logging.FileHandler(log_path, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._logger.addHandler(handler)
+
+    def start(self, kind: str, **attrs) -> Trace:
+        return Trace(self, kind, **attrs)
+
+    def record(self, record: dict):
+        with self._lock:
+            samples = self._samples.setdefault(record['type'], {})
+            for name, ms in list(record['stages_ms'].items()) + [('total', record['total_ms'])]:
+                samples.setdefault(name, deque(maxlen=self.window)).append(ms)
+        if self._logger is not None:
+            self._logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+    def summary(self, kind: Optional[str] = None) -> Dict[str, Dict[str, dict]]:
+        """
+        Kayan pencere özeti
+
+        Returns:
+            {iş tipi: {aşama: {'count', 'p50_ms', 'p95_ms', 'p99_ms', 'mean_ms'}}}
+        """
+        with self._lock:
+            snapshot = {
+                name: {stage: np.fromiter(values, dtype=np.float64) for stage, values in stages.items()}
+                for name, stages in self._samples.items()
+                if kind is None or name == kind
+            }
+        result = {}
+        for name, stages in snapshot.items():
+            result[name] = {}
+            for stage, values in stages.items():
+                p50, p95, p99 = np.percentile(values, [50, 95, 99])
+                result[name][stage] = {
+                    'count': len(values),
+                    'p50_ms': round(float(p50), 2),
+                    'p95_ms': round(float(p95), 2),
+                    'p99_ms': round(float(p99), 2),
+                    'mean_ms': round(float(values.mean()), 2)
+                }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Süreç genelindeki tracer (.env: TRACE_WINDOW, TRACE_LOG); tüm oturumların ölçümleri birlikte özetlenir"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(
+                window=int(os.getenv('TRACE_WINDOW', '1000')),
+                log_path=os.getenv('TRACE_LOG') or None
+            )
+        return _tracer
+
+
+@contextlib.contextmanager
+def activate(trace: Optional[Trace]) -> Iterator[Optional[Trace]]:
+    """trace'i bu bağlamda geçerli iş yapar; stage() çağrıları ona yazılır"""
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+@contextlib.contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Geçerli işin aşamasını ölçer; etkin iş yoksa hiçbir şey yapmaz"""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    with trace.stage(name):
+        yield
@@ -0,0 +1,298 @@
+"""
+Vektör İndeks Modülü - FAISS index_factory ile seçilebilir indeks tipleri (Flat, IVF, HNSW)
+ve kuantize (SQ8 / fp16 / PQ) indeksler için kesin yeniden sıralama
+"""
+import os
+import json
+from typing import Optional, Tuple
+import faiss
+import numpy as np
+
+
+INDEX_CONFIG_FILENAME = "index_config.json"
+EXACT_VECTORS_FILENAME = "vectors.npy"
+DEFAULT_INDEX_SPEC = "Flat"
+# IVF eğitimi için küme başına örnek sayısı (FAISS önerisi 30-256 arası)
+TRAIN_POINTS_PER_CENTROID = 64
+# PQ alt kuantizörlerinin k-means eğitimi merkez başına en az bu kadar örnek ister (altında FAISS uyarır)
+PQ_TRAIN_POINTS_PER_CENTROID = 39
+# Kuantizasyon/HNSW eğitimi için kullanılacak en fazla vektör
+MAX_TRAIN_POINTS = 50000
+
+
+def build_index(vectors: np.ndarray, spec: str = DEFAULT_INDEX_SPEC, seed: int = 42) -> faiss.Index:
+    """
+    index_factory spesifikasyonuna göre boş bir indeks kurar, gerekiyorsa
+    vektörlerden alınan bir örnek üzerinde eğitir (vektörleri eklemez).
+
+    Args:
+        vectors: (n, boyut) float32 embedding matrisi
+        spec: FAISS index_factory tanımı, ör. "Flat", "IVF256,Flat", "HNSW32"
+        seed: Eğitim örneklemesi için rastgelelik tohumu
+
+    Returns:
+        Eğitilmiş (vektör eklenmemiş) FAISS indeksi
+    """
+    index = faiss.index_factory(vectors.shape[1], spec, faiss.METRIC_L2)
+    if not index.is_trained:
+        ivf = _extract_ivf(index)
+        min_points = ivf.nlist if ivf is not None else 1
+        if len(vectors) < min_points:
+            raise ValueError(
+                f"'{spec}' indeksini eğitmek için en az {min_points} vektör gerekli, {len(vectors)} var. "
+                f"Daha küçük bir nlist veya 'Flat' kullanın."
+            )
+        sample_size = min(len(vectors), _training_limit(index))
+        rng = np.random.default_rng(seed)
+        sample = vectors[np.sort(rng.choice(len(vectors), size=sample_size, replace=False))]
+        print(f"🏋️  '{spec}' indeksi {sample_size} vektörlük örnekle eğitiliyor...")
+        try:
+            index.train(np.ascontiguousarray(sample, dtype=np.float32))
+        except RuntimeError as e:
+            raise ValueError(f"'{spec}' indeksi eğitilemedi ({len(vectors)} vektör): {str(e)}")
+    prepare_index(index)
+    return index
+
+
+def training_size(spec: str, dimension: int) -> int:
+    """
+    İndeksin eğitimi için kullanılacak vektör sayısı (eğitim gerektirmeyen indekslerde 0).
+    Akış indekslemede ilk bu kadar vektör biriktirilip indeks onlarla eğitilir.
+    """
+    index = faiss.index_factory(dimension, spec, faiss.METRIC_L2)
+    return 0 if index.is_trained else _training_limit(index)
+
+
+def _training_limit(index: faiss.Index) -> int:
+    # IVF kaba kuantizörü ve PQ kod kitapları aynı örnekle eğitilir: ikisinin ihtiyacından büyüğü
+    ivf = _extract_ivf(index)
+    limit = ivf.nlist * TRAIN_POINTS_PER_CENTROID if ivf is not None else MAX_TRAIN_POINTS
+    pq = _extract_pq(index)
+    if pq is not None:
+        limit = max(limit, pq.ksub * PQ_TRAIN_POINTS_PER_CENTROID)
+    return limit
+
+
+def prepare_index(index: faiss.Index):
+    """IVF indekslerinde id -> vektör eşlemesini açar (MMR'nin reconstruct çağrısı için)"""
+    ivf = _extract_ivf(index)
+    if ivf is not None and ivf.direct_map.type == faiss.DirectMap.NoMap:
+        ivf.set_direct_map_type(faiss.DirectMap.Array)
+
+
+def set_search_params(index: faiss.Index, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+    """
+    Yeniden indekslemeden sorgu zamanı ayarlarını uygular
+
+    Args:
+        index: FAISS indeksi
+        nprobe: IVF'te taranacak küme sayısı
+        ef_search: HNSW arama derinliği
+    """
+    params = faiss.ParameterSpace()
+    if nprobe is not None and _extract_ivf(index) is not None:
+        params.set_index_parameter(index, 'nprobe', int(nprobe))
+    if ef_search is not None and _extract_hnsw(index) is not None:
+        params.set_index_parameter(index, 'efSearch', int(ef_search))
+
+
+def supports_removal(index: faiss.Index) -> bool:
+    """
+    Vektör silindikten sonra kalan id'ler 0..n-1 olarak sıkışıyor mu? LangChain'in
+    FAISS.delete'i buna dayanır; IVF id'leri korur, HNSW ise silmeyi hiç desteklemez.
+    """
+    return _extract_ivf(index) is None and _extract_hnsw(index) is None
+
+
+def is_quantized(spec: str) -> bool:
+    """Spesifikasyon kayıplı (skaler/ürün kuantizasyonlu) bir kodlama içeriyor mu"""
+    upper = spec.upper()
+    return 'SQ' in upper or 'PQ' in upper
+
+
+def infer_spec(index: faiss.Index) -> str:
+    """index_config.json olmayan eski indeksler için sınıf adından format tahmini"""
+    name = type(faiss.downcast_index(index)).__name__
+    return DEFAULT_INDEX_SPEC if name in ('IndexFlat', 'IndexFlatL2') else name
+
+
+def describe_index(index: faiss.Index, persist_directory: Optional[str] = None) -> dict:
+    """
+    İndeks formatını ve bellek kullanımını özetler
+
+    Returns:
+        type, ntotal, dimension, bytes_per_vector ve float32'ye göre compression içeren dict
+    """
+    ntotal = index.ntotal
+    index_path = os.path.join(persist_directory, 'index.faiss') if persist_directory else None
+    if index_path and os.path.exists(index_path):
+        total_bytes = os.path.getsize(index_path)
+    else:
+        total_bytes = len(faiss.serialize_index(index))
+    bytes_per_vector = total_bytes / ntotal if ntotal else 0.0
+    return {
+        'type': type(faiss.downcast_index(index)).__name__,
+        'ntotal': ntotal,
+        'dimension': index.d,
+        'bytes': total_bytes,
+        'bytes_per_vector': bytes_per_vector,
+        'compression': (4 * index.d) / bytes_per_vector if bytes_per_vector else 0.0
+    }
+
+
+class ExactVectors:
+    """
+    Kuantize indeksler için diskteki float32 vektör kopyası. Bellek eşlemeli (mmap)
+    açılır; yalnızca yeniden sıralanan aday satırlar diskten okunur.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.vectors = np.load(path, mmap_mode='r')
+
+    @staticmethod
+    def save(persist_directory: str, vectors: np.ndarray) -> str:
+        """Vektörleri atomik olarak vectors.npy dosyasına yazar"""
+        os.makedirs(persist_directory, exist_ok=True)
+        path = os.path.join(persist_directory, EXACT_VECTORS_FILENAME)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+        os.replace(tmp_path, path)
+        return path
+
+    def rerank(self, query: np.ndarray, candidate_ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Adayları kesin L2 mesafesine göre yeniden sıralar
+
+        Args:
+            query: (boyut,) sorgu vektörü
+            candidate_ids: Kuantize indeksin döndürdüğü satır indeksleri (-1 = boş)
+            k: Döndürülecek sonuç sayısı
+
+        Returns:
+            (mesafeler, satır indeksleri) - en yakından uzağa
+        """
+        ids = candidate_ids[candidate_ids >= 0]
+        if len(ids) == 0:
+            return np.empty(0, dtype=np.float32), ids
+        rows = np.asarray(self.vectors[ids], dtype=np.float32)
+        distances = ((rows - query.reshape(1, -1)) ** 2).sum(axis=1)
+        order = np.argsort(distances, kind='stable')[:k]
+        return distances[order], ids[order]
+
+
+class ExactVectorsWriter:
+    """
+    vectors.npy dosyasını gruplar halinde yazar: satırlar önce ham bir geçici dosyaya
+    eklenir, sonunda .npy başlığıyla birlikte parça parça kopyalanır (bellek sabit kalır).
+    Ham dosya, yarıda kalan bir kurulumda checkpoint'e kadar gömülmüş vektörleri de taşır.
+    """
+
+    def __init__(self, persist_directory: str, dimension: int, resume_rows: Optional[int] = None):
+        """
+        Args:
+            persist_directory: Dosyaların yazılacağı dizin
+            dimension: Vektör boyutu
+            resume_rows: Verilirse mevcut ham dosya bu satır sayısına kırpılıp devam edilir
+        """
+        os.makedirs(persist_directory, exist_ok=True)
+        self.persist_directory = persist_directory
+        self.dimension = dimension
+        self.rows = 0
+        self._raw_path = os.path.join(persist_directory, EXACT_VECTORS_FILENAME + '.raw')
+        if resume_rows and os.path.exists(self._raw_path):
+            self._raw = open(self._raw_path, 'r+b')
+            self._raw.truncate(resume_rows * dimension * 4)
+            self._raw.seek(0, os.SEEK_END)
+            self.rows = resume_rows
+        else:
+            self._raw = open(self._raw_path, 'wb')
+
+    def append(self, vectors: np.ndarray):
+        self._raw.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        self.rows += len(vectors)
+
+    def flush(self):
+        """Yazılanları diske kalıcı olarak indirir (checkpoint öncesi)"""
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+
+    def iter_blocks(self, block_rows: int):
+        """Şimdiye kadar yazılmış vektörleri block_rows satırlık float32 matrisler halinde okur"""
+        if not self.rows:
+            return
+        self._raw.flush()
+        raw = np.memmap(self._raw_path, dtype=np.float32, mode='r', shape=(self.rows, self.dimension))
+        for start in range(0, self.rows, block_rows):
+            yield np.array(raw[start:start + block_rows])
+
+    def finish(self, block_rows: int = 65536) -> str:
+        """Geçici dosyayı vectors.npy'ye çevirir ve atomik olarak yerine koyar"""
+        self._raw.close()
+        path = os.path.join(self.persist_directory, EXACT_VECTORS_FILENAME)
+        tmp_path = path + '.tmp'
+        raw = np.memmap(self._raw_path, dtype=np.float32, mode='r', shape=(self.rows, self.dimension)) \
+            if self.rows else np.empty((0, self.dimension), dtype=np.float32)
+        out = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(self.rows, self.dimension))
+        for start in range(0, self.rows, block_rows):
+            out[start:start + block_rows] = raw[start:start + block_rows]
+        out.flush()
+        del out, raw
+        os.replace(tmp_path, path)
+        os.remove(self._raw_path)
+        return path
+
+    def close(self):
+        """Ham dosyayı silmeden kapatır (checkpoint'ten devam için korunur)"""
+        self._raw.close()
+
+    def abort(self):
+        self._raw.close()
+        if os.path.exists(self._raw_path):
+            os.remove(self._raw_path)
+
+
+def save_index_config(persist_directory: str, config: dict):
+    """İndeks spesifikasyonunu ve arama ayarlarını indeksin yanına yazar"""
+    os.makedirs(persist_directory, exist_ok=True)
+    with open(os.path.join(persist_directory, INDEX_CONFIG_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=1)
+
+
+def load_index_config(persist_directory: str) -> dict:
+    """Kayıtlı indeks ayarlarını okur (eski indekslerde dosya yoksa Flat varsayılır)"""
+    path = os.path.join(persist_directory, INDEX_CONFIG_FILENAME)
+    if not os.path.exists(path):
+        return {'spec': DEFAULT_INDEX_SPEC}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _extract_ivf(index: faiss.Index):
+    try:
+        return faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return None
+
+
+def _extract_pq(index: faiss.Index):
+    # IVFPQ / PQ doğrudan, HNSWPQ storage, OPQ ön dönüşümü index içinde tutar
+    current = index
+    while current is not None:
+        current = faiss.downcast_index(current)
+        if hasattr(current, 'pq'):
+            return current.pq
+        current = getattr(current, 'index', None) or getattr(current, 'storage', None)
+    return None
+
+
+def _extract_hnsw(index: faiss.Index):
+    # IndexHNSWFlat / HNSWSQ vb. doğrudan ya da IDMap / PreTransform içinde olabilir
+    current = index
+    while current is not None:
+        current = faiss.downcast_index(current)
+        if hasattr(current, 'hnsw'):
+            return current
+        current = getattr(current, 'index', None)
+    return None
@@ -0,0 +1,166 @@
+"""
+Test ayarları - Proje kökü sys.path'e eklenir (src paketi testlerden içe aktarılabilsin) ve
+ağa çıkmayan küçük bir embedding modeli hazırlanır
+"""
+import os
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+# Küçük, rastgele ağırlıklı BERT'in sözlüğü: testler ağa çıkmadan embedding modeli yükler
+TEST_VOCABULARY = [
+    "[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]",
+    "film", "harika", "kötü", "uzun", "movie", "great", "bad", "soru", "cevap"
+]
+
+
+@pytest.fixture(scope="session")
+def embedding_model_dir(tmp_path_factory) -> str:
+    """Testlere özel küçük embedding modeli (anlamlı benzerlik üretmez, yalnızca boyut ve akış için)"""
+    from transformers import BertConfig, BertModel, BertTokenizer
+
+    path = tmp_path_factory.mktemp("embedding_model")
+    vocab_file = path / "vocab.txt"
+    vocab_file.write_text("\n".join(TEST_VOCABULARY) + "\n", encoding="utf-8")
+    BertTokenizer(vocab_file=str(vocab_file)).save_pretrained(str(path))
+    config = BertConfig(
+        vocab_size=len(TEST_VOCABULARY), hidden_size=32, num_hidden_layers=1, num_attention_heads=2, intermediate_size=64
+    )
+    BertModel(config).save_pretrained(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def make_pipeline(embedding_model_dir, tmp_path, monkeypatch):
+    """
+    Stub LLM'li, küçük bir indeks kurulmuş RAGPipeline üretir. Ortam değişkenleri (ör.
+    ANSWER_CACHE_SIZE, STUB_LLM_LATENCY) anahtar kelime olarak verilir.
+    """
+    from langchain_core.documents import Document
+    from src.rag_pipeline import RAGPipeline
+
+    def make(k: int = 2, **env):
+        settings = {
+            "EMBEDDING_MODEL": embedding_model_dir,
+            "EMBEDDING_CACHE_DIR": "none",
+            "ANSWER_CACHE_SIZE": "0",
+            "QUERY_CACHE_SIZE": "0",
+            "STUB_LLM_LATENCY": "0",
+            "STUB_LLM_TOKENS_PER_SEC": "0",
+            **env
+        }
+        for name, value in settings.items():
+            monkeypatch.setenv(name, str(value))
+        pipeline = RAGPipeline(persist_directory=str(tmp_path / "faiss_db"), model_provider="stub", fallback_providers=[])
+        words = ["harika", "kötü", "uzun", "great", "bad"]
+        pipeline.create_vectorstore([
+            Document(page_content=f"film {words[i % len(words)]} {i}", metadata={"source": f"doc{i}.txt", "title": f"Film {i}"})
+            for i in range(20)
+        ])
+        pipeline.create_qa_chain(k=k)
+        return pipeline
+
+    return make
+
+
+class FakeLLMServer:
+    """
+    Ollama (/api/chat, /api/generate, /api/tags) ve Gemini REST (/v1beta/models/...) uçlarını
+    taklit eden yerel HTTP sunucusu. delay (saniye) model çağrılarını geciktirir, fail True iken
+    model çağrıları 500 döner, healthy False iken sağlık yoklaması uçları hata verir.
+    """
+
+    def __init__(self):
+        self.delay = 0.0
+        self.fail = False
+        self.healthy = True
+        self.requests = []  # (metot, yol, gövde, istemci portu)
+        handler = type('Handler', (_FakeLLMHandler,), {'fake': self})
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def model_calls(self) -> int:
+        """Sağlık yoklamaları ve ısınma dışındaki (cevap üreten) istek sayısı"""
+        return sum(1 for method, path, _, _ in self.requests if method == 'POST' and path != '/api/generate')
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    fake: FakeLLMServer = None
+
+    def _reply(self, status: int, payload, content_type: str = 'application/json'):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.fake.requests.append(('GET', self.path, None, self.client_address[1]))
+        if not self.fake.healthy:
+            self._reply(503, {'error': 'unavailable'})
+        elif self.path == '/api/tags':
+            self._reply(200, {'models': [{'name': 'phi3:mini'}]})
+        else:
+            self._reply(200, {'name': self.path.split('?')[0].lstrip('/').split('/', 1)[-1]})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        path = self.path.split('?')[0]
+        self.fake.requests.append(('POST', path, body, self.client_address[1]))
+        if path == '/api/generate':
+            self._reply(200, {'model': body['model'], 'created_at': '2024-01-01T00:00:00Z', 'response': '', 'done': True})
+            return
+        time.sleep(self.fake.delay)
+        if self.fake.fail:
+            self._reply(500, {'error': 'boom', 'code': 500, 'message': 'boom', 'status': 'INTERNAL'})
+        elif path == '/api/chat':
+            lines = [
+                {'model': body['model'], 'created_at': '2024-01-01T00:00:00Z',
+                 'message': {'role': 'assistant', 'content': 'merhaba'}, 'done': False},
+                {'model': body['model'], 'created_at': '2024-01-01T00:00:00Z',
+                 'message': {'role': 'assistant', 'content': ''}, 'done': True, 'done_reason': 'stop'}
+            ]
+            self._reply(200, ''.join(json.dumps(line) + '\n' for line in lines).encode(), 'application/x-ndjson')
+        else:
+            model = path.rsplit('/', 1)[-1].split(':')[0]
+            payload = {'candidates': [{
+                'content': {'parts': [{'text': f'gemini {model} merhaba'}], 'role': 'model'},
+                'finishReason': 'STOP', 'index': 0
+            }]}
+            self._reply(200, [payload] if path.endswith(':streamGenerateContent') else payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_llm_server():
+    """Testin kendi sahte LLM sunucusu (her çağrıda yeni sunucu için fabrika)"""
+    servers = []
+
+    def start() -> FakeLLMServer:
+        servers.append(FakeLLMServer())
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
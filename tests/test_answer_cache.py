@@ -0,0 +1,145 @@
+"""
+Cevap Önbelleği Testleri - SemanticAnswerCache'in eşik, kapsam, LRU/TTL tahliyesi, kalıcılık
+ve sayaçları; pipeline'da önbellek anahtarının talimatsız soru embedding'i olduğu
+"""
+import asyncio
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from src import answer_cache as answer_cache_module
+from src.answer_cache import SemanticAnswerCache
+
+SCOPE = "v1|model|k=2"
+
+
+def vector(*values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float32)
+
+
+def put(cache: SemanticAnswerCache, key: np.ndarray, question: str, scope: str = SCOPE):
+    cache.put(key, scope, question, f"cevap: {question}", [Document(page_content=question, metadata={"source": "a.txt"})])
+
+
+def test_lookup_hits_above_threshold_and_misses_below():
+    cache = SemanticAnswerCache(threshold=0.95)
+    put(cache, vector(1, 0, 0), "soru")
+
+    hit = cache.lookup(vector(0.99, 0.1, 0), SCOPE)  # kosinüs ~0.995
+    assert hit["answer"] == "cevap: soru"
+    assert hit["question"] == "soru"
+    assert hit["similarity"] == pytest.approx(0.995, abs=1e-3)
+    assert hit["source_documents"][0].page_content == "soru"
+    assert cache.lookup(vector(0.9, 0.44, 0), SCOPE) is None  # kosinüs ~0.898
+    assert cache.lookup(vector(0, 1, 0), SCOPE) is None
+
+
+def test_lookup_returns_most_similar_entry():
+    cache = SemanticAnswerCache(threshold=0.9)
+    put(cache, vector(1, 0, 0), "birinci")
+    put(cache, vector(0.95, 0.31, 0), "ikinci")
+
+    assert cache.lookup(vector(0.96, 0.28, 0), SCOPE)["question"] == "ikinci"
+
+
+def test_scopes_are_isolated():
+    cache = SemanticAnswerCache(threshold=0.95)
+    put(cache, vector(1, 0, 0), "eski indeks", scope="v1")
+    put(cache, vector(1, 0, 0), "yeni indeks", scope="v2")
+
+    assert cache.lookup(vector(1, 0, 0), "v1")["question"] == "eski indeks"
+    assert cache.lookup(vector(1, 0, 0), "v2")["question"] == "yeni indeks"
+    assert cache.lookup(vector(1, 0, 0), "v3") is None
+
+
+def test_lru_eviction_keeps_recently_used_entries():
+    cache = SemanticAnswerCache(threshold=0.99, max_entries=2)
+    put(cache, vector(1, 0, 0), "a")
+    put(cache, vector(0, 1, 0), "b")
+    cache.lookup(vector(1, 0, 0), SCOPE)  # "a" en son kullanılan olur
+    put(cache, vector(0, 0, 1), "c")
+
+    assert cache.lookup(vector(0, 1, 0), SCOPE) is None
+    assert cache.lookup(vector(1, 0, 0), SCOPE)["question"] == "a"
+    assert cache.lookup(vector(0, 0, 1), SCOPE)["question"] == "c"
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 2
+
+
+def test_ttl_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache_module.time, "time", lambda: now[0])
+    cache = SemanticAnswerCache(threshold=0.95, ttl_seconds=60)
+    put(cache, vector(1, 0, 0), "soru")
+
+    now[0] += 59
+    assert cache.lookup(vector(1, 0, 0), SCOPE) is not None
+    now[0] += 2
+    assert cache.lookup(vector(1, 0, 0), SCOPE) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_persistence_round_trip(tmp_path):
+    path = str(tmp_path / "cache" / "answers.sqlite")
+    cache = SemanticAnswerCache(threshold=0.95, max_entries=2, path=path)
+    put(cache, vector(1, 0, 0), "a")
+    put(cache, vector(0, 1, 0), "b")
+    cache.lookup(vector(1, 0, 0), SCOPE)
+    cache.close()
+
+    # Yeniden açılışta LRU sırası korunur: en az kullanılan "b" ilk tahliye edilir
+    reopened = SemanticAnswerCache(threshold=0.95, max_entries=2, path=path)
+    hit = reopened.lookup(vector(1, 0, 0), SCOPE)
+    assert hit["answer"] == "cevap: a"
+    assert hit["source_documents"][0].metadata == {"source": "a.txt"}
+    put(reopened, vector(0, 0, 1), "c")
+    reopened.close()
+
+    final = SemanticAnswerCache(threshold=0.95, max_entries=2, path=path)
+    assert [final.lookup(key, SCOPE) is not None for key in (vector(1, 0, 0), vector(0, 1, 0), vector(0, 0, 1))] == [
+        True, False, True
+    ]
+    final.clear()
+    final.close()
+    assert SemanticAnswerCache(path=path).stats()["entries"] == 0
+
+
+def test_hit_rate_counters():
+    cache = SemanticAnswerCache(threshold=0.95)
+    assert cache.stats()["hit_rate"] == 0.0
+    cache.lookup(vector(1, 0, 0), SCOPE)  # boş kapsam: ıska
+    put(cache, vector(1, 0, 0), "soru")
+    cache.lookup(vector(1, 0, 0), SCOPE)
+    cache.lookup(vector(1, 0, 0), SCOPE)
+    cache.lookup(vector(0, 1, 0), SCOPE)
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+    assert stats["hit_rate"] == 0.5
+    assert stats["threshold"] == 0.95
+
+
+def test_pipeline_keys_cache_on_raw_question_embedding(make_pipeline):
+    rag = make_pipeline(ANSWER_CACHE_SIZE=16, QUERY_CACHE_SIZE=16)
+    lookups = []
+    lookup = rag.answer_cache.lookup
+    rag.answer_cache.lookup = lambda key, scope: lookups.append(key) or lookup(key, scope)
+
+    first = rag.query("harika film")
+    assert not first.get("cached") and not first.get("error")
+    # Anahtar talimatlarla sarılmış prompt'un değil, sorunun kendi embedding'idir
+    np.testing.assert_allclose(lookups[0], rag.embeddings.embed_query_array("harika film"), rtol=1e-5)
+
+    for repeat in (
+        rag.query("harika film"),
+        next(event for event in rag.stream_query("harika film") if event["type"] == "done"),
+        asyncio.run(rag.aquery("harika film")),
+        rag.query_batch(["harika film"])[0]
+    ):
+        assert repeat["cached"] is True
+        assert repeat["answer"] == first["answer"]
+        assert [doc.page_content for doc in repeat["source_documents"]] == [
+            doc.page_content for doc in first["source_documents"]
+        ]
+    assert rag.get_answer_cache_stats()["hits"] == 4
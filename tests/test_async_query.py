@@ -0,0 +1,93 @@
+"""
+Asenkron Sorgu Testleri - Tek olay döngüsündeki aquery / aget_similar_documents çağrılarının
+stub LLM ile örtüşerek yürüdüğü ve embedding/arama işinin döngüyü bloklamadığı doğrulanır
+"""
+import time
+import asyncio
+
+import pytest
+
+from src.rag_pipeline import RAGPipeline
+
+LLM_LATENCY = 0.4
+EMBED_DELAY = 0.3
+CONCURRENCY = 4
+
+
+@pytest.fixture
+def rag(make_pipeline):
+    return make_pipeline(STUB_LLM_LATENCY=LLM_LATENCY)
+
+
+def slow_embeddings(rag: RAGPipeline, monkeypatch):
+    """Sorgu embedding'ini bloklayan (time.sleep) yavaş bir modele çevirir"""
+    embed = rag.embeddings.embed_query_array
+
+    def slow(text):
+        time.sleep(EMBED_DELAY)
+        return embed(text)
+
+    monkeypatch.setattr(rag.embeddings, "embed_query_array", slow)
+
+
+async def gather_with_heartbeat(coroutines):
+    """Çağrıları birlikte yürütür; olay döngüsünün en uzun tepkisiz kaldığı süreyi de ölçer"""
+    gaps = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    beat = asyncio.ensure_future(heartbeat())
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(*coroutines)
+    finally:
+        done.set()
+        await beat
+    return results, time.perf_counter() - start, max(gaps)
+
+
+def test_aquery_calls_overlap_on_one_loop(rag):
+    questions = [f"harika film {i}" for i in range(CONCURRENCY)]
+
+    results, wall, _ = asyncio.run(gather_with_heartbeat(rag.aquery(question) for question in questions))
+
+    assert [result.get("error") for result in results] == [None] * CONCURRENCY
+    assert [result["question"] for result in results] == questions
+    assert all(result["answer"].startswith("[stub:") and result["source_documents"] for result in results)
+    # Sırayla yürüseydi en az CONCURRENCY * LLM_LATENCY sürerdi
+    assert wall < CONCURRENCY * LLM_LATENCY * 0.6
+
+
+def test_aquery_offloads_embedding_from_event_loop(rag, monkeypatch):
+    slow_embeddings(rag, monkeypatch)
+
+    results, wall, max_gap = asyncio.run(
+        gather_with_heartbeat(rag.aquery(f"kötü film {i}") for i in range(CONCURRENCY))
+    )
+
+    assert [result.get("error") for result in results] == [None] * CONCURRENCY
+    assert wall < CONCURRENCY * (EMBED_DELAY + LLM_LATENCY) * 0.6
+    # Embedding olay döngüsünde yürüseydi döngü EMBED_DELAY boyunca tepkisiz kalırdı
+    assert max_gap < EMBED_DELAY / 2
+
+
+def test_aget_similar_documents_runs_in_executor(rag, monkeypatch):
+    slow_embeddings(rag, monkeypatch)
+    expected = rag.get_similar_documents("harika film", k=3)
+
+    results, wall, max_gap = asyncio.run(
+        gather_with_heartbeat(rag.aget_similar_documents("harika film", k=3) for _ in range(CONCURRENCY))
+    )
+
+    assert all(
+        [doc.page_content for doc in docs] == [doc.page_content for doc in expected] for docs in results
+    )
+    assert wall < CONCURRENCY * EMBED_DELAY * 0.6
+    assert max_gap < EMBED_DELAY / 2
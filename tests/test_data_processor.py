@@ -0,0 +1,36 @@
+"""
+Veri İşleme Testleri - TXT dosyalarının boş satırla ayrılmış bloklar halinde akışla okunması
+"""
+from src.data_processor import DataProcessor
+
+
+def write(tmp_path, text: str) -> str:
+    path = tmp_path / "reviews.txt"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_txt_is_streamed_as_blank_line_separated_records(tmp_path):
+    review = "x" * 60
+    path = write(tmp_path, "\n\n".join(f"=== ELEŞTİRİ #{i} ===\n{review}" for i in range(10)) + "\n")
+    processor = DataProcessor(chunk_size=100, chunk_overlap=0)
+
+    records = list(processor.iter_file_records(path))
+
+    # Her kayıt chunk_size'ı aşmaz; dosya tek kayıt olarak yüklenmez ve hiçbir blok kaybolmaz
+    assert len(records) == 10
+    assert all(len(text) <= 100 for text, _ in records)
+    assert records[3][0] == f"=== ELEŞTİRİ #3 ===\n{review}"
+    assert records[0][1] == {"source": path, "type": "film_review"}
+
+
+def test_small_blocks_are_grouped_and_large_blocks_kept_whole(tmp_path):
+    large = "y" * 250
+    path = write(tmp_path, "BAŞLIK\n=====\n\n\n=== POZİTİF ===\n\na\nb\n\n" + large)
+    processor = DataProcessor(chunk_size=100, chunk_overlap=0)
+
+    texts = [text for text, _ in processor.iter_file_records(path)]
+
+    assert texts == ["BAŞLIK\n=====\n\n=== POZİTİF ===\n\na\nb", large]
+    chunks = processor.split_into_chunks(texts[1])
+    assert "".join(chunk.page_content for chunk in chunks) == large
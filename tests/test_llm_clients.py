@@ -0,0 +1,116 @@
+"""
+LLM Clients Testleri - Yerel http.server ile taklit edilen Ollama'ya karşı ısınma isteği ve
+paylaşılan bağlantı havuzunun farklı olay döngülerinde kullanımı; stub Ollama ile soğuk
+yükleme ve ısınma ölçümü
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from benchmarks.stub_ollama import StubOllamaServer
+from benchmarks.warmup import unload_model
+from src.llm_clients import get_ollama_chat, warm_up_ollama
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """/api/generate (ısınma) ve /api/chat (tek parçalı ndjson cevap) uçları; istekleri kaydeder"""
+
+    protocol_version = 'HTTP/1.1'
+    requests: list = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.requests.append((self.path, body, self.client_address[1]))
+        if self.path == '/api/generate':
+            lines = [{'model': body['model'], 'created_at': '2024-01-01T00:00:00Z', 'response': '', 'done': True}]
+        else:
+            lines = [
+                {'model': body['model'], 'created_at': '2024-01-01T00:00:00Z',
+                 'message': {'role': 'assistant', 'content': 'merhaba'}, 'done': False},
+                {'model': body['model'], 'created_at': '2024-01-01T00:00:00Z',
+                 'message': {'role': 'assistant', 'content': ''}, 'done': True, 'done_reason': 'stop'}
+            ]
+        payload = ''.join(json.dumps(line) + '\n' for line in lines).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def ollama_url():
+    FakeOllamaHandler.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeOllamaHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_warm_up_uses_public_api_and_shared_connection(ollama_url):
+    warm_up_ollama(ollama_url, 'phi3:mini', keep_alive='30m', background=False)
+    llm, pooled = get_ollama_chat(ollama_url, 'phi3:mini', 0.5, 16, 10.0, keep_alive='30m')
+
+    assert pooled
+    assert llm.invoke('soru').content == 'merhaba'
+    (warm_path, warm_body, warm_port), (chat_path, _, chat_port) = FakeOllamaHandler.requests
+    assert (warm_path, warm_body) == ('/api/generate', {'model': 'phi3:mini', 'keep_alive': '30m'})
+    # Sorgu, ısınmanın açtığı bağlantıyı yeniden kullanır
+    assert chat_path == '/api/chat'
+    assert chat_port == warm_port
+
+
+def test_pipelines_work_across_event_loops(ollama_url):
+    # Her asyncio.run yeni bir olay döngüsüdür; paylaşılan istemci eski döngüye bağlı kalmamalı
+    for _ in range(3):
+        llm, _ = get_ollama_chat(ollama_url, 'phi3:mini', 0.5, 16, 10.0)
+        assert asyncio.run(llm.ainvoke('soru')).content == 'merhaba'
+        assert llm.invoke('soru').content == 'merhaba'
+
+
+def first_token_seconds(llm) -> float:
+    start = time.perf_counter()
+    next(chunk for chunk in llm.stream('soru') if chunk.content)
+    return time.perf_counter() - start
+
+
+def test_stub_cold_load_is_cleared_by_warm_up_and_keep_alive():
+    with StubOllamaServer(load_seconds=0.5, first_token_seconds=0.0) as stub:
+        llm, _ = get_ollama_chat(stub.url, 'phi3:mini', 0.5, 16, 10.0, keep_alive='30m')
+
+        assert first_token_seconds(llm) >= 0.5
+        # keep_alive süresince model bellekte kalır
+        assert first_token_seconds(llm) < 0.25
+
+        unload_model(stub.url, 'phi3:mini', timeout=10.0)
+        warm_up_ollama(stub.url, 'phi3:mini', keep_alive='30m', background=False)
+        assert first_token_seconds(llm) < 0.25
+        assert stub.loads == 2
+
+
+def test_warmup_benchmark_runs_offline_with_stub(tmp_path):
+    output = tmp_path / 'warmup.json'
+    subprocess.run(
+        [sys.executable, os.path.join(PROJECT_ROOT, 'benchmarks', 'warmup.py'), '--stub', '--stub-load-seconds', '0.5',
+         '--stub-first-token', '0', '--rounds', '1', '--output', str(output)],
+        cwd=PROJECT_ROOT, check=True, capture_output=True, timeout=300
+    )
+    results = json.loads(output.read_text(encoding='utf-8'))['results']
+
+    assert results['cold']['first_token']['p50_ms'] >= 500
+    assert results['warm']['first_token']['p50_ms'] < 250
+    assert results['warm']['warmup']['p50_ms'] >= 500
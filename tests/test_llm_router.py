@@ -0,0 +1,319 @@
+"""
+LLM Router Testleri - Ağa çıkmadan (StubChatModel ve hata veren sahte model ile) yedeğe geçiş,
+zaman aşımı, devre açılması, bekleme sonrası yarı açık deneme ve iptal durumları
+"""
+import time
+import asyncio
+from typing import Any, List, Optional
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.llm_router import CLOSED, HALF_OPEN, OPEN, LLMBackend, LLMRouter, RouterError
+from src.stub_llm import StubChatModel
+
+
+class FlakyChatModel(BaseChatModel):
+    """fail açıkken hata veren, kapalıyken sabit cevap dönen sahte model; çağrıları sayar"""
+
+    fail: bool = True
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "flaky"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("backend down")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="flaky ok"))])
+
+
+def stub(latency: float = 0.0) -> StubChatModel:
+    return StubChatModel(latency=latency, tokens_per_second=0, answer_tokens=4)
+
+
+def make_router(*backends: LLMBackend, **settings: Any) -> LLMRouter:
+    settings.setdefault('request_timeout', 5.0)
+    settings.setdefault('failure_threshold', 2)
+    settings.setdefault('cooldown_seconds', 60.0)
+    return LLMRouter(backends=list(backends), **settings)
+
+
+def served_by(router: LLMRouter) -> str:
+    return router.invoke("soru").response_metadata['llm_backend']
+
+
+def test_failover_to_next_backend():
+    flaky = FlakyChatModel()
+    router = make_router(LLMBackend("primary", flaky), LLMBackend("fallback", stub()))
+
+    assert served_by(router) == "fallback"
+    assert flaky.calls == 1
+    assert router.backends[0].last_error == "backend down"
+
+
+def test_configured_order_wins_over_latency():
+    # Yedek daha hızlı ölçülse de seçili sağlayıcı sağlıklı olduğu sürece önce denenir
+    router = make_router(LLMBackend("primary", stub(0.05)), LLMBackend("fallback", stub()))
+    router.backends[1].calls.extend([(0.001, True)] * 5)
+
+    assert [served_by(router) for _ in range(3)] == ["primary"] * 3
+
+
+def test_latency_routing_between_replicas_of_same_model():
+    router = make_router(
+        LLMBackend("replica-a", stub(), model="m"),
+        LLMBackend("replica-b", stub(), model="m"),
+        LLMBackend("other", stub())
+    )
+    router.backends[0].calls.extend([(0.5, True)] * 5)
+    router.backends[1].calls.extend([(0.01, True)] * 5)
+
+    assert [backend.name for backend in router._candidates()] == ["replica-b", "replica-a", "other"]
+
+
+def test_all_backends_failing_raises_router_error():
+    router = make_router(LLMBackend("a", FlakyChatModel()), LLMBackend("b", FlakyChatModel()))
+
+    with pytest.raises(RouterError, match="a: backend down; b: backend down"):
+        router.invoke("soru")
+
+
+def test_timeout_moves_request_to_next_backend():
+    router = make_router(LLMBackend("slow", stub(2.0)), LLMBackend("fast", stub()), request_timeout=0.2)
+
+    start = time.monotonic()
+    assert served_by(router) == "fast"
+    assert time.monotonic() - start < 1.0
+    assert "zaman aşımı" in router.backends[0].last_error
+
+
+def test_async_timeout_moves_request_to_next_backend():
+    router = make_router(LLMBackend("slow", stub(2.0)), LLMBackend("fast", stub()), request_timeout=0.2)
+
+    message = asyncio.run(router.ainvoke("soru"))
+    assert message.response_metadata['llm_backend'] == "fast"
+    assert router.backends[0].calls[-1][1] is False
+
+
+def test_circuit_opens_after_consecutive_failures():
+    flaky = FlakyChatModel()
+    router = make_router(LLMBackend("primary", flaky), LLMBackend("fallback", stub()), failure_threshold=2)
+
+    served_by(router)
+    assert router.backends[0].state == CLOSED
+    served_by(router)
+    assert router.backends[0].state == OPEN
+
+    # Açık devre bekleme süresince atlanır
+    assert served_by(router) == "fallback"
+    assert flaky.calls == 2
+
+
+def test_half_open_trial_success_closes_circuit():
+    flaky = FlakyChatModel()
+    router = make_router(
+        LLMBackend("primary", flaky), LLMBackend("fallback", stub()), failure_threshold=1, cooldown_seconds=0.1
+    )
+    served_by(router)
+    assert router.backends[0].state == OPEN
+
+    flaky.fail = False
+    time.sleep(0.15)
+    assert served_by(router) == "primary"
+    assert router.backends[0].state == CLOSED
+    # Açılmadan önceki hatalar pencereden silinir
+    assert router.backends[0].error_rate() == 0.0
+
+
+def test_half_open_trial_failure_reopens_circuit():
+    flaky = FlakyChatModel()
+    router = make_router(
+        LLMBackend("primary", flaky), LLMBackend("fallback", stub()), failure_threshold=1, cooldown_seconds=0.1
+    )
+    served_by(router)
+    time.sleep(0.15)
+
+    assert served_by(router) == "fallback"
+    assert flaky.calls == 2
+    assert router.backends[0].state == OPEN
+    assert router.backends[0].trial_in_flight is False
+
+
+def test_failed_probe_keeps_circuit_open():
+    flaky = FlakyChatModel(fail=False)
+    router = make_router(
+        LLMBackend("primary", flaky, probe=lambda: False), LLMBackend("fallback", stub()), cooldown_seconds=0.0
+    )
+    router._open(router.backends[0], "test")
+
+    assert served_by(router) == "fallback"
+    assert flaky.calls == 0
+    assert router.backends[0].state == OPEN
+
+
+def test_cancelled_trial_releases_half_open_backend():
+    primary = StubChatModel(latency=5.0, tokens_per_second=0, answer_tokens=4)
+    router = make_router(LLMBackend("primary", primary), LLMBackend("fallback", stub()), cooldown_seconds=0.0)
+    backend = router.backends[0]
+    router._open(backend, "test")
+
+    async def cancel_trial():
+        task = asyncio.ensure_future(router.ainvoke("soru"))
+        # Deneme hakkı alınıp istek backend'e gidene kadar bekle
+        while not backend.trial_in_flight:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+
+    # İptal hata sayılmaz; devre yarı açık kalır ve sıradaki istek denemeyi yapabilir
+    assert backend.state == HALF_OPEN
+    assert backend.trial_in_flight is False
+    assert all(ok for _, ok in backend.calls)
+    primary.latency = 0.0
+    assert served_by(router) == "primary"
+    assert backend.state == CLOSED
+
+
+def test_interrupted_sync_trial_releases_half_open_backend():
+    class InterruptingChatModel(FlakyChatModel):
+        def _generate(self, *args: Any, **kwargs: Any) -> ChatResult:
+            raise KeyboardInterrupt
+
+    router = make_router(LLMBackend("primary", InterruptingChatModel()), cooldown_seconds=0.0)
+    backend = router.backends[0]
+    router._open(backend, "test")
+
+    with pytest.raises(KeyboardInterrupt):
+        router.invoke("soru")
+
+    assert backend.state == HALF_OPEN
+    assert backend.trial_in_flight is False
+
+
+# ---- yerel HTTP sunucularına yönlendirilmiş gerçek backend'ler (ChatOllama, Gemini REST) ----
+
+@pytest.fixture
+def pipeline_router(embedding_model_dir, tmp_path, monkeypatch):
+    """RAGPipeline'ın .env ayarlarından kurduğu LLMRouter (sağlayıcılar sahte sunuculara yönlendirilir)"""
+    from src.rag_pipeline import RAGPipeline
+
+    def build(provider: str, fallbacks: List[str], **env: Any) -> LLMRouter:
+        settings = {
+            'EMBEDDING_MODEL': embedding_model_dir,
+            'EMBEDDING_CACHE_DIR': 'none',
+            'OLLAMA_WARMUP': '0',
+            'GEMINI_API_KEY': 'test-key',
+            'GEMINI_MODEL': 'gemini-flash-latest',
+            'GEMINI_MAX_RETRIES': '1',
+            **env
+        }
+        for name, value in settings.items():
+            monkeypatch.setenv(name, str(value))
+        rag = RAGPipeline(persist_directory=str(tmp_path / "faiss_db"), model_provider=provider, fallback_providers=fallbacks)
+        return rag.llm
+
+    return build
+
+
+def state_of(router: LLMRouter, name: str) -> str:
+    return next(backend.state for backend in router.backends if backend.name == name)
+
+
+def test_http_backends_serve_in_configured_order(fake_llm_server, pipeline_router):
+    gemini, ollama = fake_llm_server(), fake_llm_server()
+    router = pipeline_router('gemini', ['ollama'], GEMINI_API_ENDPOINT=gemini.url, OLLAMA_BASE_URL=ollama.url)
+
+    assert [backend.name for backend in router.backends] == [
+        'gemini:gemini-flash-latest', 'gemini:gemini-pro-latest', 'gemini:gemini-1.5-pro', 'gemini:gemini-1.5-flash',
+        'ollama:phi3:mini'
+    ]
+    message = router.invoke("soru")
+    assert message.content == 'gemini gemini-flash-latest merhaba'
+    assert message.response_metadata['llm_backend'] == 'gemini:gemini-flash-latest'
+    assert [path for method, path, _, _ in gemini.requests] == ['/v1beta/models/gemini-flash-latest:generateContent']
+    assert ollama.model_calls() == 0
+
+
+def test_http_timeout_fails_over_to_fallback_server(fake_llm_server, pipeline_router):
+    ollama, gemini = fake_llm_server(), fake_llm_server()
+    ollama.delay = 3.0
+    router = pipeline_router(
+        'ollama', ['gemini'], OLLAMA_BASE_URL=ollama.url, GEMINI_API_ENDPOINT=gemini.url, LLM_REQUEST_TIMEOUT=0.5
+    )
+
+    start = time.monotonic()
+    message = router.invoke("soru")
+    assert message.response_metadata['llm_backend'] == 'gemini:gemini-flash-latest'
+    # Yavaş sunucunun cevabı beklenmedi
+    assert time.monotonic() - start < ollama.delay
+    # Router'ın ve HTTP istemcisinin zaman aşımı aynı süre: hangisi önce dolarsa o raporlanır
+    last_error = router.get_stats()[0]['last_error']
+    assert 'zaman aşımı' in last_error or 'timed out' in last_error
+
+
+@pytest.mark.parametrize('primary, fallback, primary_backend', [
+    ('ollama', 'gemini', 'ollama:phi3:mini'),
+    ('gemini', 'ollama', 'gemini:gemini-flash-latest'),
+])
+def test_http_circuit_opens_and_recovers_through_probe(
+    fake_llm_server, pipeline_router, primary, fallback, primary_backend
+):
+    servers = {'ollama': fake_llm_server(), 'gemini': fake_llm_server()}
+    down = servers[primary]
+    down.fail, down.healthy = True, False
+    router = pipeline_router(
+        primary, [fallback],
+        OLLAMA_BASE_URL=servers['ollama'].url,
+        GEMINI_API_ENDPOINT=servers['gemini'].url,
+        LLM_CIRCUIT_FAILURES=2,
+        LLM_CIRCUIT_COOLDOWN=0.3
+    )
+    fallback_name = next(backend.name for backend in router.backends if backend.name.startswith(fallback))
+
+    for _ in range(2):
+        assert router.invoke("soru").response_metadata['llm_backend'] == fallback_name
+    assert state_of(router, primary_backend) == 'open'
+
+    # Bekleme süresince açık devre atlanır: çökmüş sunucuya istek gitmez
+    calls = down.model_calls()
+    assert router.invoke("soru").response_metadata['llm_backend'] == fallback_name
+    assert down.model_calls() == calls
+
+    # Süre doldu ama sağlık yoklaması başarısız: devre açık kalır, model çağrılmaz
+    time.sleep(0.35)
+    assert router.invoke("soru").response_metadata['llm_backend'] == fallback_name
+    assert down.model_calls() == calls
+    assert state_of(router, primary_backend) == 'open'
+    assert any(method == 'GET' for method, _, _, _ in down.requests)
+
+    # Sunucu düzeldi: yoklama geçer, yarı açık deneme başarılı olur ve devre kapanır
+    down.fail, down.healthy = False, True
+    time.sleep(0.35)
+    assert router.invoke("soru").response_metadata['llm_backend'] == primary_backend
+    assert state_of(router, primary_backend) == 'closed'
+
+
+def test_http_ollama_replicas_route_by_latency(fake_llm_server, pipeline_router):
+    slow, fast = fake_llm_server(), fake_llm_server()
+    slow.delay, fast.delay = 0.2, 0.0
+    router = pipeline_router('ollama', [], OLLAMA_BASE_URL=f"{slow.url},{fast.url}")
+
+    assert {backend.model for backend in router.backends} == {'ollama:phi3:mini'}
+    # Önce ikisi de ölçülür, sonra istekler hızlı kopyaya gider
+    served = [router.invoke("soru").response_metadata['llm_backend'] for _ in range(5)]
+    assert served[:2] == [f"ollama:phi3:mini@{slow.url}", f"ollama:phi3:mini@{fast.url}"]
+    assert served[2:] == [f"ollama:phi3:mini@{fast.url}"] * 3
@@ -0,0 +1,41 @@
+"""
+Shard Testleri - Shard özetlerinin birleştirilmesi: 'hash' bölmede her shard tüm veriyi
+okuduğundan dosya/kayıt/chunk sayıları toplanmaz
+"""
+import pytest
+
+from src.sharded_store import merge_summaries
+
+
+def shard_summary(indexed: int) -> dict:
+    return {'files': 2, 'files_failed': 0, 'records': 5, 'chunks': 9, 'embedded': indexed, 'indexed': indexed, 'seconds': 1.0}
+
+
+def test_hash_split_takes_corpus_counts_once_and_sums_indexed():
+    merged = merge_summaries([shard_summary(3), shard_summary(4), shard_summary(2)], 'hash')
+
+    assert merged['shards'] == 3
+    assert (merged['files'], merged['records'], merged['chunks']) == (2, 5, 9)
+    assert merged['indexed'] == merged['embedded'] == 9
+    assert merged['seconds'] == 3.0
+
+
+def test_source_split_sums_every_count():
+    merged = merge_summaries([shard_summary(3), shard_summary(4)], 'source')
+
+    assert (merged['files'], merged['records'], merged['chunks'], merged['indexed']) == (4, 10, 18, 7)
+
+
+@pytest.mark.parametrize('by', ['hash', 'source'])
+def test_sharded_ingest_reports_real_corpus_size(make_pipeline, tmp_path, by):
+    data = tmp_path / "data"
+    data.mkdir()
+    for name in ("a", "b", "c"):
+        (data / f"{name}.txt").write_text("\n\n".join(f"film {name} {i}" for i in range(4)), encoding="utf-8")
+    pipeline = make_pipeline(FAISS_SHARDS=3, FAISS_SHARD_BY=by)
+
+    summary = pipeline.ingest_directory(str(data))
+
+    # Her dosya tek kayıt (küçük bloklar birleşir) ve tek chunk; her chunk bir shard'a düşer
+    assert (summary['files'], summary['records'], summary['chunks']) == (3, 3, 3)
+    assert summary['indexed'] == 3
@@ -0,0 +1,31 @@
+"""
+Vektör İndeks Testleri - eğitim örneği büyüklüğü: IVF kaba kuantizörü ve PQ kod kitaplarının
+ihtiyacından büyüğü kadar vektörle eğitilir
+"""
+import numpy as np
+import pytest
+
+from src.vector_index import build_index, training_size
+
+
+@pytest.mark.parametrize('spec, expected', [
+    ('Flat', 0),
+    ('IVF256,Flat', 256 * 64),
+    ('IVF4,PQ8', 256 * 39),           # PQ ihtiyacı IVF'inkinden büyük
+    ('IVF1024,PQ48', 1024 * 64),      # IVF ihtiyacı PQ'nunkinden büyük
+    ('IVF4,PQ8x4', 16 * 39),          # 4 bitlik kodlar: 16 merkez
+    ('OPQ8,IVF4,PQ8', 256 * 39),      # ön dönüşüm içindeki IVFPQ
+])
+def test_training_size_covers_ivf_and_pq(spec, expected):
+    assert training_size(spec, 96) == expected
+
+
+def test_ivf_pq_trains_without_undertraining_warning(capfd):
+    vectors = np.random.default_rng(0).standard_normal((2000, 32)).astype(np.float32)
+
+    index = build_index(vectors, 'IVF4,PQ8x4')
+
+    out, err = capfd.readouterr()
+    assert index.is_trained
+    assert '624 vektörlük örnekle' in out
+    assert 'WARNING clustering' not in err